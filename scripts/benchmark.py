@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# Benchmarks de los caminos críticos de compare_schemas y validate_compatibility.
+#
+# Para cada escenario de generadores_esquemas (más el Order.avsc real) mide el
+# parseo, iterar_cambios, analizar_cambios, validar_compatibilidad, la memoria
+# pico y la latencia de extremo a extremo de los dos scripts por línea de
+# comandos (contra un Schema Registry falso). Los resultados se comparan con
+# benchmark_baseline.json y la ejecución falla si alguna métrica empeora más
+# de la tolerancia permitida.
+#
+# La línea base no guarda segundos sino cocientes respecto a una calibración
+# medida en la misma ejecución: una carga fija de Python puro para las medidas
+# dentro del proceso y `python -c pass` para las de subprocesos. Así la misma
+# línea base sirve en máquinas más rápidas o más lentas que la que la generó.
+#
+# El presupuesto de arranque en frío de los scripts lo comprueba
+# tests/test_arranque.py, que se ejecuta en cada build.
+#
+#   python benchmark.py                 # comparar con la línea base
+#   python benchmark.py --actualizar    # regenerar la línea base
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from cache_esquemas import parsear_avro as parse
+from compare_schemas import iterar_cambios
+from generadores_esquemas import ESCENARIOS, mutar
+from registry_falso import RegistryFalso
+from validate_compatibility import analizar_cambios, validar_compatibilidad
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTA_BASELINE = os.path.join(DIRECTORIO, 'benchmark_baseline.json')
+RUTA_ORDER = os.path.join(DIRECTORIO, '..', 'common', 'src', 'main', 'avro', 'Order.avsc')
+
+# Escenarios en los que además se mide la latencia por línea de comandos
+ESCENARIOS_CLI = ('order', 'record_ancho_10k')
+
+
+def cronometrar(funcion, repeticiones):
+    # Mínimo de varias repeticiones: es la medida menos sensible al ruido
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def calibrar(repeticiones):
+    # Referencias de la máquina actual: CPU en el proceso y arranque del intérprete
+    documento = {'campos': [{'name': f"campo_{i}", 'type': ['null', 'string'], 'default': None} for i in range(2000)]}
+    calibracion = {}
+    calibracion['proceso_s'], _ = cronometrar(
+        lambda: [json.loads(json.dumps(documento, sort_keys=True)) for _ in range(10)], max(repeticiones, 10))
+    calibracion['interprete_s'], _ = cronometrar(
+        lambda: subprocess.run([sys.executable, '-c', 'pass'], capture_output=True), max(repeticiones, 10))
+    print("⏱️  calibración: " + ", ".join(f"{k}={v:.4f}" for k, v in calibracion.items()))
+    return calibracion
+
+
+def relativos(resultados, calibracion):
+    # Tiempos como múltiplos de su calibración (sufijo _x); la memoria se
+    # guarda tal cual. Las medidas que lanzan procesos se dividen por el
+    # arranque del intérprete; las demás, por la carga fija de Python.
+    convertidos = {}
+    for escenario, metricas in resultados.items():
+        convertidos[escenario] = {}
+        for metrica, valor in metricas.items():
+            if not metrica.endswith('_s'):
+                convertidos[escenario][metrica] = valor
+                continue
+            referencia = calibracion['interprete_s' if metrica.startswith('cli_') else 'proceso_s']
+            convertidos[escenario][f"{metrica[:-2]}_x"] = valor / referencia
+    return convertidos
+
+
+def medir_escenario(texto_ant, texto_nuevo, repeticiones):
+    metricas = {}
+    metricas['parseo_s'], (esquema_ant, esquema_nuevo) = cronometrar(
+        lambda: (parse(texto_ant), parse(texto_nuevo)), repeticiones)
+    metricas['iterar_cambios_s'], _ = cronometrar(
+        lambda: list(iterar_cambios(esquema_ant, esquema_nuevo)), repeticiones)
+    metricas['analizar_cambios_s'], cambios = cronometrar(
+        lambda: analizar_cambios(esquema_ant, esquema_nuevo), repeticiones)
+    metricas['validar_compatibilidad_s'], _ = cronometrar(
+        lambda: validar_compatibilidad(cambios, 'FULL'), repeticiones)
+
+    tracemalloc.start()
+    esquema_ant, esquema_nuevo = parse(texto_ant), parse(texto_nuevo)
+    list(iterar_cambios(esquema_ant, esquema_nuevo))
+    analizar_cambios(esquema_ant, esquema_nuevo)
+    metricas['memoria_pico_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return metricas
+
+
+def medir_cli(texto_ant, texto_nuevo, repeticiones):
+    metricas = {}
+    with tempfile.TemporaryDirectory() as directorio, RegistryFalso() as registry:
+        registry.añadir('orders-value', texto_ant)
+        ruta_ant = os.path.join(directorio, 'old_schema.avsc')
+        ruta_nuevo = os.path.join(directorio, 'new_schema.avsc')
+        with open(ruta_ant, 'w') as f:
+            f.write(texto_ant)
+        with open(ruta_nuevo, 'w') as f:
+            f.write(texto_nuevo)
+
+        # Sin caché en disco: se mide el peor caso de una ejecución en frío
+        entorno = dict(os.environ, SCHEMA_REGISTRY_URL=registry.url, SCHEMA_CACHE_DIR='')
+        for script in ('compare_schemas.py', 'validate_compatibility.py'):
+            comando = [sys.executable, os.path.join(DIRECTORIO, script), ruta_ant, ruta_nuevo]
+            metricas[f"cli_{script[:-3]}_s"], _ = cronometrar(
+                lambda: subprocess.run(comando, env=entorno, capture_output=True), repeticiones)
+    return metricas
+
+
+def ejecutar(repeticiones, escenarios):
+    resultados = {}
+    with open(RUTA_ORDER, 'r') as f:
+        order = json.load(f)
+    fuentes = {'order': lambda: order, **ESCENARIOS}
+
+    for nombre, generar in fuentes.items():
+        if escenarios and nombre not in escenarios:
+            continue
+        esquema = generar()
+        texto_ant, texto_nuevo = json.dumps(esquema), json.dumps(mutar(esquema))
+        metricas = medir_escenario(texto_ant, texto_nuevo, repeticiones)
+        if nombre in ESCENARIOS_CLI:
+            metricas.update(medir_cli(texto_ant, texto_nuevo, repeticiones))
+        resultados[nombre] = metricas
+        print(f"⏱️  {nombre}: " + ", ".join(f"{k}={v:.4f}" for k, v in metricas.items()))
+    return resultados
+
+
+def comparar_con_baseline(resultados, calibracion, baseline, tolerancia, minimo_s, minimo_mb):
+    regresiones = []
+    actuales = relativos(resultados, calibracion)
+    for escenario, metricas in resultados.items():
+        for metrica, valor in metricas.items():
+            # Por debajo de `minimo_s` el ruido del sistema domina la medida
+            if metrica.endswith('_s') and valor < minimo_s:
+                continue
+            if metrica.endswith('_mb') and valor < minimo_mb:
+                continue
+            clave = f"{metrica[:-2]}_x" if metrica.endswith('_s') else metrica
+            referencia = baseline.get(escenario, {}).get(clave)
+            if referencia is None:
+                continue
+            relativo = actuales[escenario][clave]
+            if relativo > referencia * (1 + tolerancia):
+                regresiones.append(f"{escenario}.{clave}: {relativo:.4f} > {referencia:.4f} (+{tolerancia:.0%})")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de comparación y validación de esquemas")
+    parser.add_argument('--actualizar', action='store_true', help="Guardar los resultados como nueva línea base")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--tolerancia', type=float, default=0.5, help="Empeoramiento relativo permitido")
+    parser.add_argument('--minimo', type=float, default=0.02, help="Tiempos por debajo de este valor no se comparan")
+    parser.add_argument('--minimo-mb', type=float, default=1.0, help="Memoria por debajo de este valor no se compara")
+    parser.add_argument('--escenario', action='append', help="Ejecutar solo este escenario (repetible)")
+    parser.add_argument('--salida', help="Guardar los resultados en un archivo JSON")
+    args = parser.parse_args()
+
+    calibracion = calibrar(args.repeticiones)
+    resultados = ejecutar(args.repeticiones, args.escenario)
+    # Se calibra antes y después y se toma el mínimo: la máquina puede cambiar
+    # de velocidad durante la ejecución
+    final = calibrar(args.repeticiones)
+    calibracion = {clave: min(valor, final[clave]) for clave, valor in calibracion.items()}
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({'calibracion': calibracion, **resultados}, f, indent=2)
+
+    if args.actualizar:
+        with open(RUTA_BASELINE, 'w') as f:
+            json.dump(relativos(resultados, calibracion), f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"📌 Línea base actualizada en {RUTA_BASELINE}")
+        sys.exit(0)
+
+    if not os.path.exists(RUTA_BASELINE):
+        print("⚠️ No hay línea base; ejecuta con --actualizar para crearla")
+        sys.exit(0)
+
+    with open(RUTA_BASELINE, 'r') as f:
+        baseline = json.load(f)
+    regresiones = comparar_con_baseline(resultados, calibracion, baseline, args.tolerancia, args.minimo, args.minimo_mb)
+    if regresiones:
+        # Una ráfaga de carga en la máquina no es una regresión: los escenarios
+        # afectados se repiten y cuenta el mejor tiempo de los dos intentos
+        afectados = sorted({r.partition('.')[0] for r in regresiones})
+        print(f"\n🔁 Repitiendo {', '.join(afectados)} para confirmar las regresiones")
+        for escenario, metricas in ejecutar(args.repeticiones, afectados).items():
+            for metrica, valor in metricas.items():
+                resultados[escenario][metrica] = min(resultados[escenario][metrica], valor)
+        regresiones = comparar_con_baseline(resultados, calibracion, baseline, args.tolerancia, args.minimo,
+                                            args.minimo_mb)
+    if regresiones:
+        print("\n❌ Regresiones de rendimiento:")
+        for r in regresiones:
+            print(f" - {r}")
+        sys.exit(1)
+
+    print("\n✅ Sin regresiones respecto a la línea base")
+    sys.exit(0)
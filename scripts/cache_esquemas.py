@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Caché en disco direccionada por contenido para los resultados de análisis.
+#
+# Las claves son huellas SHA-256 del texto exacto de los esquemas, de modo que
+# una ejecución repetida sobre los mismos archivos no vuelve a analizarlos. Solo
+# se guarda JSON: nada de lo que se lee de la caché se ejecuta. El directorio
+# se elige con SCHEMA_CACHE_DIR (por defecto ~/.cache/kafka-avro, fuera del
+# espacio de trabajo); SCHEMA_CACHE_DIR='' desactiva la caché. La versión de
+# avro y una huella del código de análisis forman parte de la ruta: al
+# actualizar avro o cambiar las reglas de validación no se reutiliza nada.
+import json
+import os
+from functools import lru_cache
+
+from huella import huella_texto
+from instrumentacion import contar, etapa
+
+# Se incrementa cuando cambia el formato de los resultados almacenados
+VERSION_CACHE = 4
+
+# Módulos de los que dependen los veredictos guardados
+MODULOS_ANALISIS = ('validate_compatibility.py', 'resolucion.py', 'columnar.py', 'diferencias.py',
+                    'valores_default.py', 'codec.py', 'matriz.py')
+
+
+def directorio_cache():
+    por_defecto = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'kafka-avro')
+    return os.environ.get('SCHEMA_CACHE_DIR', por_defecto)
+
+
+@lru_cache(maxsize=1)
+def version_avro():
+    # Leída de VERSION.txt sin importar avro, para no cargarlo en el arranque
+    import importlib.util
+    spec = importlib.util.find_spec('avro')
+    if spec is None or not spec.submodule_search_locations:
+        return 'sin-avro'
+    try:
+        ruta = os.path.join(list(spec.submodule_search_locations)[0], 'VERSION.txt')
+        return spec.loader.get_data(ruta).decode().strip()
+    except (OSError, AttributeError):
+        return 'desconocida'
+
+
+@lru_cache(maxsize=1)
+def version_codigo():
+    # Huella del código fuente de los módulos de análisis
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    partes = []
+    for modulo in MODULOS_ANALISIS:
+        try:
+            with open(os.path.join(directorio, modulo), 'r', encoding='utf-8') as f:
+                partes.append(huella_texto(f.read()))
+        except OSError:
+            partes.append('-')
+    return huella_texto('\0'.join(partes))[:12]
+
+
+def _ruta(espacio, clave, extension):
+    return os.path.join(directorio_cache(), f"v{VERSION_CACHE}-avro{version_avro()}-{version_codigo()}", espacio,
+                        clave[:2], f"{clave}.{extension}")
+
+
+def _escribir(ruta, datos, modo):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, modo) as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+def parsear_avro(texto):
+    # avro se importa en el primer parseo real: los scripts que terminan antes
+    # (uso, archivo inexistente, acierto de caché) arrancan sin él
+    from avro.schema import parse
+    return parse(texto)
+
+
+def esquema_parseado(texto, parsear=parsear_avro):
+    # Los objetos de avro no se guardan en disco: deserializarlos (pickle)
+    # ejecutaría lo que haya en la caché. Dentro de un proceso, validate_compatibility
+    # los reutiliza con su propio lru_cache.
+    contar('esquemas_parseados')
+    with etapa('parseo'):
+        return parsear(texto)
+
+
+def clave_analisis(nombre, *textos):
+    return huella_texto(nombre + '\0' + '\0'.join(huella_texto(t) for t in textos))
+
+
+def leer_analisis(clave):
+    if not directorio_cache():
+        return None
+    try:
+        with open(_ruta('analisis', clave, 'json'), 'r') as f:
+            resultado = json.load(f)
+    except (OSError, ValueError):
+        contar('cache_esquemas', espacio='analisis', resultado='fallo')
+        return None
+    contar('cache_esquemas', espacio='analisis', resultado='acierto')
+    return resultado
+
+
+def guardar_analisis(clave, resultado):
+    if not directorio_cache():
+        return
+    try:
+        _escribir(_ruta('analisis', clave, 'json'), json.dumps(resultado, ensure_ascii=False), 'w')
+    except OSError:
+        pass
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# Cliente de Schema Registry compartido por los scripts de validación.
+#
+# Reutiliza una única sesión HTTP (keep-alive con pool de conexiones) y cachea
+# los recursos consultados: los inmutables (esquema por ID, versión concreta de
+# un subject) por LRU y los mutables (última versión, lista de versiones,
+# compatibilidad) además con TTL. La caché puede persistirse en disco para que
+# varias ejecuciones del pipeline compartan las respuestas.
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentacion import contar, etapa
+
+URL_POR_DEFECTO = "http://schema-registry:8081"
+CONTENT_TYPE = "application/vnd.schemaregistry.v1+json"
+# Descargas simultáneas en todas_las_versiones (por debajo de pool_maxsize)
+HILOS_DESCARGA = 16
+
+
+class CacheTTL:
+    def __init__(self, max_entradas=1024, ttl=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        # El cliente se comparte entre hilos (validación por lotes)
+        self.bloqueo = threading.Lock()
+
+    def obtener(self, clave):
+        with self.bloqueo:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            valor, instante = entrada
+            if self.ttl is not None and time.time() - instante > self.ttl:
+                del self.entradas[clave]
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor, instante=None):
+        with self.bloqueo:
+            self.entradas[clave] = (valor, instante if instante is not None else time.time())
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self.bloqueo:
+            self.entradas.pop(clave, None)
+
+    def exportar(self):
+        with self.bloqueo:
+            return [[clave, valor, instante] for clave, (valor, instante) in self.entradas.items()]
+
+    def importar(self, filas):
+        for clave, valor, instante in filas:
+            self.guardar(clave, valor, instante)
+
+
+class ErrorRegistry(Exception):
+    def __init__(self, mensaje, status_code=None):
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+class ClienteRegistry:
+    def __init__(self, url=None, ttl=60, max_entradas=1024, ruta_cache=None, timeout=10):
+        self.url = (url or os.environ.get('SCHEMA_REGISTRY_URL', URL_POR_DEFECTO)).rstrip('/')
+        self.timeout = timeout
+        self.peticiones = 0
+
+        # requests solo se importa al crear un cliente HTTP: los scripts que
+        # no llegan a consultar el registry (o leen del espejo) arrancan sin él
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.headers['Accept'] = CONTENT_TYPE
+
+        self.caches = {
+            'schemas': CacheTTL(max_entradas),             # id -> esquema (inmutable)
+            'versiones': CacheTTL(max_entradas),           # subject/versión -> metadatos (inmutable)
+            'subjects': CacheTTL(max_entradas, ttl),       # subject -> lista de versiones
+            'ultimas': CacheTTL(max_entradas, ttl),        # subject -> metadatos de la última versión
+            'compatibilidad': CacheTTL(max_entradas, ttl), # subject -> nivel de compatibilidad
+        }
+
+        self.ruta_cache = ruta_cache or os.environ.get('REGISTRY_CACHE')
+        if self.ruta_cache:
+            self.cargar_cache()
+            atexit.register(self.guardar_cache)
+
+    # --- Persistencia de la caché ---
+
+    def cargar_cache(self):
+        if not os.path.exists(self.ruta_cache):
+            return
+        try:
+            with open(self.ruta_cache, 'r') as f:
+                contenido = json.load(f)
+        except (OSError, ValueError):
+            return
+        if contenido.get('url') != self.url:
+            return
+        for nombre, filas in contenido.get('caches', {}).items():
+            if nombre in self.caches:
+                self.caches[nombre].importar(filas)
+
+    def guardar_cache(self):
+        contenido = {
+            'url': self.url,
+            'caches': {nombre: cache.exportar() for nombre, cache in self.caches.items()},
+        }
+        temporal = f"{self.ruta_cache}.tmp"
+        with open(temporal, 'w') as f:
+            json.dump(contenido, f)
+        os.replace(temporal, self.ruta_cache)
+
+    # --- HTTP ---
+
+    def _get(self, ruta):
+        return self._get_condicional(ruta)[0]
+
+    def _get_condicional(self, ruta, etag=None):
+        # GET con If-None-Match: (None, etag) si el recurso no ha cambiado. Sin
+        # ETag en la respuesta (el registry no siempre lo envía) hay cuerpo siempre.
+        self.peticiones += 1
+        recurso = ruta.split('/')[1]
+        contar('http_peticiones', recurso=recurso)
+        with etapa('http', recurso=recurso):
+            response = self.sesion.get(f"{self.url}{ruta}", timeout=self.timeout,
+                                       headers={'If-None-Match': etag} if etag else None)
+        if response.status_code == 304:
+            return None, etag
+        if response.status_code != 200:
+            raise ErrorRegistry(f"GET {ruta} devolvió {response.status_code}", response.status_code)
+        return response.json(), response.headers.get('ETag')
+
+    def _cacheado(self, cache, clave, ruta):
+        valor = self.caches[cache].obtener(clave)
+        contar('cache_registry', cache=cache, resultado='fallo' if valor is None else 'acierto')
+        if valor is None:
+            valor = self._get(ruta)
+            self.caches[cache].guardar(clave, valor)
+        return valor
+
+    # --- Recursos ---
+
+    def esquema_por_id(self, schema_id):
+        return self._cacheado('schemas', str(schema_id), f"/schemas/ids/{schema_id}")['schema']
+
+    def versiones(self, subject):
+        return self._cacheado('subjects', subject, f"/subjects/{subject}/versions")
+
+    def version(self, subject, version='latest'):
+        if version == 'latest':
+            metadatos = self._cacheado('ultimas', subject, f"/subjects/{subject}/versions/latest")
+        else:
+            metadatos = self._cacheado('versiones', f"{subject}/{version}", f"/subjects/{subject}/versions/{version}")
+        # La misma respuesta resuelve el ID y la versión concreta sin otra petición
+        self.caches['schemas'].guardar(str(metadatos['id']), {'schema': metadatos['schema']})
+        self.caches['versiones'].guardar(f"{subject}/{metadatos['version']}", metadatos)
+        return metadatos
+
+    def versiones_si_cambian(self, subject, etag=None):
+        # Lista de versiones sin caché, para sondeos periódicos baratos
+        return self._get_condicional(f"/subjects/{subject}/versions", etag)
+
+    def esquema_en_flujo(self, subject, version='latest'):
+        # Esquema en bruto (/schema) parseado a medida que llega, sin pasar por
+        # la caché ni guardar el texto: para esquemas de decenas de MB
+        from parseo_flujo import TAMAÑO_BLOQUE, parsear_flujo
+
+        ruta = f"/subjects/{subject}/versions/{version}/schema"
+        self.peticiones += 1
+        contar('http_peticiones', recurso='subjects')
+        with etapa('http', recurso='subjects'), \
+                self.sesion.get(f"{self.url}{ruta}", timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise ErrorRegistry(f"GET {ruta} devolvió {response.status_code}", response.status_code)
+            return parsear_flujo(response.iter_content(TAMAÑO_BLOQUE))
+
+    def todas_las_versiones(self, subject):
+        # Las versiones se piden en paralelo por el pool de conexiones de la
+        # sesión; las que ya están en caché no generan petición
+        versiones = self.versiones(subject)
+        if len(versiones) <= 1:
+            return {version: self.version(subject, version)['schema'] for version in versiones}
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(HILOS_DESCARGA, len(versiones))) as pool:
+            esquemas = pool.map(lambda version: self.version(subject, version)['schema'], versiones)
+            return dict(zip(versiones, esquemas))
+
+    def compatibilidad(self, subject):
+        nivel = self.caches['compatibilidad'].obtener(subject)
+        contar('cache_registry', cache='compatibilidad', resultado='fallo' if nivel is None else 'acierto')
+        if nivel is not None:
+            return nivel
+        try:
+            nivel = self._get(f"/config/{subject}")['compatibilityLevel']
+        except ErrorRegistry:
+            nivel = self.compatibilidad_global()
+        self.caches['compatibilidad'].guardar(subject, nivel)
+        return nivel
+
+    def compatibilidad_global(self):
+        try:
+            return self._get("/config").get('compatibilityLevel', 'BACKWARD')
+        except ErrorRegistry:
+            return 'BACKWARD'
+
+    def subjects(self):
+        return self._get("/subjects")
+
+    def registrar(self, subject, texto_esquema):
+        self.peticiones += 1
+        contar('http_peticiones', recurso='subjects')
+        with etapa('http', recurso='subjects'):
+            response = self.sesion.post(
+                f"{self.url}/subjects/{subject}/versions",
+                data=json.dumps({'schema': texto_esquema}),
+                headers={'Content-Type': CONTENT_TYPE},
+                timeout=self.timeout,
+            )
+        if response.status_code != 200:
+            raise ErrorRegistry(f"Registro en '{subject}' devolvió {response.status_code}: {response.text}", response.status_code)
+        self.caches['ultimas'].invalidar(subject)
+        self.caches['subjects'].invalidar(subject)
+        return response.json()['id']
+
+    def cerrar(self):
+        if self.ruta_cache:
+            self.guardar_cache()
+        self.sesion.close()
+
+
+_clientes = {}
+_bloqueo_clientes = threading.Lock()
+PREFIJO_REFERENCIA = 'registry:'
+
+
+def obtener_cliente(url=None):
+    # Un cliente por URL y proceso, compartido entre todos los módulos. Con
+    # ESPEJO_REGISTRY se lee del espejo local, sin red. Los pools de hilos lo
+    # llaman a la vez: el bloqueo evita crear dos clientes para la misma clave.
+    espejo = os.environ.get('ESPEJO_REGISTRY')
+    clave = espejo or url or os.environ.get('SCHEMA_REGISTRY_URL', URL_POR_DEFECTO)
+    cliente = _clientes.get(clave)
+    if cliente is not None:
+        return cliente
+    with _bloqueo_clientes:
+        if clave not in _clientes:
+            if espejo:
+                from espejo_registry import EspejoRegistry
+                _clientes[clave] = EspejoRegistry(espejo)
+            else:
+                _clientes[clave] = ClienteRegistry(clave)
+        return _clientes[clave]
+
+
+def es_referencia(archivo):
+    return archivo.startswith(PREFIJO_REFERENCIA)
+
+
+def leer_referencia(referencia):
+    # 'registry:<subject>' o 'registry:<subject>:<versión>' en lugar de un archivo .avsc
+    subject, _, version = referencia[len(PREFIJO_REFERENCIA):].partition(':')
+    return obtener_cliente().version(subject, version or 'latest')['schema']
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != 'descargar':
+        print("Uso: python cliente_registry.py descargar <subject> [archivo_destino.avsc]")
+        sys.exit(1)
+
+    try:
+        esquema = obtener_cliente().version(sys.argv[2])['schema']
+        if len(sys.argv) == 4:
+            with open(sys.argv[3], 'w') as f:
+                f.write(esquema)
+        else:
+            print(esquema)
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Error al descargar el esquema: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+# Codificación y decodificación Avro compiladas, para servicios de Python que
+# producen y consumen 'orders' (u otro topic) sin pasar por DatumWriter/Reader.
+#
+# Cada esquema escritor se compila una vez en una función que escribe un valor
+# en un bytearray, y cada par (escritor, lector) en una función que lee de un
+# buffer con la resolución ya aplicada según la especificación: campos por
+# nombre o alias, defaults del lector, campos del escritor que se saltan,
+# promociones, símbolos de enum y ramas de uniones. Los pares compilados se
+# guardan en una LRU indexada por la huella de ambos esquemas.
+#
+# SerdeConfluent añade el formato de Confluent (byte mágico 0 + ID de esquema
+# de 4 bytes): el esquema escritor se pide al registry (o al espejo) una vez
+# por ID y cada mensaje posterior con ese ID va directo a su par compilado.
+#
+#   serde = SerdeConfluent(lector=open('Order.avsc').read())
+#   mensaje = serde.serializar(pedido, schema_id)
+#   pedido = serde.deserializar(mensaje)
+#
+#   python codec.py Order.avsc [lector.avsc] --registros 100000
+import argparse
+import datetime
+import decimal
+import struct
+import sys
+import threading
+import time
+
+import avro.errors
+from avro.io import BinaryDecoder
+from avro.schema import parse
+
+from cliente_registry import CacheTTL
+from huella import huella_texto
+from resolucion import PROMOCIONES, TIPOS_CON_NOMBRE
+
+MAX_CODECS = 256
+FLOAT = struct.Struct('<f')
+DOUBLE = struct.Struct('<d')
+CABECERA_CONFLUENT = struct.Struct('>bI')
+BYTE_MAGICO = 0
+
+FECHA_EPOCA = datetime.date(1970, 1, 1)
+EPOCA = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class DecodificadorMemoria(BinaryDecoder):
+    # BinaryDecoder de avro sobre un memoryview: lee enteros, números y cadenas
+    # directamente del buffer compartido en lugar de pedir bytes a un archivo.
+    def __init__(self, buffer, inicio=0):
+        self.vista = memoryview(buffer)
+        self.pos = inicio
+        self.fin = len(self.vista)
+
+    @property
+    def reader(self):
+        return None
+
+    def bytes_remaining(self):
+        return self.fin - self.pos
+
+    def _avanzar(self, n):
+        inicio = self.pos
+        if n < 0 or inicio + n > self.fin:
+            raise avro.errors.InvalidAvroBinaryEncoding(f"Lectura de {n} bytes fuera del buffer en la posición {inicio}")
+        self.pos = inicio + n
+        return inicio
+
+    def read(self, n):
+        inicio = self._avanzar(n)
+        return self.vista[inicio:self.pos].tobytes()
+
+    def read_boolean(self):
+        return self.vista[self._avanzar(1)] == 1
+
+    def read_long(self):
+        vista, pos = self.vista, self.pos
+        try:
+            b = vista[pos]
+            if b < 0x80:
+                # Un solo byte: enteros pequeños, longitudes, índices de unión y de enum
+                self.pos = pos + 1
+                return (b >> 1) ^ -(b & 1)
+            n = b & 0x7F
+            desplazamiento = 7
+            while b & 0x80:
+                pos += 1
+                b = vista[pos]
+                n |= (b & 0x7F) << desplazamiento
+                desplazamiento += 7
+                if desplazamiento > 70:
+                    raise avro.errors.InvalidAvroBinaryEncoding("Varint demasiado largo")
+        except IndexError:
+            raise avro.errors.InvalidAvroBinaryEncoding(f"Varint truncado en la posición {self.pos}")
+        self.pos = pos + 1
+        return (n >> 1) ^ -(n & 1)
+
+    read_int = read_long
+
+    def read_float(self):
+        return FLOAT.unpack_from(self.vista, self._avanzar(4))[0]
+
+    def read_double(self):
+        return DOUBLE.unpack_from(self.vista, self._avanzar(8))[0]
+
+    def read_bytes(self):
+        n = self.read_long()
+        inicio = self._avanzar(n)
+        return self.vista[inicio:self.pos].tobytes()
+
+    def read_utf8(self):
+        n = self.read_long()
+        inicio = self.pos
+        fin = inicio + n
+        if n < 0 or fin > self.fin:
+            raise avro.errors.InvalidAvroBinaryEncoding(f"Lectura de {n} bytes fuera del buffer en la posición {inicio}")
+        self.pos = fin
+        return str(self.vista[inicio:fin], 'utf-8')
+
+    def skip_long(self):
+        self.read_long()
+
+    def skip(self, n):
+        self._avanzar(n)
+
+
+def _clave(esquema):
+    return esquema.fullname if esquema.type in TIPOS_CON_NOMBRE else id(esquema)
+
+
+def _logico(esquema):
+    return esquema.props.get('logicalType') if esquema.type in ('int', 'long', 'string', 'bytes', 'fixed') else None
+
+
+# --- Codificación ---
+
+def escribir_long(valor, salida):
+    n = (valor << 1) ^ (valor >> 63)
+    while n & ~0x7F:
+        salida.append((n & 0x7F) | 0x80)
+        n >>= 7
+    salida.append(n)
+
+
+def _escribir_int(valor, salida):
+    if not -0x80000000 <= valor <= 0x7FFFFFFF:
+        raise avro.errors.AvroTypeException(f"{valor!r} no cabe en un int de Avro")
+    escribir_long(valor, salida)
+
+
+def _escribir_bytes(valor, salida):
+    escribir_long(len(valor), salida)
+    salida += valor
+
+
+def _escribir_string(valor, salida):
+    datos = valor.encode('utf-8')
+    escribir_long(len(datos), salida)
+    salida += datos
+
+
+def _sin_escala(valor, escala):
+    # Entero sin escala de un Decimal, en complemento a dos big-endian
+    entero = int(valor.scaleb(escala))
+    return entero.to_bytes((entero.bit_length() + 8) // 8, 'big', signed=True)
+
+
+def _micros(valor):
+    return (valor.astimezone(datetime.timezone.utc) - EPOCA) // datetime.timedelta(microseconds=1)
+
+
+def _convertidor_logico(esquema):
+    # Valor de Python → valor del tipo base; los valores ya en el tipo base pasan tal cual
+    logico = _logico(esquema)
+    if logico == 'date':
+        return lambda v: (v - FECHA_EPOCA).days if isinstance(v, datetime.date) else v
+    if logico == 'time-millis':
+        return lambda v: ((v.hour * 60 + v.minute) * 60 + v.second) * 1000 + v.microsecond // 1000 if isinstance(v, datetime.time) else v
+    if logico == 'time-micros':
+        return lambda v: ((v.hour * 60 + v.minute) * 60 + v.second) * 1_000_000 + v.microsecond if isinstance(v, datetime.time) else v
+    if logico == 'timestamp-millis':
+        return lambda v: _micros(v) // 1000 if isinstance(v, datetime.datetime) else v
+    if logico == 'timestamp-micros':
+        return lambda v: _micros(v) if isinstance(v, datetime.datetime) else v
+    if logico == 'decimal':
+        escala = esquema.props.get('scale', 0)
+        if esquema.type == 'fixed':
+            tamaño = esquema.size
+            return lambda v: int(v.scaleb(escala)).to_bytes(tamaño, 'big', signed=True) if isinstance(v, decimal.Decimal) else v
+        return lambda v: _sin_escala(v, escala) if isinstance(v, decimal.Decimal) else v
+    return None
+
+
+ESCRITORES = {
+    'null': lambda valor, salida: None,
+    'boolean': lambda valor, salida: salida.append(1 if valor else 0),
+    'int': _escribir_int,
+    'long': escribir_long,
+    'float': lambda valor, salida: salida.extend(FLOAT.pack(valor)),
+    'double': lambda valor, salida: salida.extend(DOUBLE.pack(valor)),
+    'bytes': _escribir_bytes,
+    'string': _escribir_string,
+}
+
+
+TIPOS_PYTHON_LOGICOS = {
+    'date': datetime.date,
+    'time-millis': datetime.time,
+    'time-micros': datetime.time,
+    'timestamp-millis': datetime.datetime,
+    'timestamp-micros': datetime.datetime,
+    'decimal': decimal.Decimal,
+}
+
+
+def _admite(esquema):
+    # Predicado para elegir la rama de una unión al codificar
+    tipo_python = TIPOS_PYTHON_LOGICOS.get(_logico(esquema))
+    if tipo_python is not None:
+        admite_base = _admite_base(esquema)
+        return lambda v: isinstance(v, tipo_python) or admite_base(v)
+    return _admite_base(esquema)
+
+
+def _admite_base(esquema):
+    tipo = esquema.type
+    if tipo == 'null':
+        return lambda v: v is None
+    if tipo == 'boolean':
+        return lambda v: isinstance(v, bool)
+    if tipo == 'int':
+        return lambda v: isinstance(v, int) and not isinstance(v, bool) and -0x80000000 <= v <= 0x7FFFFFFF
+    if tipo == 'long':
+        return lambda v: isinstance(v, int) and not isinstance(v, bool) and -(1 << 63) <= v < (1 << 63)
+    if tipo in ('float', 'double'):
+        return lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)
+    if tipo == 'string':
+        return lambda v: isinstance(v, str)
+    if tipo == 'bytes':
+        return lambda v: isinstance(v, (bytes, bytearray))
+    if tipo == 'fixed':
+        return lambda v: isinstance(v, (bytes, bytearray)) and len(v) == esquema.size
+    if tipo == 'enum':
+        simbolos = frozenset(esquema.symbols)
+        return lambda v: v in simbolos
+    if tipo in ('record', 'error'):
+        nombres = frozenset(campo.name for campo in esquema.fields)
+        return lambda v: isinstance(v, dict) and v.keys() <= nombres
+    if tipo == 'array':
+        return lambda v: isinstance(v, (list, tuple))
+    if tipo == 'map':
+        return lambda v: isinstance(v, dict)
+    return lambda v: False
+
+
+SIN_DEFAULT = object()
+
+
+def _default_escritor(campo):
+    # Valor de Python del default de un campo, o SIN_DEFAULT si no tiene uno utilizable
+    if not campo.has_default:
+        return SIN_DEFAULT
+    try:
+        return valor_default(campo.type, campo.default)
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return SIN_DEFAULT
+
+
+def compilar_escritor(esquema, memo=None):
+    # Función (valor, salida: bytearray) que añade la codificación de `valor`
+    if memo is None:
+        memo = {}
+    clave = _clave(esquema)
+    if clave in memo:
+        return memo[clave]
+
+    tipo = esquema.type
+    if tipo in TIPOS_CON_NOMBRE:
+        # Referencia provisional para los tipos recursivos
+        celda = []
+        memo[clave] = lambda valor, salida: celda[0](valor, salida)
+
+    convertir = _convertidor_logico(esquema)
+    if tipo in ESCRITORES:
+        escribir = ESCRITORES[tipo]
+    elif tipo == 'fixed':
+        tamaño = esquema.size
+
+        def escribir(valor, salida):
+            if len(valor) != tamaño:
+                raise avro.errors.AvroTypeException(f"Fixed '{esquema.fullname}' espera {tamaño} bytes y recibe {len(valor)}")
+            salida += valor
+    elif tipo == 'enum':
+        indices = {simbolo: i for i, simbolo in enumerate(esquema.symbols)}
+
+        def escribir(valor, salida):
+            try:
+                escribir_long(indices[valor], salida)
+            except KeyError:
+                raise avro.errors.AvroTypeException(f"'{valor}' no es un símbolo de '{esquema.fullname}'")
+    elif tipo == 'array':
+        items = compilar_escritor(esquema.items, memo)
+
+        def escribir(valor, salida):
+            if valor:
+                escribir_long(len(valor), salida)
+                for item in valor:
+                    items(item, salida)
+            salida.append(0)
+    elif tipo == 'map':
+        valores = compilar_escritor(esquema.values, memo)
+
+        def escribir(valor, salida):
+            if valor:
+                escribir_long(len(valor), salida)
+                for k, v in valor.items():
+                    _escribir_string(k, salida)
+                    valores(v, salida)
+            salida.append(0)
+    elif tipo == 'union':
+        ramas = [(i, _admite(rama), compilar_escritor(rama, memo)) for i, rama in enumerate(esquema.schemas)]
+
+        def escribir(valor, salida):
+            for i, admite, escribir_rama in ramas:
+                if admite(valor):
+                    escribir_long(i, salida)
+                    escribir_rama(valor, salida)
+                    return
+            raise avro.errors.AvroTypeException(f"{valor!r} no encaja en ninguna rama de la unión")
+    elif tipo in ('record', 'error'):
+        campos = [(campo.name, compilar_escritor(campo.type, memo), _default_escritor(campo))
+                  for campo in esquema.fields]
+
+        def escribir(valor, salida):
+            for nombre, escribir_campo, default in campos:
+                try:
+                    escribir_campo(valor[nombre], salida)
+                except KeyError:
+                    if nombre in valor:
+                        raise
+                    # Un campo ausente solo se escribe si tiene default; sin él, ni siquiera como null
+                    if default is SIN_DEFAULT:
+                        raise avro.errors.AvroTypeException(
+                            f"Falta el campo '{nombre}' de '{esquema.fullname}', que no tiene default")
+                    escribir_campo(default, salida)
+    else:
+        raise ValueError(f"Tipo no soportado para codificar: {tipo}")
+
+    if convertir is not None:
+        base = escribir
+        escribir = lambda valor, salida: base(convertir(valor), salida)
+
+    memo[clave] = escribir
+    if tipo in TIPOS_CON_NOMBRE:
+        celda.append(escribir)
+    return escribir
+
+
+# --- Decodificación con resolución ---
+
+def _nombres_coinciden(escritor, lector):
+    aliases = lector.props.get('aliases') or ()
+    return escritor.name == lector.name or escritor.fullname in aliases or escritor.name in aliases
+
+
+def _rama_lector(escritor, ramas):
+    # Primera rama del lector del mismo tipo; si no hay, la primera a la que se promociona
+    for rama in ramas:
+        if rama.type == escritor.type and (rama.type not in TIPOS_CON_NOMBRE or _nombres_coinciden(escritor, rama)):
+            return rama
+    for rama in ramas:
+        if (escritor.type, rama.type) in PROMOCIONES:
+            return rama
+    return None
+
+
+def _fallo(mensaje):
+    def leer(decodificador):
+        raise avro.errors.SchemaResolutionException(mensaje)
+    return leer
+
+
+def valor_default(esquema, valor):
+    # Default JSON del lector → valor de Python (igual que DatumReader, pero
+    # admitiendo enteros como default de float/double)
+    tipo = esquema.type
+    if tipo == 'union':
+        return valor_default(esquema.schemas[0], valor)
+    if tipo in ('float', 'double'):
+        return float(valor)
+    if tipo in ('bytes', 'fixed') and isinstance(valor, str):
+        return valor.encode('latin-1')
+    if tipo == 'array':
+        return [valor_default(esquema.items, v) for v in valor]
+    if tipo == 'map':
+        return {k: valor_default(esquema.values, v) for k, v in valor.items()}
+    if tipo in ('record', 'error'):
+        return {
+            campo.name: valor_default(campo.type, valor[campo.name] if campo.name in valor else campo.default)
+            for campo in esquema.fields
+        }
+    return valor
+
+
+# Métodos sin enlazar: el decodificador es siempre un DecodificadorMemoria y
+# así cada valor cuesta una llamada menos
+LECTORES = {
+    'null': lambda d: None,
+    'boolean': DecodificadorMemoria.read_boolean,
+    'int': DecodificadorMemoria.read_long,
+    'long': DecodificadorMemoria.read_long,
+    'float': DecodificadorMemoria.read_float,
+    'double': DecodificadorMemoria.read_double,
+    'bytes': DecodificadorMemoria.read_bytes,
+    'string': DecodificadorMemoria.read_utf8,
+}
+
+PROMOTORES = {
+    ('int', 'long'): DecodificadorMemoria.read_long,
+    ('int', 'float'): lambda d: float(d.read_long()),
+    ('int', 'double'): lambda d: float(d.read_long()),
+    ('long', 'float'): lambda d: float(d.read_long()),
+    ('long', 'double'): lambda d: float(d.read_long()),
+    ('float', 'double'): DecodificadorMemoria.read_float,
+    ('string', 'bytes'): DecodificadorMemoria.read_bytes,
+    ('bytes', 'string'): DecodificadorMemoria.read_utf8,
+}
+
+
+def _lector_logico(esquema, leer):
+    # Conversión del tipo lógico del lector, con las mismas lecturas que avro
+    logico = _logico(esquema)
+    if logico == 'date':
+        return lambda d: d.read_date_from_int()
+    if logico == 'time-millis':
+        return lambda d: d.read_time_millis_from_int()
+    if logico == 'time-micros':
+        return lambda d: d.read_time_micros_from_long()
+    if logico == 'timestamp-millis':
+        return lambda d: d.read_timestamp_millis_from_long()
+    if logico == 'timestamp-micros':
+        return lambda d: d.read_timestamp_micros_from_long()
+    if logico == 'decimal':
+        escala = esquema.props.get('scale', 0)
+        if esquema.type == 'fixed':
+            tamaño = esquema.size
+            return lambda d: decimal.Decimal(int.from_bytes(d.read(tamaño), 'big', signed=True)).scaleb(-escala)
+        return lambda d: decimal.Decimal(int.from_bytes(d.read(d.read_long()), 'big', signed=True)).scaleb(-escala)
+    return leer
+
+
+def compilar_lector(escritor, lector, memo=None):
+    # Función (decodificador) que lee un valor escrito con `escritor` tal como
+    # lo vería `lector`. Lo que no se puede resolver falla al leerlo, no antes,
+    # igual que en avro: una rama de unión imposible no impide leer las demás.
+    if memo is None:
+        memo = {}
+    clave = (_clave(escritor), _clave(lector))
+    if clave in memo:
+        return memo[clave]
+
+    if escritor.type == 'union':
+        ramas = [compilar_lector(rama, lector, memo) for rama in escritor.schemas]
+        total = len(ramas)
+
+        def leer(decodificador):
+            indice = decodificador.read_long()
+            if not 0 <= indice < total:
+                raise avro.errors.SchemaResolutionException(
+                    f"Índice de rama {indice} fuera de la unión de {total} ramas")
+            return ramas[indice](decodificador)
+        memo[clave] = leer
+        return leer
+    if lector.type == 'union':
+        rama = _rama_lector(escritor, lector.schemas)
+        leer = (compilar_lector(escritor, rama, memo) if rama is not None
+                else _fallo(f"'{escritor.type}' no encaja en ninguna rama de la unión del lector"))
+        memo[clave] = leer
+        return leer
+
+    tipo, tipo_lector = escritor.type, lector.type
+    if tipo in TIPOS_CON_NOMBRE:
+        celda = []
+        memo[clave] = lambda decodificador: celda[0](decodificador)
+
+    if tipo != tipo_lector:
+        leer = PROMOTORES.get((tipo, tipo_lector)) or _fallo(f"No se puede leer '{tipo}' como '{tipo_lector}'")
+    elif tipo in TIPOS_CON_NOMBRE and not _nombres_coinciden(escritor, lector):
+        leer = _fallo(f"El nombre '{escritor.fullname}' no coincide con '{lector.fullname}' ni con sus aliases")
+    elif tipo in LECTORES:
+        leer = _lector_logico(lector, LECTORES[tipo])
+    elif tipo == 'fixed':
+        tamaño = escritor.size
+        leer = (_lector_logico(lector, lambda d: d.read(tamaño)) if lector.size == tamaño
+                else _fallo(f"Fixed '{escritor.fullname}' cambia de tamaño: {tamaño} → {lector.size}"))
+    elif tipo == 'enum':
+        leer = _lector_enum(escritor, lector)
+    elif tipo == 'array':
+        items = compilar_lector(escritor.items, lector.items, memo)
+
+        def leer(decodificador):
+            valores = []
+            n = decodificador.read_long()
+            while n:
+                if n < 0:
+                    n = -n
+                    decodificador.read_long()
+                for _ in range(n):
+                    valores.append(items(decodificador))
+                n = decodificador.read_long()
+            return valores
+    elif tipo == 'map':
+        valores = compilar_lector(escritor.values, lector.values, memo)
+
+        def leer(decodificador):
+            resultado = {}
+            n = decodificador.read_long()
+            while n:
+                if n < 0:
+                    n = -n
+                    decodificador.read_long()
+                for _ in range(n):
+                    k = decodificador.read_utf8()
+                    resultado[k] = valores(decodificador)
+                n = decodificador.read_long()
+            return resultado
+    else:
+        leer = _lector_record(escritor, lector, memo)
+
+    memo[clave] = leer
+    if tipo in TIPOS_CON_NOMBRE:
+        celda.append(leer)
+    return leer
+
+
+def _lector_enum(escritor, lector):
+    # Índice del escritor → símbolo del lector (o su default), resuelto de antemano
+    default = lector.props.get('default')
+    simbolos_lector = set(lector.symbols)
+    simbolos = [s if s in simbolos_lector else default for s in escritor.symbols]
+    total = len(simbolos)
+
+    def leer(decodificador):
+        indice = decodificador.read_long()
+        if not 0 <= indice < total:
+            raise avro.errors.SchemaResolutionException(
+                f"Índice {indice} fuera del enum '{escritor.fullname}' de {total} símbolos")
+        if simbolos[indice] is None:
+            raise avro.errors.SchemaResolutionException(
+                f"El símbolo '{escritor.symbols[indice]}' no existe en '{lector.fullname}' y no hay default")
+        return simbolos[indice]
+    return leer
+
+
+def _lector_record(escritor, lector, memo):
+    campos_lector = {}
+    for campo in lector.fields:
+        campos_lector[campo.name] = campo
+        for alias in campo.props.get('aliases') or ():
+            campos_lector.setdefault(alias, campo)
+
+    pasos, leidos = [], set()
+    for campo in escritor.fields:
+        destino = campos_lector.get(campo.name)
+        if destino is None:
+            # Campo que el lector no conoce: se lee y se descarta
+            pasos.append((None, compilar_lector(campo.type, campo.type, memo)))
+        else:
+            pasos.append((destino.name, compilar_lector(campo.type, destino.type, memo)))
+            leidos.add(destino.name)
+
+    # Los defaults inmutables se comparten; los mutables (array, map, record) se
+    # decodifican por registro desde su codificación binaria, calculada una vez
+    defaults, copias = {}, []
+    for campo in lector.fields:
+        if campo.name in leidos:
+            continue
+        if not campo.has_default:
+            return _fallo(f"El campo '{campo.name}' de '{lector.fullname}' no tiene default y no lo escribe '{escritor.fullname}'")
+        valor = valor_default(campo.type, campo.default)
+        if isinstance(valor, (list, dict)):
+            from valores_default import lector_default
+            # Memo de firma_tipo compartido por todos los defaults de la compilación
+            firmas = memo.setdefault('firmas', {})
+            try:
+                copias.append((campo.name, lector_default(campo.type, campo.default, firmas)))
+            except ValueError as e:
+                return _fallo(f"El default del campo '{campo.name}' de '{lector.fullname}' no es válido: {e}")
+        else:
+            defaults[campo.name] = valor
+
+    if not defaults and not copias and all(nombre is not None for nombre, _ in pasos):
+        def leer(decodificador):
+            return {nombre: leer_campo(decodificador) for nombre, leer_campo in pasos}
+        return leer
+
+    def leer(decodificador):
+        registro = {}
+        for nombre, leer_campo in pasos:
+            valor = leer_campo(decodificador)
+            if nombre is not None:
+                registro[nombre] = valor
+        registro.update(defaults)
+        for nombre, copia in copias:
+            registro[nombre] = copia()
+        return registro
+    return leer
+
+
+# --- Caché de pares compilados ---
+
+class Codec:
+    __slots__ = ('escritor', 'lector', '_escribir', '_leer')
+
+    def __init__(self, escritor, lector):
+        self.escritor = escritor
+        self.lector = lector
+        self._escribir = compilar_escritor(escritor)
+        self._leer = compilar_lector(escritor, lector)
+
+    def codificar(self, valor, salida=None):
+        # Con `salida` (bytearray) se añade al final y se devuelve la misma
+        if salida is None:
+            salida = bytearray()
+            self._escribir(valor, salida)
+            return bytes(salida)
+        self._escribir(valor, salida)
+        return salida
+
+    def decodificar(self, datos, inicio=0):
+        return self._leer(DecodificadorMemoria(datos, inicio))
+
+    def decodificar_todos(self, datos):
+        # Valores concatenados en un mismo buffer, hasta agotarlo
+        decodificador = DecodificadorMemoria(datos)
+        leer = self._leer
+        valores = []
+        while decodificador.pos < decodificador.fin:
+            valores.append(leer(decodificador))
+        return valores
+
+
+_codecs = CacheTTL(MAX_CODECS)
+_esquemas = CacheTTL(MAX_CODECS)
+_bloqueo = threading.Lock()
+
+
+def _esquema(texto):
+    clave = huella_texto(texto)
+    esquema = _esquemas.obtener(clave)
+    if esquema is None:
+        esquema = parse(texto)
+        _esquemas.guardar(clave, esquema)
+    return clave, esquema
+
+
+def obtener_codec(texto_escritor, texto_lector=None):
+    # Par compilado para los textos de ambos esquemas; sin lector se lee con el escritor.
+    # La huella es la del texto exacto: la forma canónica descarta los defaults
+    # y los tipos lógicos, que cambian la decodificación.
+    clave_escritor, escritor = _esquema(texto_escritor)
+    clave_lector, lector = _esquema(texto_lector) if texto_lector is not None else (clave_escritor, escritor)
+    clave = f"{clave_escritor}:{clave_lector}"
+    codec = _codecs.obtener(clave)
+    if codec is None:
+        with _bloqueo:
+            codec = _codecs.obtener(clave)
+            if codec is None:
+                codec = Codec(escritor, lector)
+                _codecs.guardar(clave, codec)
+    return codec
+
+
+class SerdeConfluent:
+    def __init__(self, lector=None, cliente=None):
+        # `lector`: texto del esquema con el que se leen los mensajes (por
+        # defecto, el escritor de cada mensaje). `cliente`: ClienteRegistry o
+        # EspejoRegistry; por defecto el compartido del proceso.
+        self.lector = lector
+        self.cliente = cliente
+        self.por_id = {}
+
+    def _codec(self, schema_id):
+        codec = self.por_id.get(schema_id)
+        if codec is None:
+            if self.cliente is None:
+                from cliente_registry import obtener_cliente
+                self.cliente = obtener_cliente()
+            codec = obtener_codec(self.cliente.esquema_por_id(schema_id), self.lector)
+            self.por_id[schema_id] = codec
+        return codec
+
+    def serializar(self, valor, schema_id):
+        salida = bytearray(CABECERA_CONFLUENT.pack(BYTE_MAGICO, schema_id))
+        self._codec(schema_id)._escribir(valor, salida)
+        return bytes(salida)
+
+    def deserializar(self, mensaje):
+        if len(mensaje) < CABECERA_CONFLUENT.size:
+            raise ValueError(f"Mensaje de {len(mensaje)} bytes: falta la cabecera de Confluent")
+        magico, schema_id = CABECERA_CONFLUENT.unpack_from(mensaje)
+        if magico != BYTE_MAGICO:
+            raise ValueError(f"Byte mágico {magico}: el mensaje no está en formato de Confluent")
+        return self._codec(schema_id).decodificar(mensaje, CABECERA_CONFLUENT.size)
+
+
+if __name__ == "__main__":
+    from prueba_datos import generar_registros
+
+    parser = argparse.ArgumentParser(description="Rendimiento del codec compilado frente a avro")
+    parser.add_argument('escritor', help="Esquema .avsc con el que se codifican los registros")
+    parser.add_argument('lector', nargs='?', help="Esquema .avsc con el que se leen (por defecto, el escritor)")
+    parser.add_argument('--registros', type=int, default=100_000)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        with open(args.escritor, 'r') as f:
+            texto_escritor = f.read()
+        texto_lector = None
+        if args.lector:
+            with open(args.lector, 'r') as f:
+                texto_lector = f.read()
+
+        inicio = time.perf_counter()
+        codec = obtener_codec(texto_escritor, texto_lector)
+        compilacion = time.perf_counter() - inicio
+        registros = generar_registros(codec.escritor, args.registros, args.semilla)
+
+        inicio = time.perf_counter()
+        salida = bytearray()
+        for registro in registros:
+            codec.codificar(registro, salida)
+        codificacion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        leidos = codec.decodificar_todos(salida)
+        decodificacion = time.perf_counter() - inicio
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    print(f"📊 {len(leidos)} registros, {len(salida)} bytes, compilación {compilacion * 1000:.1f} ms")
+    print(f" - Codificación:   {len(registros) / codificacion:,.0f} registros/s")
+    print(f" - Decodificación: {len(leidos) / decodificacion:,.0f} registros/s")
+    sys.exit(0)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Representación columnar de los campos de un record, para esquemas muy anchos.
+#
+# Cada record se reduce a columnas paralelas ordenadas por nombre de campo:
+# nombre, posición original, firma del tipo y firma del campo completo (tipo,
+# default, orden, doc y aliases). Una única fusión de las dos listas ordenadas
+# clasifica todos los campos en añadidos, eliminados y comunes con cambios; los
+# comunes idénticos, que en un record ancho son casi todos, no se vuelven a
+# visitar ni se resuelven.
+from array import array
+
+from diferencias import default_campo, firma_tipo
+
+
+class Columnas:
+    __slots__ = ('campos', 'nombres', 'posiciones', 'tipos', 'firmas')
+
+    def __init__(self, esquema, memo, atributos=True):
+        # `memo` es el de firma_tipo: compartirlo entre ambos esquemas evita
+        # volver a firmar los tipos con nombre comunes. Sin `atributos` la
+        # firma del campo es la de su tipo (basta para las reglas de resolución).
+        campos = esquema.fields
+        orden = sorted(range(len(campos)), key=lambda i: campos[i].name)
+        self.campos = campos
+        self.nombres = [campos[i].name for i in orden]
+        self.posiciones = array('I', orden)
+        self.tipos = array('q', [firma_tipo(campos[i].type, memo) for i in orden])
+        if not atributos:
+            self.firmas = self.tipos
+            return
+        self.firmas = array('q', [hash((
+            tipo, repr(default_campo(campos[i])), campos[i].order, campos[i].doc,
+            tuple(campos[i].props.get('aliases') or ()),
+        )) for i, tipo in zip(orden, self.tipos)])
+
+
+class Fusion:
+    __slots__ = ('añadidos', 'eliminados', 'tipo_distinto', 'campo_distinto')
+
+    def __init__(self, añadidos, eliminados, tipo_distinto, campo_distinto):
+        # Posiciones en el esquema correspondiente, en el orden de declaración;
+        # los comunes como pares (posición anterior, posición nueva)
+        self.añadidos = añadidos
+        self.eliminados = eliminados
+        self.tipo_distinto = tipo_distinto
+        self.campo_distinto = campo_distinto
+
+
+def fusionar(ant, nue):
+    añadidos, eliminados = array('I'), array('I')
+    tipo_distinto, campo_distinto = [], []
+    nombres_ant, nombres_nue = ant.nombres, nue.nombres
+    i = j = 0
+    while i < len(nombres_ant) and j < len(nombres_nue):
+        a, n = nombres_ant[i], nombres_nue[j]
+        if a == n:
+            if ant.firmas[i] != nue.firmas[j]:
+                pareja = (ant.posiciones[i], nue.posiciones[j])
+                campo_distinto.append(pareja)
+                if ant.tipos[i] != nue.tipos[j]:
+                    tipo_distinto.append(pareja)
+            i += 1
+            j += 1
+        elif a < n:
+            eliminados.append(ant.posiciones[i])
+            i += 1
+        else:
+            añadidos.append(nue.posiciones[j])
+            j += 1
+    eliminados.extend(ant.posiciones[i:])
+    añadidos.extend(nue.posiciones[j:])
+    return Fusion(sorted(añadidos), sorted(eliminados), sorted(tipo_distinto), sorted(campo_distinto))
+
+
+def fusionar_esquemas(esquema_ant, esquema_nuevo, memo=None, atributos=True):
+    memo = {} if memo is None else memo
+    return fusionar(Columnas(esquema_ant, memo, atributos), Columnas(esquema_nuevo, memo, atributos))
+
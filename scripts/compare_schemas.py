@@ -1,10 +1,28 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+import io
 import json
 import sys
 import os
-from avro.schema import parse, Schema
+from typing import TYPE_CHECKING
+from cache_esquemas import esquema_parseado
+from cliente_registry import es_referencia, leer_referencia
+from diferencias import diferencias_campo, emparejar_renombrados
+from indice_tipos import texto_autocontenido
+from instrumentacion import etapa
+from parseo_flujo import cargar_si_grande, es_grande
+# formatear_campo se reexporta: era parte de la interfaz de este módulo
+from reporte import (CambioCampo, CambioMetadato, DetalleCampo, SERIALIZADORES,
+                     SerializadorSARIF, SerializadorTexto, escribir_reporte, formatear_campo)
+from resolucion import describir
+
+if TYPE_CHECKING:
+    from avro.schema import Schema
+
+def leer_contenido(archivo):
+    if es_referencia(archivo):
+        return leer_referencia(archivo).strip()
 
-def cargar_esquema(archivo):
     if not os.path.exists(archivo):
         raise FileNotFoundError(f"El archivo '{archivo}' no existe.")
 
@@ -14,11 +32,29 @@ def cargar_esquema(archivo):
     if not contenido:
         raise ValueError(f"El archivo '{archivo}' está vacío.")
 
+    # Los tipos definidos en otros .avsc del mismo directorio se resuelven con el índice
     try:
-        return parse(contenido)
+        return texto_autocontenido(archivo, contenido)
+    except ValueError as e:
+        raise ValueError(f"Error al parsear '{archivo}': {e}")
+
+def json_contenido(contenido, archivo):
+    try:
+        return json.loads(contenido)
+    except ValueError as e:
+        raise ValueError(f"Error al parsear '{archivo}': {e}")
+
+def parsear_contenido(contenido, archivo):
+    try:
+        return esquema_parseado(contenido)
     except Exception as e:
         raise ValueError(f"Error al parsear '{archivo}': {e}")
 
+def cargar_esquema(archivo):
+    # Los .avsc muy grandes se cargan en flujo, sin tener el texto completo en memoria
+    esquema = None if es_referencia(archivo) else cargar_si_grande(archivo)
+    return esquema if esquema is not None else parsear_contenido(leer_contenido(archivo), archivo)
+
 def comparar_metadatos(esquema1: Schema, esquema2: Schema):
     metadatos = ['type', 'name', 'namespace', 'doc']
     diferencias = {}
@@ -32,128 +68,155 @@ def comparar_metadatos(esquema1: Schema, esquema2: Schema):
 
     return diferencias
 
-def comparar_campos(esquema_ant: Schema, esquema_nuevo: Schema):
-    campos_ant = {c.name: c for c in esquema_ant.fields}
-    campos_nue = {c.name: c for c in esquema_nuevo.fields}
+def iterar_cambios_campos(esquema_ant: Schema, esquema_nuevo: Schema):
+    # Produce (categoría, campo_anterior, campo_nuevo, cambios) agrupados por
+    # categoría. Los tipos se comparan por firma estructural memorizada y una
+    # sola fusión de las columnas ordenadas por nombre descarta los campos
+    # comunes idénticos.
+    from columnar import fusionar_esquemas
+    memo = {}
+    fusion = fusionar_esquemas(esquema_ant, esquema_nuevo, memo)
+    campos_ant = esquema_ant.fields
+    campos_nue = esquema_nuevo.fields
+    añadidos = [campos_nue[posicion] for posicion in fusion.añadidos]
+    eliminados = [campos_ant[posicion] for posicion in fusion.eliminados]
+
+    renombrados = emparejar_renombrados(añadidos, eliminados)
+    emparejados = {id(campo) for pareja in renombrados for campo in pareja}
+
+    # Campos añadidos
+    for campo in añadidos:
+        if id(campo) not in emparejados:
+            yield 'añadido', None, campo, []
+
+    # Campos eliminados
+    for campo in eliminados:
+        if id(campo) not in emparejados:
+            yield 'eliminado', campo, None, []
 
+    # Campos renombrados (el nuevo nombre declara el anterior como alias)
+    for ant, nue in renombrados:
+        yield 'renombrado', ant, nue, diferencias_campo(ant, nue, memo)
+
+    # Campos modificados
+    for posicion_ant, posicion_nue in fusion.campo_distinto:
+        ant, nue = campos_ant[posicion_ant], campos_nue[posicion_nue]
+        cambios = diferencias_campo(ant, nue, memo)
+        if cambios:
+            yield 'modificado', ant, nue, cambios
+
+def comparar_campos(esquema_ant: Schema, esquema_nuevo: Schema):
+    # Interfaz anterior en diccionarios, construida sobre iterar_cambios_campos
     cambios = {
         'añadidos': [],
         'eliminados': [],
+        'renombrados': [],
         'modificados': []
     }
 
-    # Campos añadidos
-    for nombre in campos_nue:
-        if nombre not in campos_ant:
-            cambios['añadidos'].append(analizar_campo(campos_nue[nombre]))
-
-    # Campos eliminados
-    for nombre in campos_ant:
-        if nombre not in campos_nue:
-            cambios['eliminados'].append(analizar_campo(campos_ant[nombre]))
-
-    # Campos modificados
-    for nombre in campos_ant:
-        if nombre in campos_nue:
-            ant = campos_ant[nombre]
-            nue = campos_nue[nombre]
-            if ant != nue:
-                cambios['modificados'].append({
-                    'nombre': nombre,
-                    'anterior': analizar_campo(ant),
-                    'nuevo': analizar_campo(nue)
-                })
+    for categoria, ant, nue, detalle in iterar_cambios_campos(esquema_ant, esquema_nuevo):
+        if categoria == 'añadido':
+            cambios['añadidos'].append(analizar_campo(nue))
+        elif categoria == 'eliminado':
+            cambios['eliminados'].append(analizar_campo(ant))
+        else:
+            cambios[f"{categoria}s"].append({
+                'nombre': nue.name,
+                'nombre_anterior': ant.name,
+                'anterior': analizar_campo(ant),
+                'nuevo': analizar_campo(nue),
+                'cambios': detalle
+            })
 
     return cambios
 
 def analizar_campo(campo):
     return {
         'nombre': campo.name,
-        'tipo': str(campo.type),
+        'tipo': describir(campo.type),
         'doc': getattr(campo, 'doc', None),
-        'default': campo.default if hasattr(campo, 'default') else None,
+        'default': campo.default if campo.has_default else None,
         'orden': getattr(campo, 'order', None)
     }
 
-def generar_reporte(cambios):
-    reporte = []
-
-    # Metadatos
-    if cambios['metadatos']:
-        reporte.append("=== CAMBIOS EN METADATOS ===")
-        for attr, vals in cambios['metadatos'].items():
-            reporte.append(f"🔵 {attr.upper()}:")
-            reporte.append(f"  Anterior: {vals['anterior']}")
-            reporte.append(f"  Nuevo:    {vals['nuevo']}")
-
-    # Campos
-    if cambios['campos']['añadidos']:
-        reporte.append("\n🟢 CAMPOS AÑADIDOS:")
-        for campo in cambios['campos']['añadidos']:
-            reporte.append(formatear_campo(campo))
-
-    if cambios['campos']['eliminados']:
-        reporte.append("\n🔴 CAMPOS ELIMINADOS:")
-        for campo in cambios['campos']['eliminados']:
-            reporte.append(formatear_campo(campo))
+def detalle_campo(campo):
+    return DetalleCampo(**analizar_campo(campo))
+
+def iterar_cambios(esquema_ant: Schema, esquema_nuevo: Schema):
+    # Metadatos y campos en streaming: produce las entradas tipadas de una en
+    # una, agrupadas por categoría.
+    for attr, vals in comparar_metadatos(esquema_ant, esquema_nuevo).items():
+        yield CambioMetadato(attr, vals['anterior'], vals['nuevo'])
+
+    for categoria, ant, nue, detalle in iterar_cambios_campos(esquema_ant, esquema_nuevo):
+        yield CambioCampo(
+            categoria,
+            (nue or ant).name,
+            detalle_campo(ant) if ant is not None else None,
+            detalle_campo(nue) if nue is not None else None,
+            ant.name if categoria == 'renombrado' else None,
+            detalle
+        )
+
+def _entradas_desde_cambios(cambios):
+    for attr, vals in cambios['metadatos'].items():
+        yield CambioMetadato(attr, vals['anterior'], vals['nuevo'])
+    for campo in cambios['campos']['añadidos']:
+        yield CambioCampo('añadido', campo['nombre'], nuevo=DetalleCampo(**campo))
+    for campo in cambios['campos']['eliminados']:
+        yield CambioCampo('eliminado', campo['nombre'], anterior=DetalleCampo(**campo))
+    for categoria in ('renombrado', 'modificado'):
+        for cambio in cambios['campos'].get(f"{categoria}s", []):
+            yield CambioCampo(categoria, cambio['nombre'],
+                              DetalleCampo(**cambio['anterior']), DetalleCampo(**cambio['nuevo']),
+                              cambio['nombre_anterior'] if categoria == 'renombrado' else None,
+                              cambio.get('cambios', []))
 
-    if cambios['campos']['modificados']:
-        reporte.append("\n🟠 CAMPOS MODIFICADOS:")
-        for cambio in cambios['campos']['modificados']:
-            reporte.append(f"  ~ {cambio['nombre']}:")
-            reporte.append("    Anterior: " + formatear_campo(cambio['anterior']))
-            reporte.append("    Nuevo:    " + formatear_campo(cambio['nuevo']))
-
-    # Resumen
-    # total = sum(len(v) for v in cambios['metadatos'].values()) + \
-            #  sum(len(v) for v in cambios['campos'].values())
-
-    # Resumen final
-    total_metadatos = len(cambios['metadatos'])
-    total_campos = (
-        len(cambios['campos']['añadidos']) +
-        len(cambios['campos']['eliminados']) +
-        len(cambios['campos']['modificados'])
-    )
-
-    reporte.append("\n=== RESUMEN ===")
-    reporte.append(f"Metadatos modificados: {total_metadatos}")
-    reporte.append(f"Campos añadidos: {len(cambios['campos']['añadidos'])}")
-    reporte.append(f"Campos eliminados: {len(cambios['campos']['eliminados'])}")
-    reporte.append(f"Campos modificados: {len(cambios['campos']['modificados'])}")
-    reporte.append(f"Total de cambios: {total_metadatos + total_campos}")
-
-    # reporte.append("\n=== RESUMEN ===")
-    # reporte.append(f"Metadatos modificados: {len(cambios['metadatos'])}")
-    # reporte.append(f"Campos añadidos: {len(cambios['campos']['añadidos'])}")
-    # reporte.append(f"Campos eliminados: {len(cambios['campos']['eliminados'])}")
-    # reporte.append(f"Campos modificados: {len(cambios['campos']['modificados'])}")
-    # reporte.append(f"Total de cambios: {total}")
-
-    return '\n'.join(reporte)
-
-def formatear_campo(campo):
-    detalles = []
-    if campo['doc']: detalles.append(f"Doc: {campo['doc']}")
-    if campo['default'] is not None: detalles.append(f"Default: {campo['default']}")
-    if campo['orden']: detalles.append(f"Orden: {campo['orden']}")
-    return f"{campo['nombre']} ({campo['tipo']})" + (f" [{', '.join(detalles)}]" if detalles else "")
+def generar_reporte(cambios):
+    # Reporte de texto a partir de {'metadatos': ..., 'campos': comparar_campos(...)},
+    # con el mismo serializador que la línea de comandos
+    salida = io.StringIO()
+    escribir_reporte(_entradas_desde_cambios(cambios), SerializadorTexto(salida))
+    return salida.getvalue().rstrip('\n')
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Uso: python compare_schemas.py <esquema_anterior> <esquema_nuevo>")
+    formato = 'texto'
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--formato=')]
+    for a in sys.argv[1:]:
+        if a.startswith('--formato='):
+            formato = a.split('=', 1)[1]
+
+    if len(argumentos) != 2 or formato not in SERIALIZADORES:
+        print("Uso: python compare_schemas.py <esquema_anterior> <esquema_nuevo> [--formato=texto|jsonl|sarif]")
         sys.exit(1)
 
     try:
-        esquema_ant = cargar_esquema(sys.argv[1])
-        esquema_nuevo = cargar_esquema(sys.argv[2])
-
-        cambios = {
-            'metadatos': comparar_metadatos(esquema_ant, esquema_nuevo),
-            'campos': comparar_campos(esquema_ant, esquema_nuevo)
-        }
-
-        print(generar_reporte(cambios))
+        if any(es_grande(a) for a in argumentos):
+            # Esquemas muy grandes: en flujo y sin el atajo, que exige ambos textos completos
+            with etapa('carga'):
+                esquema_ant = cargar_esquema(argumentos[0])
+                esquema_nuevo = cargar_esquema(argumentos[1])
+            entradas = iterar_cambios(esquema_ant, esquema_nuevo)
+        else:
+            with etapa('carga'):
+                contenido_ant = leer_contenido(argumentos[0])
+                contenido_nuevo = leer_contenido(argumentos[1])
+
+            # Atajo: mismo JSON en ambos archivos, no hay nada que parsear ni comparar
+            if json_contenido(contenido_ant, argumentos[0]) == json_contenido(contenido_nuevo, argumentos[1]):
+                entradas = iter(())
+            else:
+                esquema_ant = parsear_contenido(contenido_ant, argumentos[0])
+                esquema_nuevo = parsear_contenido(contenido_nuevo, argumentos[1])
+                entradas = iterar_cambios(esquema_ant, esquema_nuevo)
+
+        if formato == 'sarif':
+            serializador = SerializadorSARIF(sys.stdout, argumentos[1])
+        else:
+            serializador = SERIALIZADORES[formato](sys.stdout)
+        # Las entradas se generan a medida que se escriben: la etapa incluye la comparación
+        with etapa('diff'):
+            escribir_reporte(entradas, serializador)
         sys.exit(0)
 
     except Exception as e:
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# Diferencias estructurales entre campos y tipos Avro.
+#
+# Cada nodo de tipo se resume una sola vez en una firma (hash estructural
+# memorizado por identidad del objeto), de modo que comparar dos subárboles
+# iguales cuesta O(1) y solo se desciende por donde las firmas difieren, en
+# lugar de convertir los tipos completos a texto con str().
+from resolucion import TIPOS_CON_NOMBRE, describir
+
+SIN_DEFAULT = object()
+
+
+def _aliases(elemento):
+    return tuple(elemento.props.get('aliases') or ())
+
+
+def default_campo(campo):
+    return campo.default if campo.has_default else SIN_DEFAULT
+
+
+def firma_tipo(esquema, memo):
+    clave = id(esquema)
+    firma = memo.get(clave)
+    if firma is not None:
+        return firma
+
+    tipo = esquema.type
+    if tipo in TIPOS_CON_NOMBRE:
+        # Marcador provisional para cortar la recursión en tipos recursivos
+        memo[clave] = hash(('ref', esquema.fullname))
+
+    if tipo in ('record', 'error'):
+        partes = (tipo, esquema.fullname, _aliases(esquema), tuple(
+            (c.name, firma_tipo(c.type, memo), repr(default_campo(c)), c.order, _aliases(c))
+            for c in esquema.fields
+        ))
+    elif tipo == 'enum':
+        partes = (tipo, esquema.fullname, tuple(esquema.symbols), repr(esquema.props.get('default')))
+    elif tipo == 'fixed':
+        partes = (tipo, esquema.fullname, esquema.size)
+    elif tipo == 'array':
+        partes = (tipo, firma_tipo(esquema.items, memo))
+    elif tipo == 'map':
+        partes = (tipo, firma_tipo(esquema.values, memo))
+    elif tipo == 'union':
+        partes = (tipo, tuple(firma_tipo(rama, memo) for rama in esquema.schemas))
+    else:
+        partes = (tipo, esquema.props.get('logicalType'))
+
+    firma = hash(partes)
+    memo[clave] = firma
+    return firma
+
+
+def _clave_rama(esquema):
+    return (esquema.type, esquema.fullname if esquema.type in TIPOS_CON_NOMBRE else None)
+
+
+def diferencias_tipo(ant, nue, ruta, memo, visitados=None):
+    # Lista de (ruta, anterior, nuevo) con las partes del tipo que cambian
+    if visitados is None:
+        visitados = set()
+    if firma_tipo(ant, memo) == firma_tipo(nue, memo) or (id(ant), id(nue)) in visitados:
+        return []
+    visitados.add((id(ant), id(nue)))
+
+    if ant.type != nue.type:
+        return [(ruta, describir(ant), describir(nue))]
+
+    tipo = ant.type
+    difs = []
+    if tipo in TIPOS_CON_NOMBRE and ant.fullname != nue.fullname:
+        difs.append((f"{ruta}.name", ant.fullname, nue.fullname))
+
+    if tipo in ('record', 'error'):
+        campos_nue = nue.fields_dict
+        for campo in ant.fields:
+            otro = campos_nue.get(campo.name)
+            ruta_campo = f"{ruta}.{campo.name}"
+            if otro is None:
+                difs.append((ruta_campo, describir(campo.type), None))
+                continue
+            difs.extend(diferencias_tipo(campo.type, otro.type, ruta_campo, memo, visitados))
+            if default_campo(campo) != default_campo(otro):
+                difs.append((f"{ruta_campo}.default", _mostrar_default(default_campo(campo)),
+                             _mostrar_default(default_campo(otro))))
+        nombres_ant = ant.fields_dict
+        for campo in nue.fields:
+            if campo.name not in nombres_ant:
+                difs.append((f"{ruta}.{campo.name}", None, describir(campo.type)))
+    elif tipo == 'enum':
+        if ant.symbols != nue.symbols:
+            difs.append((f"{ruta}.symbols", list(ant.symbols), list(nue.symbols)))
+        if ant.props.get('default') != nue.props.get('default'):
+            difs.append((f"{ruta}.default", ant.props.get('default'), nue.props.get('default')))
+    elif tipo == 'fixed':
+        if ant.size != nue.size:
+            difs.append((f"{ruta}.size", ant.size, nue.size))
+    elif tipo == 'array':
+        difs.extend(diferencias_tipo(ant.items, nue.items, f"{ruta}[]", memo, visitados))
+    elif tipo == 'map':
+        difs.extend(diferencias_tipo(ant.values, nue.values, f"{ruta}{{}}", memo, visitados))
+    elif tipo == 'union':
+        ramas_nue = {_clave_rama(r): r for r in nue.schemas}
+        claves_ant = set()
+        for rama in ant.schemas:
+            clave = _clave_rama(rama)
+            claves_ant.add(clave)
+            ruta_rama = f"{ruta}<{describir(rama)}>"
+            if clave not in ramas_nue:
+                difs.append((ruta_rama, describir(rama), None))
+            else:
+                difs.extend(diferencias_tipo(rama, ramas_nue[clave], ruta_rama, memo, visitados))
+        for clave, rama in ramas_nue.items():
+            if clave not in claves_ant:
+                difs.append((f"{ruta}<{describir(rama)}>", None, describir(rama)))
+        if not difs:
+            # Mismas ramas en distinto orden: cambia la rama del default
+            difs.append((ruta, describir(ant), describir(nue)))
+    else:
+        difs.append((ruta, describir(ant), describir(nue)))
+    return difs
+
+
+def _mostrar_default(valor):
+    return None if valor is SIN_DEFAULT else valor
+
+
+def diferencias_campo(ant, nue, memo):
+    # Cambios atributo a atributo entre dos versiones de un mismo campo
+    cambios = []
+    for ruta, anterior, nuevo in diferencias_tipo(ant.type, nue.type, nue.name, memo):
+        cambios.append({'atributo': 'tipo', 'ruta': ruta, 'anterior': anterior, 'nuevo': nuevo})
+    if default_campo(ant) != default_campo(nue):
+        cambios.append({'atributo': 'default', 'ruta': nue.name,
+                        'anterior': _mostrar_default(default_campo(ant)),
+                        'nuevo': _mostrar_default(default_campo(nue))})
+    for atributo, valor_ant, valor_nue in (
+        ('orden', ant.order, nue.order),
+        ('doc', ant.doc, nue.doc),
+        ('aliases', list(_aliases(ant)), list(_aliases(nue))),
+    ):
+        if valor_ant != valor_nue:
+            cambios.append({'atributo': atributo, 'ruta': nue.name, 'anterior': valor_ant, 'nuevo': valor_nue})
+    return cambios
+
+
+def emparejar_renombrados(añadidos, eliminados):
+    # Un campo nuevo cuyo alias es el nombre de uno eliminado (o al revés) es
+    # un renombrado. Devuelve [(campo_anterior, campo_nuevo)].
+    pendientes = {campo.name: campo for campo in eliminados}
+    parejas = []
+    for campo in añadidos:
+        for alias in _aliases(campo):
+            if alias in pendientes:
+                parejas.append((pendientes.pop(alias), campo))
+                break
+    emparejados = {nuevo.name for _, nuevo in parejas}
+    por_alias = {}
+    for campo in pendientes.values():
+        for alias in _aliases(campo):
+            por_alias.setdefault(alias, campo)
+    for campo in añadidos:
+        if campo.name not in emparejados and campo.name in por_alias:
+            anterior = por_alias.pop(campo.name)
+            if anterior.name in pendientes:
+                del pendientes[anterior.name]
+                parejas.append((anterior, campo))
+    return parejas
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Empaqueta los scripts en un único zipapp ejecutable, para distribuirlos como
+# hooks sin copiar el directorio scripts/.
+#
+# Cada módulo se incluye con su bytecode ya compilado (sin comprobación contra
+# el fuente), de modo que el arranque no compila nada. Con --dependencias se
+# incluyen también avro y requests instalados con pip en el propio paquete; sin
+# él se usan los del intérprete que lo ejecuta.
+#
+#   python empaquetar.py --salida dist/kafka-avro.pyz [--dependencias]
+#   python dist/kafka-avro.pyz validate_compatibility old_schema.avsc new_schema.avsc
+import argparse
+import glob
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DEPENDENCIAS = ('avro', 'requests')
+
+PRINCIPAL = '''\
+import runpy
+import sys
+
+if len(sys.argv) < 2:
+    print("Uso: python kafka-avro.pyz <script> [argumentos...]")
+    sys.exit(1)
+script = sys.argv[1].removesuffix('.py')
+sys.argv = [script + '.py'] + sys.argv[2:]
+runpy.run_module(script, run_name='__main__', alter_sys=True)
+'''
+
+
+def copiar_scripts(destino):
+    # Fuente y bytecode en la ubicación que busca zipimport (junto al .py)
+    modulos = []
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO, '*.py'))):
+        nombre = os.path.basename(ruta)
+        if nombre == os.path.basename(__file__):
+            continue
+        shutil.copy2(ruta, os.path.join(destino, nombre))
+        py_compile.compile(ruta, cfile=os.path.join(destino, nombre + 'c'), doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        modulos.append(nombre[:-3])
+    return modulos
+
+
+def empaquetar(salida, dependencias=False):
+    with tempfile.TemporaryDirectory() as temporal:
+        modulos = copiar_scripts(temporal)
+        if dependencias:
+            subprocess.run([sys.executable, '-m', 'pip', 'install', '--quiet', '--target', temporal, *DEPENDENCIAS],
+                           check=True)
+        with open(os.path.join(temporal, '__main__.py'), 'w') as f:
+            f.write(PRINCIPAL)
+        if os.path.dirname(salida):
+            os.makedirs(os.path.dirname(salida), exist_ok=True)
+        zipapp.create_archive(temporal, salida, interpreter='/usr/bin/env python3')
+    return modulos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Empaqueta los scripts en un zipapp ejecutable")
+    parser.add_argument('--salida', default='dist/kafka-avro.pyz')
+    parser.add_argument('--dependencias', action='store_true', help="Incluir avro y requests en el paquete")
+    args = parser.parse_args()
+
+    try:
+        modulos = empaquetar(args.salida, args.dependencias)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    print(f"📦 {len(modulos)} scripts empaquetados en {args.salida} ({os.path.getsize(args.salida) // 1024} KB)")
+    sys.exit(0)
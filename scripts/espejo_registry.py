@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# Espejo local de Schema Registry: todos los subjects, versiones, IDs y
+# niveles de compatibilidad en un directorio, para leerlos sin red.
+#
+# Formato:
+#   esquemas.bin  registro de solo anexado; cada esquema una vez por ID como
+#                 cabecera <schema_id:u32, longitud:u32> seguida del texto UTF-8
+#   indice.json   subjects → {versión: ID} y compatibilidad, y ID → posición
+#                 del texto en esquemas.bin
+#
+# Las lecturas usan mmap sobre esquemas.bin y no parsean nada que no se pida.
+# Las versiones y los IDs son inmutables en el registry: cada sincronización
+# solo descarga las versiones que el espejo aún no tiene (más la lista de
+# versiones y la compatibilidad de cada subject, que pueden cambiar).
+#
+# Con ESPEJO_REGISTRY=<directorio>, obtener_cliente() devuelve el espejo en
+# lugar del cliente HTTP y los scripts de validación no hacen peticiones.
+#
+#   python espejo_registry.py sincronizar .registry_mirror
+#   python espejo_registry.py mostrar .registry_mirror
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cliente_registry import ClienteRegistry, ErrorRegistry
+
+VERSION_ESPEJO = 1
+CABECERA = struct.Struct('<II')
+ARCHIVO_ESQUEMAS = 'esquemas.bin'
+ARCHIVO_INDICE = 'indice.json'
+
+
+def _indice_vacio(url=None):
+    return {'version': VERSION_ESPEJO, 'url': url, 'sincronizado': None, 'longitud': 0,
+            'compatibilidad': 'BACKWARD', 'esquemas': {}, 'subjects': {}}
+
+
+class EspejoRegistry:
+    # Misma interfaz de lectura que ClienteRegistry, servida desde disco
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.peticiones = 0
+        self.mapa = None
+        self.indice = self._leer_indice()
+        self._abrir()
+
+    def _ruta(self, archivo):
+        return os.path.join(self.directorio, archivo)
+
+    def _leer_indice(self):
+        try:
+            with open(self._ruta(ARCHIVO_INDICE), 'r') as f:
+                indice = json.load(f)
+            if indice.get('version') == VERSION_ESPEJO:
+                return indice
+        except (OSError, ValueError):
+            pass
+        return _indice_vacio()
+
+    def _abrir(self):
+        # Solo se mapea la parte del registro que el índice da por válida
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+        if self.indice['longitud']:
+            with open(self._ruta(ARCHIVO_ESQUEMAS), 'rb') as f:
+                self.mapa = mmap.mmap(f.fileno(), self.indice['longitud'], access=mmap.ACCESS_READ)
+
+    # --- Lectura ---
+
+    def esquema_por_id(self, schema_id):
+        posicion = self.indice['esquemas'].get(str(schema_id))
+        if posicion is None:
+            raise ErrorRegistry(f"El esquema {schema_id} no está en el espejo", 404)
+        inicio, longitud = posicion
+        return str(self.mapa[inicio:inicio + longitud], 'utf-8')
+
+    def _subject(self, subject):
+        entrada = self.indice['subjects'].get(subject)
+        if entrada is None:
+            raise ErrorRegistry(f"El subject '{subject}' no está en el espejo", 404)
+        return entrada
+
+    def versiones(self, subject):
+        return sorted(int(version) for version in self._subject(subject)['versiones'])
+
+    def version(self, subject, version='latest'):
+        versiones = self._subject(subject)['versiones']
+        if version == 'latest':
+            if not versiones:
+                raise ErrorRegistry(f"El subject '{subject}' no tiene versiones en el espejo", 404)
+            version = max(versiones, key=int)
+        schema_id = versiones.get(str(version))
+        if schema_id is None:
+            raise ErrorRegistry(f"La versión {version} de '{subject}' no está en el espejo", 404)
+        return {'subject': subject, 'version': int(version), 'id': schema_id, 'schema': self.esquema_por_id(schema_id)}
+
+    def todas_las_versiones(self, subject):
+        return {version: self.version(subject, version)['schema'] for version in self.versiones(subject)}
+
+    def compatibilidad(self, subject):
+        entrada = self.indice['subjects'].get(subject)
+        return (entrada and entrada['compatibilidad']) or self.indice['compatibilidad']
+
+    def registrar(self, subject, texto_esquema):
+        raise ErrorRegistry(f"El espejo es de solo lectura: no se puede registrar en '{subject}'")
+
+    def cerrar(self):
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+
+    # --- Sincronización ---
+
+    def sincronizar(self, url=None, hilos=16):
+        cliente = ClienteRegistry(url)
+        indice = self.indice
+        if indice['url'] != cliente.url:
+            # Otro registry: nada de lo guardado sirve
+            indice = _indice_vacio(cliente.url)
+        os.makedirs(self.directorio, exist_ok=True)
+
+        def consultar(subject):
+            conocidas = indice['subjects'].get(subject, {}).get('versiones', {})
+            versiones, nuevos = {}, {}
+            for version in cliente.versiones(subject):
+                schema_id = conocidas.get(str(version))
+                if schema_id is None:
+                    metadatos = cliente.version(subject, version)
+                    schema_id = metadatos['id']
+                    if str(schema_id) not in indice['esquemas']:
+                        nuevos[schema_id] = metadatos['schema']
+                versiones[str(version)] = schema_id
+            return subject, versiones, nuevos, cliente.compatibilidad(subject)
+
+        subjects = cliente.subjects()
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            consultas = list(pool.map(consultar, subjects))
+
+        nuevos = {}
+        for _, _, esquemas, _ in consultas:
+            nuevos.update(esquemas)
+        indice['subjects'] = {
+            subject: {'versiones': versiones, 'compatibilidad': nivel}
+            for subject, versiones, _, nivel in consultas
+        }
+        indice['compatibilidad'] = cliente.compatibilidad_global()
+
+        # Los IDs que ya no usa ningún subject salen del índice; el registro
+        # se reescribe cuando más de la mitad de sus bytes son de esos IDs
+        usados = {str(schema_id) for entrada in indice['subjects'].values() for schema_id in entrada['versiones'].values()}
+        indice['esquemas'] = {schema_id: posicion for schema_id, posicion in indice['esquemas'].items() if schema_id in usados}
+        vivos = sum(CABECERA.size + longitud for _, longitud in indice['esquemas'].values())
+        if vivos * 2 < indice['longitud']:
+            self._compactar(indice)
+
+        self._anexar(indice, nuevos)
+        indice['sincronizado'] = time.time()
+        self._guardar_indice(indice)
+        self.indice = indice
+        self._abrir()
+        cliente.cerrar()
+        return {'subjects': len(subjects), 'esquemas_nuevos': len(nuevos), 'peticiones': cliente.peticiones}
+
+    def _anexar(self, indice, nuevos):
+        # Se trunca lo que una sincronización interrumpida pudiera dejar tras
+        # la parte válida, y el índice se reemplaza solo después del fsync
+        with open(self._ruta(ARCHIVO_ESQUEMAS), 'ab') as f:
+            f.truncate(indice['longitud'])
+            posicion = indice['longitud']
+            for schema_id, texto in sorted(nuevos.items()):
+                datos = texto.encode('utf-8')
+                f.write(CABECERA.pack(schema_id, len(datos)))
+                f.write(datos)
+                indice['esquemas'][str(schema_id)] = [posicion + CABECERA.size, len(datos)]
+                posicion += CABECERA.size + len(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        indice['longitud'] = posicion
+
+    def _compactar(self, indice):
+        temporal = self._ruta(f"{ARCHIVO_ESQUEMAS}.tmp")
+        esquemas, posicion = {}, 0
+        with open(temporal, 'wb') as f:
+            for schema_id, (inicio, longitud) in sorted(indice['esquemas'].items(), key=lambda e: e[1][0]):
+                f.write(self.mapa[inicio - CABECERA.size:inicio + longitud])
+                esquemas[schema_id] = [posicion + CABECERA.size, longitud]
+                posicion += CABECERA.size + longitud
+            f.flush()
+            os.fsync(f.fileno())
+        self.cerrar()
+        os.replace(temporal, self._ruta(ARCHIVO_ESQUEMAS))
+        indice['esquemas'], indice['longitud'] = esquemas, posicion
+
+    def _guardar_indice(self, indice):
+        temporal = self._ruta(f"{ARCHIVO_INDICE}.tmp")
+        with open(temporal, 'w') as f:
+            json.dump(indice, f, sort_keys=True, ensure_ascii=False)
+        os.replace(temporal, self._ruta(ARCHIVO_INDICE))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Espejo local de Schema Registry para validar sin red")
+    parser.add_argument('accion', choices=['sincronizar', 'mostrar'])
+    parser.add_argument('directorio', nargs='?', default=os.environ.get('ESPEJO_REGISTRY', '.registry_mirror'),
+                        help="Directorio del espejo (por defecto, ESPEJO_REGISTRY o .registry_mirror)")
+    parser.add_argument('--url', help="URL del Schema Registry (por defecto, SCHEMA_REGISTRY_URL)")
+    parser.add_argument('--hilos', type=int, default=16, help="Hilos para las consultas al Schema Registry")
+    args = parser.parse_args()
+
+    try:
+        espejo = EspejoRegistry(args.directorio)
+        if args.accion == 'sincronizar':
+            inicio = time.perf_counter()
+            resumen = espejo.sincronizar(args.url, args.hilos)
+            print(f"✅ {resumen['subjects']} subjects sincronizados: {resumen['esquemas_nuevos']} esquemas nuevos, "
+                  f"{resumen['peticiones']} peticiones en {time.perf_counter() - inicio:.2f}s")
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    indice = espejo.indice
+    versiones = sum(len(entrada['versiones']) for entrada in indice['subjects'].values())
+    sincronizado = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(indice['sincronizado'])) if indice['sincronizado'] else 'nunca'
+    print(f"📚 {indice['url']}: {len(indice['subjects'])} subjects, {versiones} versiones, "
+          f"{len(indice['esquemas'])} esquemas ({indice['longitud']} bytes), sincronizado {sincronizado}")
+    espejo.cerrar()
+    sys.exit(0)
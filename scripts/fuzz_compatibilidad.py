@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# Prueba diferencial del validador de compatibilidad: genera pares aleatorios
+# (esquema anterior, versión mutada) y compara el veredicto de
+# validar_compatibilidad en BACKWARD y FORWARD con lo que ocurre de verdad al
+# codificar datos aleatorios con el escritor y decodificarlos con el lector.
+#
+# La referencia son los lectores compilados de codec.py, que aplican la
+# resolución de la especificación sin pasar por resolucion.py (la resolución
+# de avro para Python es más estricta en aliases y promociones anidadas). Hay
+# dos tipos de discrepancia:
+#
+#   falso_compatible    el validador acepta el cambio y algún registro no se lee
+#   falso_incompatible  el validador lo rechaza y todos los registros se leen
+#                       (puede ser un validador demasiado estricto o que los
+#                       datos generados no pasen por el caso que falla)
+#
+# Cada contraejemplo se minimiza quitando campos, símbolos, ramas de unión,
+# defaults y aliases mientras la discrepancia se mantenga. Los casos se
+# reparten en lotes entre procesos; cada caso es reproducible con su semilla.
+#
+#   python fuzz_compatibilidad.py --casos 100000 --salida contraejemplos.jsonl
+#   python fuzz_compatibilidad.py --duracion 3600 --procesos 8
+#   python fuzz_compatibilidad.py --repetir 12345
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentacion import contar, etapa
+
+LOTE = 200
+REGISTROS = 16
+MAX_INTENTOS_MINIMIZAR = 400
+MODOS = ('BACKWARD', 'FORWARD')
+PRIMITIVOS = ('boolean', 'int', 'long', 'float', 'double', 'bytes', 'string')
+PROMOCIONES = {'int': ('long', 'float', 'double'), 'long': ('float', 'double', 'int'), 'float': ('double', 'int'),
+               'double': ('float',), 'string': ('bytes',), 'bytes': ('string',)}
+SIMBOLOS = ('A', 'B', 'C', 'D', 'E')
+
+
+# --- Generación de esquemas ---
+
+def _nombre(rnd, prefijo):
+    return f"{prefijo}{rnd.getrandbits(24):06x}"
+
+
+def generar_tipo(rnd, profundidad=0):
+    if profundidad >= 2 or rnd.random() < 0.55:
+        return rnd.choice(PRIMITIVOS)
+    opcion = rnd.randrange(6)
+    if opcion == 0:
+        return {'type': 'enum', 'name': _nombre(rnd, 'E'), 'symbols': list(SIMBOLOS[:rnd.randint(1, 4)])}
+    if opcion == 1:
+        return {'type': 'fixed', 'name': _nombre(rnd, 'F'), 'size': rnd.randint(1, 4)}
+    if opcion == 2:
+        return {'type': 'array', 'items': generar_tipo(rnd, profundidad + 1)}
+    if opcion == 3:
+        return {'type': 'map', 'values': generar_tipo(rnd, profundidad + 1)}
+    if opcion == 4:
+        ramas = rnd.sample(PRIMITIVOS, 2)
+        return ['null', ramas[0]] if rnd.random() < 0.6 else ramas
+    return generar_record(rnd, profundidad + 1)
+
+
+def generar_campo(rnd, nombre, profundidad=0):
+    campo = {'name': nombre, 'type': generar_tipo(rnd, profundidad)}
+    if rnd.random() < 0.4:
+        campo['default'] = None       # se completa en _reparar_defaults
+    return campo
+
+
+def generar_record(rnd, profundidad=0, nombre=None):
+    campos = [generar_campo(rnd, f"c{i}", profundidad) for i in range(rnd.randint(1, 5))]
+    return {'type': 'record', 'name': nombre or _nombre(rnd, 'R'), 'fields': campos}
+
+
+def default_minimo(tipo):
+    # Default JSON válido más simple para `tipo` (las uniones, de su primera rama)
+    if isinstance(tipo, list):
+        return default_minimo(tipo[0])
+    if isinstance(tipo, str):
+        return {'null': None, 'boolean': False, 'int': 0, 'long': 0, 'float': 0.0, 'double': 0.0,
+                'bytes': '', 'string': ''}[tipo]
+    if tipo['type'] == 'enum':
+        return tipo['symbols'][0]
+    if tipo['type'] == 'fixed':
+        return '\u0000' * tipo['size']
+    if tipo['type'] == 'array':
+        return []
+    if tipo['type'] == 'map':
+        return {}
+    return {campo['name']: campo['default'] if 'default' in campo else default_minimo(campo['type'])
+            for campo in tipo['fields']}
+
+
+def _records(tipo):
+    # Todos los records del esquema, los anidados antes que los que los contienen
+    if isinstance(tipo, list):
+        for rama in tipo:
+            yield from _records(rama)
+    elif isinstance(tipo, dict):
+        if tipo['type'] == 'record':
+            for campo in tipo['fields']:
+                yield from _records(campo['type'])
+            yield tipo
+        elif tipo['type'] == 'array':
+            yield from _records(tipo['items'])
+        elif tipo['type'] == 'map':
+            yield from _records(tipo['values'])
+
+
+def _reparar_defaults(esquema):
+    # Tras las mutaciones los defaults se recalculan para que sigan siendo válidos:
+    # se prueba la resolución, no la validación de defaults
+    for record in _records(esquema):
+        for campo in record['fields']:
+            if 'default' in campo:
+                campo['default'] = default_minimo(campo['type'])
+    return esquema
+
+
+def _mutar_tipo(rnd, tipo):
+    # Versión cambiada de un tipo: promoción (o su inversa), símbolos, ramas, tamaño o uno nuevo
+    if isinstance(tipo, str):
+        if tipo in PROMOCIONES and rnd.random() < 0.6:
+            return rnd.choice(PROMOCIONES[tipo])
+        return ['null', tipo] if rnd.random() < 0.3 else generar_tipo(rnd, 1)
+    if isinstance(tipo, list):
+        opcion = rnd.randrange(3)
+        if opcion == 0:
+            return tipo[-1]
+        if opcion == 1:
+            return list(reversed(tipo))
+        extra = [p for p in PRIMITIVOS if p not in tipo]
+        return tipo + [rnd.choice(extra)]
+    tipo = copy.deepcopy(tipo)
+    if tipo['type'] == 'enum':
+        opcion = rnd.randrange(3)
+        if opcion == 0 and len(tipo['symbols']) < len(SIMBOLOS):
+            tipo['symbols'].append(next(s for s in SIMBOLOS if s not in tipo['symbols']))
+        elif opcion == 1 and len(tipo['symbols']) > 1:
+            tipo['symbols'].pop(rnd.randrange(len(tipo['symbols'])))
+            if tipo.get('default', tipo['symbols'][0]) not in tipo['symbols']:
+                tipo['default'] = tipo['symbols'][0]
+        elif 'default' in tipo:
+            del tipo['default']
+        else:
+            tipo['default'] = tipo['symbols'][0]
+    elif tipo['type'] == 'fixed':
+        tipo['size'] += rnd.choice((-1, 1)) if tipo['size'] > 1 else 1
+    elif tipo['type'] == 'array':
+        tipo['items'] = _mutar_tipo(rnd, tipo['items'])
+    elif tipo['type'] == 'map':
+        tipo['values'] = _mutar_tipo(rnd, tipo['values'])
+    else:
+        _mutar_record(rnd, tipo)
+    return tipo
+
+
+def _mutar_record(rnd, record):
+    campos = record['fields']
+    nombres = {campo['name'] for campo in campos}
+    opcion = rnd.randrange(6)
+    if opcion == 0 or not campos:
+        campos.append(generar_campo(rnd, next(f"c{i}" for i in range(len(campos) + 1) if f"c{i}" not in nombres), 1))
+        return
+    campo = rnd.choice(campos)
+    if opcion == 1 and len(campos) > 1:
+        campos.remove(campo)
+    elif opcion == 2:
+        if 'default' in campo:
+            del campo['default']
+        else:
+            campo['default'] = None
+    elif opcion == 3:
+        # Renombrado, con el nombre anterior como alias o sin él
+        anterior = campo['name']
+        campo['name'] = next(f"{anterior}_{i}" for i in range(len(campos) + 1) if f"{anterior}_{i}" not in nombres)
+        if rnd.random() < 0.7:
+            campo['aliases'] = [anterior]
+    else:
+        campo['type'] = _mutar_tipo(rnd, campo['type'])
+
+
+def generar_par(semilla):
+    # (anterior, nuevo) como dicts JSON; el nuevo sale de 1 a 3 mutaciones del anterior
+    rnd = random.Random(semilla)
+    anterior = _reparar_defaults(generar_record(rnd, nombre='Order'))
+    nuevo = copy.deepcopy(anterior)
+    for _ in range(rnd.randint(1, 3)):
+        _mutar_record(rnd, rnd.choice(list(_records(nuevo))))
+    return anterior, _reparar_defaults(nuevo)
+
+
+# --- Veredictos ---
+
+def veredicto_validador(esquema_ant, esquema_nuevo):
+    # {modo: errores} de validar_compatibilidad, sin la caché en disco de validar_par
+    from validate_compatibility import analizar_cambios, validar_compatibilidad, validar_metadatos
+
+    errores_meta, _ = validar_metadatos(esquema_ant, esquema_nuevo)
+    if errores_meta:
+        return {modo: errores_meta for modo in MODOS}
+    cambios = analizar_cambios(esquema_ant, esquema_nuevo)
+    return {modo: validar_compatibilidad(cambios, modo)[0] for modo in MODOS}
+
+
+def fallo_datos(escritor, lector, registros, semilla):
+    # Primer error al leer con `lector` registros aleatorios escritos con `escritor`
+    from codec import DecodificadorMemoria, compilar_escritor, compilar_lector
+    from prueba_datos import CADENAS, GENERADORES_PRIMITIVOS, compilar_generador
+
+    # bytes → string es una promoción válida que solo se lee si los bytes son
+    # UTF-8: se generan bytes UTF-8 para que un fallo sea del esquema, no de los datos
+    primitivos = dict(GENERADORES_PRIMITIVOS, bytes=lambda rnd, profundidad: rnd.choice(CADENAS).encode())
+    rnd = random.Random(semilla)
+    generar = compilar_generador(escritor, primitivos=primitivos)
+    escribir = compilar_escritor(escritor)
+    leer = compilar_lector(escritor, lector)
+    for _ in range(registros):
+        salida = bytearray()
+        escribir(generar(rnd, 0), salida)
+        decodificador = DecodificadorMemoria(salida)
+        try:
+            leer(decodificador)
+            if decodificador.pos != len(salida):
+                return f"se consumieron {decodificador.pos} bytes de {len(salida)}"
+        except Exception as e:
+            return f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+    return None
+
+
+def discrepancias(anterior, nuevo, registros=REGISTROS, semilla=0):
+    # {(modo, tipo): (errores del validador, fallo al leer los datos)}
+    from cache_esquemas import parsear_avro
+
+    esquema_ant = parsear_avro(json.dumps(anterior))
+    esquema_nuevo = parsear_avro(json.dumps(nuevo))
+    veredictos = veredicto_validador(esquema_ant, esquema_nuevo)
+    sentidos = {'BACKWARD': (esquema_ant, esquema_nuevo), 'FORWARD': (esquema_nuevo, esquema_ant)}
+    encontradas = {}
+    for modo in MODOS:
+        fallo = fallo_datos(*sentidos[modo], registros, semilla)
+        errores = veredictos[modo]
+        if not errores and fallo is not None:
+            encontradas[(modo, 'falso_compatible')] = (errores, fallo)
+        elif errores and fallo is None:
+            encontradas[(modo, 'falso_incompatible')] = (errores, fallo)
+    return encontradas
+
+
+# --- Minimización ---
+
+def _reducciones(nodo):
+    # Copias de `nodo` con una parte menos: un elemento de una lista de
+    # campos, símbolos o ramas, o una clave opcional (default, aliases)
+    if isinstance(nodo, list):
+        for i in range(len(nodo)):
+            if len(nodo) > 1:
+                yield nodo[:i] + nodo[i + 1:]
+            for reducido in _reducciones(nodo[i]):
+                yield nodo[:i] + [reducido] + nodo[i + 1:]
+    elif isinstance(nodo, dict):
+        for clave, valor in nodo.items():
+            if clave in ('default', 'aliases'):
+                yield {k: v for k, v in nodo.items() if k != clave}
+            elif clave in ('type', 'fields', 'symbols', 'items', 'values'):
+                for reducido in _reducciones(valor):
+                    yield {**nodo, clave: reducido}
+
+
+def _sin_campo(esquema, record, nombre):
+    esquema = copy.deepcopy(esquema)
+    for r in _records(esquema):
+        if r['name'] == record:
+            r['fields'] = [campo for campo in r['fields'] if campo['name'] != nombre]
+    return _reparar_defaults(esquema)
+
+
+def _candidatos(anterior, nuevo):
+    # Primero se quita el mismo campo de ambos esquemas, luego cada reducción por separado
+    campos_nuevo = {(r['name'], c['name']) for r in _records(nuevo) for c in r['fields']}
+    for r in _records(anterior):
+        for campo in r['fields']:
+            if (r['name'], campo['name']) in campos_nuevo:
+                yield _sin_campo(anterior, r['name'], campo['name']), _sin_campo(nuevo, r['name'], campo['name'])
+    for reducido in _reducciones(anterior):
+        yield _reparar_defaults(reducido), nuevo
+    for reducido in _reducciones(nuevo):
+        yield anterior, _reparar_defaults(reducido)
+
+
+def minimizar(anterior, nuevo, clave, registros=REGISTROS, semilla=0):
+    # Reducción voraz hasta que ningún candidato conserva la discrepancia `clave`
+    intentos = 0
+    mejorado = True
+    while mejorado and intentos < MAX_INTENTOS_MINIMIZAR:
+        mejorado = False
+        for candidato in _candidatos(anterior, nuevo):
+            intentos += 1
+            if intentos >= MAX_INTENTOS_MINIMIZAR:
+                break
+            try:
+                if clave in discrepancias(*candidato, registros, semilla):
+                    anterior, nuevo = candidato
+                    mejorado = True
+                    break
+            except Exception:
+                continue
+    return anterior, nuevo
+
+
+# --- Ejecución por lotes ---
+
+def probar_caso(semilla, registros=REGISTROS, minimizar_casos=True):
+    anterior, nuevo = generar_par(semilla)
+    try:
+        encontradas = discrepancias(anterior, nuevo, registros, semilla)
+    except Exception as e:
+        # Un par que avro rechaza al parsear es un fallo del generador, no del validador
+        return 'descartado', [{'semilla': semilla, 'error': f"{type(e).__name__}: {e}"}]
+    contraejemplos = []
+    for (modo, tipo), (errores, fallo) in sorted(encontradas.items()):
+        minimo_ant, minimo_nuevo = (minimizar(anterior, nuevo, (modo, tipo), registros, semilla)
+                                    if minimizar_casos else (anterior, nuevo))
+        errores, fallo = discrepancias(minimo_ant, minimo_nuevo, registros, semilla)[(modo, tipo)]
+        contraejemplos.append({'semilla': semilla, 'modo': modo, 'tipo': tipo, 'errores_validador': errores,
+                               'fallo_datos': fallo, 'anterior': minimo_ant, 'nuevo': minimo_nuevo})
+    return 'discrepancia' if contraejemplos else 'coincide', contraejemplos
+
+
+def probar_lote(tarea):
+    inicio, cantidad, registros, minimizar_casos = tarea
+    resultado = {'casos': 0, 'coincide': 0, 'discrepancia': 0, 'descartado': 0, 'contraejemplos': [], 'descartes': []}
+    for semilla in range(inicio, inicio + cantidad):
+        estado, detalles = probar_caso(semilla, registros, minimizar_casos)
+        resultado['casos'] += 1
+        resultado[estado] += 1
+        resultado['descartes' if estado == 'descartado' else 'contraejemplos'].extend(detalles)
+    return resultado
+
+
+def ejecutar(semilla, casos=None, duracion=None, procesos=None, registros=REGISTROS, minimizar_casos=True):
+    # Lotes consecutivos de semillas hasta completar `casos` o agotar `duracion` segundos
+    total = {'casos': 0, 'coincide': 0, 'discrepancia': 0, 'descartado': 0, 'contraejemplos': [], 'descartes': []}
+    limite = time.monotonic() + duracion if duracion else None
+    siguiente = semilla
+    fin = semilla + casos if casos else None
+
+    def tareas():
+        nonlocal siguiente
+        while (fin is None or siguiente < fin) and (limite is None or time.monotonic() < limite):
+            cantidad = LOTE if fin is None else min(LOTE, fin - siguiente)
+            yield (siguiente, cantidad, registros, minimizar_casos)
+            siguiente += cantidad
+
+    def acumular(resultado):
+        for clave, valor in resultado.items():
+            total[clave] += valor
+
+    with etapa('fuzz'):
+        if procesos == 1:
+            for tarea in tareas():
+                acumular(probar_lote(tarea))
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                # Como mucho dos lotes en vuelo por proceso: con --duracion no se encola de más
+                en_vuelo = []
+                pendientes = tareas()
+                maximo = 2 * (procesos or os.cpu_count() or 1)
+                for tarea in pendientes:
+                    en_vuelo.append(pool.submit(probar_lote, tarea))
+                    if len(en_vuelo) >= maximo:
+                        acumular(en_vuelo.pop(0).result())
+                for futuro in en_vuelo:
+                    acumular(futuro.result())
+    for estado in ('coincide', 'discrepancia', 'descartado'):
+        contar('casos_fuzz', total[estado], resultado=estado)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba diferencial del validador de compatibilidad con datos reales")
+    parser.add_argument('--casos', type=int, help="Número de pares de esquemas (por defecto, 10000 sin --duracion)")
+    parser.add_argument('--duracion', type=float, help="Segundos de ejecución (para lanzarlo por la noche)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del primer caso")
+    parser.add_argument('--procesos', type=int, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument('--registros', type=int, default=REGISTROS, help="Registros por sentido y caso")
+    parser.add_argument('--sin-minimizar', action='store_true', help="Informar los contraejemplos tal cual")
+    parser.add_argument('--repetir', type=int, metavar='SEMILLA', help="Repetir un único caso y mostrarlo completo")
+    parser.add_argument('--salida', help="Archivo JSONL para los contraejemplos")
+    args = parser.parse_args()
+
+    if args.repetir is not None:
+        anterior, nuevo = generar_par(args.repetir)
+        print(f"📄 Anterior: {json.dumps(anterior)}\n📄 Nuevo:    {json.dumps(nuevo)}")
+        estado, contraejemplos = probar_caso(args.repetir, args.registros, not args.sin_minimizar)
+        print(f"📊 {estado}")
+        for c in contraejemplos:
+            print(json.dumps(c, indent=2, ensure_ascii=False))
+        sys.exit(1 if estado == 'discrepancia' else 0)
+
+    casos = args.casos if args.casos or args.duracion else 10_000
+    inicio = time.perf_counter()
+    try:
+        total = ejecutar(args.semilla, casos, args.duracion, args.procesos, args.registros, not args.sin_minimizar)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+    segundos = time.perf_counter() - inicio
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            for c in total['contraejemplos']:
+                f.write(json.dumps(c, ensure_ascii=False) + '\n')
+
+    print(f"📊 {total['casos']} casos en {segundos:.1f} s ({total['casos'] / segundos:,.0f} casos/s): "
+          f"{total['coincide']} coinciden, {total['discrepancia']} con discrepancias, {total['descartado']} descartados")
+    if total['descartes']:
+        print(f"⚠️ Primer caso descartado: {total['descartes'][0]}")
+    resumen = {}
+    for c in total['contraejemplos']:
+        resumen.setdefault((c['modo'], c['tipo']), []).append(c)
+    for (modo, tipo), lista in sorted(resumen.items()):
+        icono = '❌' if tipo == 'falso_compatible' else '⚠️'
+        ejemplo = min(lista, key=lambda c: len(json.dumps(c['anterior'])) + len(json.dumps(c['nuevo'])))
+        print(f"\n{icono} {modo} {tipo}: {len(lista)} casos (el más pequeño, semilla {ejemplo['semilla']})")
+        print(f"   anterior: {json.dumps(ejemplo['anterior'])}")
+        print(f"   nuevo:    {json.dumps(ejemplo['nuevo'])}")
+        print(f"   validador: {ejemplo['errores_validador'] or 'compatible'}")
+        print(f"   datos:     {ejemplo['fallo_datos'] or 'todos los registros se leen'}")
+
+    # Solo un falso compatible es un fallo seguro: el otro puede deberse a los datos generados
+    sys.exit(1 if any(c['tipo'] == 'falso_compatible' for c in total['contraejemplos']) else 0)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Generadores de esquemas sintéticos para benchmarks y pruebas de carga.
+#
+# Todos parten de la forma de common/src/main/avro/Order.avsc (mismo namespace,
+# tipos primitivos y enums equivalentes a PaymentMethod/OrderStatus) y devuelven
+# el esquema como dict JSON. mutar() genera una "versión nueva" con cambios
+# realistas: campos añadidos con default, promociones de tipo y símbolos nuevos.
+import json
+import random
+
+NAMESPACE = 'com.example.kafka'
+TIPOS_CAMPO = ['string', 'string', 'float', 'int', 'boolean', 'long', 'double']
+
+
+def _enum(nombre, simbolos, namespace=NAMESPACE):
+    return {'type': 'enum', 'name': nombre, 'namespace': f"{namespace}.{nombre}", 'symbols': simbolos}
+
+
+def _campo(nombre, tipo, con_default=False):
+    campo = {'name': nombre, 'type': tipo}
+    if con_default:
+        campo['default'] = {'string': '', 'float': 1.0, 'double': 1.0, 'int': 1,
+                            'long': 1, 'boolean': False}.get(tipo)
+    return campo
+
+
+def record_ancho(n_campos, nombre='Order', semilla=0):
+    rnd = random.Random(semilla)
+    campos = []
+    for i in range(n_campos):
+        if i % 500 == 499:
+            campos.append(_campo(f"payment_method_{i}", _enum(f"PaymentMethod{i}", ['CREDIT_CARD', 'PAYPAL', 'CASH', 'OTHER'])))
+        else:
+            campos.append(_campo(f"field_{i}", rnd.choice(TIPOS_CAMPO), con_default=rnd.random() < 0.5))
+    return {'type': 'record', 'name': nombre, 'namespace': NAMESPACE, 'fields': campos}
+
+
+def anidado_profundo(profundidad, campos_por_nivel=5):
+    interior = {'type': 'record', 'name': f"Nivel{profundidad}", 'fields': [
+        _campo(f"hoja_{j}", TIPOS_CAMPO[j % len(TIPOS_CAMPO)]) for j in range(campos_por_nivel)
+    ]}
+    for nivel in range(profundidad - 1, 0, -1):
+        campos = [_campo(f"valor_{j}", TIPOS_CAMPO[j % len(TIPOS_CAMPO)]) for j in range(campos_por_nivel - 1)]
+        campos.append(_campo('hijo', interior))
+        interior = {'type': 'record', 'name': f"Nivel{nivel}", 'fields': campos}
+    interior['name'] = 'Order'
+    interior['namespace'] = NAMESPACE
+    return interior
+
+
+def enum_grande(n_simbolos):
+    simbolos = [f"STATUS_{i}" for i in range(n_simbolos)]
+    return {'type': 'record', 'name': 'Order', 'namespace': NAMESPACE, 'fields': [
+        _campo('id', 'string'),
+        _campo('order_status', _enum('OrderStatus', simbolos)),
+    ]}
+
+
+def union_muchas_ramas(n_ramas):
+    ramas = ['null'] + [
+        {'type': 'record', 'name': f"Evento{i}", 'fields': [_campo('id', 'string'), _campo(f"dato_{i}", 'int')]}
+        for i in range(n_ramas)
+    ]
+    return {'type': 'record', 'name': 'Order', 'namespace': NAMESPACE, 'fields': [
+        _campo('id', 'string'),
+        {'name': 'evento', 'type': ramas, 'default': None},
+    ]}
+
+
+def recursivo(n_tipos):
+    # Cadena de tipos con nombre en la que cada uno referencia al anterior y a
+    # sí mismo (lista enlazada), de modo que los tipos compartidos se repiten.
+    tipos = []
+    for i in range(n_tipos):
+        campos = [_campo('valor', 'int'), {'name': 'siguiente', 'type': ['null', f"Nodo{i}"], 'default': None}]
+        if i:
+            campos.append({'name': 'anterior', 'type': f"Nodo{i - 1}"})
+            campos.append({'name': 'todos', 'type': {'type': 'array', 'items': f"Nodo{i - 1}"}})
+        tipos.append({'type': 'record', 'name': f"Nodo{i}", 'fields': campos})
+    # Cada tipo se define una vez, anidado en el primer uso del siguiente
+    for i in range(1, n_tipos):
+        tipos[i]['fields'][2]['type'] = tipos[i - 1]
+    return {'type': 'record', 'name': 'Order', 'namespace': NAMESPACE, 'fields': [
+        _campo('id', 'string'),
+        {'name': 'raiz', 'type': tipos[-1]},
+    ]}
+
+
+def _recorrer(nodo, visitar):
+    if isinstance(nodo, dict):
+        visitar(nodo)
+        for campo in nodo.get('fields', []):
+            _recorrer(campo['type'], visitar)
+        for clave in ('items', 'values'):
+            if clave in nodo:
+                _recorrer(nodo[clave], visitar)
+    elif isinstance(nodo, list):
+        for rama in nodo:
+            _recorrer(rama, visitar)
+
+
+def mutar(esquema, proporcion=0.05, semilla=1):
+    # Cambios compatibles en BACKWARD: campos nuevos con default, int → long,
+    # float → double y símbolos de enum añadidos.
+    rnd = random.Random(semilla)
+    nuevo = json.loads(json.dumps(esquema))
+
+    def visitar(nodo):
+        if nodo.get('type') in ('record', 'error'):
+            for campo in nodo['fields']:
+                if rnd.random() < proporcion and campo['type'] in ('int', 'float'):
+                    campo['type'] = {'int': 'long', 'float': 'double'}[campo['type']]
+            if rnd.random() < proporcion * 4:
+                nodo['fields'].append(_campo(f"nuevo_{len(nodo['fields'])}", 'string', con_default=True))
+        elif nodo.get('type') == 'enum':
+            nodo['symbols'] = nodo['symbols'] + ['UNKNOWN']
+
+    _recorrer(nuevo, visitar)
+    nuevo['fields'].append(_campo('campo_añadido', 'string', con_default=True))
+    return nuevo
+
+
+ESCENARIOS = {
+    'record_ancho_10k': lambda: record_ancho(10_000),
+    'anidado_profundo_100': lambda: anidado_profundo(100),
+    'enum_grande_10k': lambda: enum_grande(10_000),
+    'union_200_ramas': lambda: union_muchas_ramas(200),
+    'recursivo_50': lambda: recursivo(50),
+}
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Forma canónica de análisis (Parsing Canonical Form) y huellas de esquemas Avro.
+#
+# Se calcula directamente sobre el JSON, sin construir objetos de avro, para
+# poder deduplicar versiones antes de parsearlas. La forma canónica descarta
+# doc, order, aliases, defaults y logicalType: dos esquemas con la misma forma
+# canónica codifican igual los datos, pero no se resuelven igual (un default
+# quitado o no válido no la cambia). Para reutilizar veredictos de
+# compatibilidad se usa huella_completa, que solo descarta 'doc'.
+import hashlib
+import json
+
+PRIMITIVOS = {'null', 'boolean', 'int', 'long', 'float', 'double', 'bytes', 'string'}
+ORDEN_ATRIBUTOS = ('name', 'type', 'fields', 'symbols', 'items', 'values', 'size')
+
+# Huella Rabin de 64 bits (CRC-64-AVRO) definida en la especificación de Avro
+RABIN_VACIO = 0xc15d213aa4d7a795
+
+
+def _tabla_rabin():
+    tabla = []
+    for i in range(256):
+        fp = i
+        for _ in range(8):
+            fp = (fp >> 1) ^ (RABIN_VACIO & -(fp & 1))
+        tabla.append(fp)
+    return tabla
+
+
+TABLA_RABIN = _tabla_rabin()
+
+
+def _nombre_completo(nombre, namespace):
+    if '.' in nombre or not namespace:
+        return nombre
+    return f"{namespace}.{nombre}"
+
+
+def _canonico(nodo, namespace):
+    if isinstance(nodo, str):
+        return nodo if nodo in PRIMITIVOS else _nombre_completo(nodo, namespace)
+
+    if isinstance(nodo, list):
+        return [_canonico(rama, namespace) for rama in nodo]
+
+    tipo = nodo.get('type')
+    if isinstance(tipo, (dict, list)):
+        # {"type": {...}} es equivalente al esquema interior
+        return _canonico(tipo, namespace)
+    if tipo in PRIMITIVOS:
+        return tipo
+
+    resultado = {}
+    if tipo in ('record', 'error', 'enum', 'fixed'):
+        nombre = _nombre_completo(nodo['name'], nodo.get('namespace', namespace))
+        resultado['name'] = nombre
+        namespace = nombre.rpartition('.')[0]
+    resultado['type'] = tipo
+
+    if tipo in ('record', 'error'):
+        resultado['fields'] = [
+            {'name': campo['name'], 'type': _canonico(campo['type'], namespace)}
+            for campo in nodo.get('fields', [])
+        ]
+    elif tipo == 'enum':
+        resultado['symbols'] = list(nodo['symbols'])
+    elif tipo == 'array':
+        resultado['items'] = _canonico(nodo['items'], namespace)
+    elif tipo == 'map':
+        resultado['values'] = _canonico(nodo['values'], namespace)
+    elif tipo == 'fixed':
+        resultado['size'] = nodo['size']
+    elif tipo not in ('record', 'error', 'enum', 'fixed'):
+        # Referencia a un tipo con nombre escrita como {"type": "Nombre"}
+        return _nombre_completo(tipo, namespace)
+
+    return {k: resultado[k] for k in ORDEN_ATRIBUTOS if k in resultado}
+
+
+def forma_canonica(esquema_json):
+    if isinstance(esquema_json, str):
+        esquema_json = json.loads(esquema_json)
+    return json.dumps(_canonico(esquema_json, None), separators=(',', ':'), ensure_ascii=False)
+
+
+def huella(esquema_json):
+    return hashlib.sha256(forma_canonica(esquema_json).encode('utf-8')).hexdigest()
+
+
+def huella_rabin(esquema_json):
+    fp = RABIN_VACIO
+    for byte in forma_canonica(esquema_json).encode('utf-8'):
+        fp = (fp >> 8) ^ TABLA_RABIN[(fp ^ byte) & 0xff]
+    return f"{fp:016x}"
+
+
+def _sin_doc(nodo):
+    # 'doc' se quita en todos los niveles salvo dentro de los defaults, que son datos
+    if isinstance(nodo, list):
+        return [_sin_doc(elemento) for elemento in nodo]
+    if isinstance(nodo, dict):
+        return {clave: valor if clave == 'default' else _sin_doc(valor)
+                for clave, valor in nodo.items() if clave != 'doc'}
+    return nodo
+
+
+def huella_completa(esquema_json):
+    # Huella del JSON normalizado sin 'doc': conserva defaults, aliases, order y
+    # logicalType, todo lo que interviene en la resolución escritor/lector
+    if isinstance(esquema_json, str):
+        esquema_json = json.loads(esquema_json)
+    normalizado = json.dumps(_sin_doc(esquema_json), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(normalizado.encode('utf-8')).hexdigest()
+
+
+def huella_texto(texto):
+    # Huella del contenido exacto, para direccionar la caché en disco
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
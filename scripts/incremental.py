@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# Validación incremental de los esquemas del repositorio guiada por git.
+#
+# Mantiene un índice local (ruta → huella → veredicto) y en cada ejecución:
+#   1. calcula con git los .avsc cambiados desde la última ejecución
+#   2. añade los que dependen de ellos (p. ej. records que usan PaymentMethod
+#      definido en otro archivo), siguiendo las referencias a tipos con nombre
+#   3. valida solo esos contra su versión en el commit base
+#   4. reutiliza el veredicto guardado para el resto sin leerlos
+#
+# En la primera ejecución (sin commit base) cada esquema se valida contra la
+# última versión registrada de su subject. El commit base solo avanza cuando
+# todos los esquemas son compatibles: tras un rechazo, la siguiente ejecución
+# sigue comparando con la última versión aceptada.
+#
+# Los tipos definidos en otros archivos se insertan en el esquema antes de
+# validarlo, de modo que cada esquema se valida completo y autocontenido.
+#
+#   python incremental.py [--directorio common/src/main/avro] [--base <commit>]
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cliente_registry import ErrorRegistry, obtener_cliente
+from huella import PRIMITIVOS, huella_completa
+from indice_tipos import es_envoltorio, nombre_completo, recorrer_tipos, tipos_de
+from resolucion import TIPOS_CON_NOMBRE
+from validar_lote import ESTRATEGIAS, MANIFIESTO_DIRECTORIO, cargar_manifiesto
+
+VERSION_INDICE = 1
+DIRECTORIO = 'common/src/main/avro'
+RUTA_INDICE = os.environ.get('INDICE_INCREMENTAL', '.validacion_incremental.json')
+
+
+def _git(*argumentos):
+    return subprocess.run(['git', *argumentos], capture_output=True, text=True, check=True).stdout
+
+
+def texto_en(commit, ruta):
+    # Contenido de `ruta` en `commit`, o None si no existía
+    try:
+        return _git('show', f"{commit}:{ruta}")
+    except subprocess.CalledProcessError:
+        return None
+
+
+def archivos_cambiados(base, directorio):
+    # Rutas .avsc cambiadas entre `base` y el árbol de trabajo (incluye las no
+    # versionadas y las borradas)
+    cambiados = _git('diff', '--name-only', base, '--', directorio).split()
+    cambiados += _git('ls-files', '--others', '--exclude-standard', '--', directorio).split()
+    return {ruta for ruta in cambiados if ruta.endswith('.avsc')}
+
+
+# --- Tipos con nombre ---
+
+def expandir(esquema, definiciones):
+    # Inserta en su primer uso la definición de cada tipo externo (con el nombre
+    # completo, para que no dependa del namespace donde queda anidada)
+    insertados = set()
+
+    def recorrer(nodo, namespace):
+        if isinstance(nodo, str):
+            nombre = nombre_completo(nodo, namespace) if nodo not in PRIMITIVOS else nodo
+            if nombre in definiciones and nombre not in insertados:
+                insertados.add(nombre)
+                definicion = copy.deepcopy(definiciones[nombre])
+                definicion.pop('namespace', None)
+                definicion['name'] = nombre
+                return recorrer(definicion, nombre.rpartition('.')[0])
+            return nodo
+        if isinstance(nodo, list):
+            return [recorrer(rama, namespace) for rama in nodo]
+        if isinstance(nodo, dict):
+            tipo = nodo.get('type')
+            if es_envoltorio(tipo):
+                return {**nodo, 'type': recorrer(tipo, namespace)}
+            if tipo in TIPOS_CON_NOMBRE:
+                nombre = nombre_completo(nodo['name'], nodo.get('namespace', namespace))
+                insertados.add(nombre)
+                namespace = nombre.rpartition('.')[0]
+            nodo = dict(nodo)
+            if 'fields' in nodo:
+                nodo['fields'] = [{**campo, 'type': recorrer(campo['type'], namespace)} for campo in nodo['fields']]
+            for clave in ('items', 'values'):
+                if clave in nodo:
+                    nodo[clave] = recorrer(nodo[clave], namespace)
+        return nodo
+
+    return recorrer(esquema, '')
+
+
+# --- Índice ---
+
+def cargar_indice(ruta):
+    try:
+        with open(ruta, 'r') as f:
+            indice = json.load(f)
+        if indice.get('version') == VERSION_INDICE:
+            return indice
+    except (OSError, ValueError):
+        pass
+    return {'version': VERSION_INDICE, 'commit': None, 'esquemas': {}}
+
+
+def guardar_indice(ruta, indice):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w') as f:
+        json.dump(indice, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def afectados(cambiados, tipos_cambiados, esquemas):
+    # Cambiados más todos los que usan (directa o indirectamente) un tipo
+    # definido, o que se ha dejado de definir, en alguno de ellos
+    usuarios = {}
+    for ruta, entrada in esquemas.items():
+        for nombre in entrada['referencia']:
+            usuarios.setdefault(nombre, set()).add(ruta)
+
+    resultado = set(cambiados)
+    pendientes = list(tipos_cambiados)
+    while pendientes:
+        nombre = pendientes.pop()
+        for usuario in usuarios.get(nombre, ()):
+            if usuario not in resultado:
+                resultado.add(usuario)
+                pendientes.extend(esquemas[usuario]['define'])
+    return resultado
+
+
+# --- Validación ---
+
+def _textos_expandidos(ruta, definidores, leer):
+    # Esquema de `ruta` con sus tipos externos insertados, leyendo cada archivo
+    # con `leer(ruta)` (árbol de trabajo o commit base); None si no existe
+    texto = leer(ruta)
+    if texto is None:
+        return None
+    esquema = json.loads(texto)
+    _, referencias = tipos_de(esquema)
+    definiciones = {}
+    visitados = {ruta}
+    pendientes = list(referencias)
+    while pendientes:
+        nombre = pendientes.pop()
+        origen = definidores.get(nombre)
+        if origen is None or origen in visitados:
+            continue
+        visitados.add(origen)
+        texto_origen = leer(origen)
+        if texto_origen is None:
+            continue
+        esquema_origen = json.loads(texto_origen)
+        definiciones.update(recorrer_tipos(esquema_origen)[0])
+        pendientes.extend(tipos_de(esquema_origen)[1])
+    return json.dumps(expandir(esquema, definiciones)) if definiciones else texto
+
+
+def _como_record(texto):
+    # validar_par compara records: un enum, fixed, etc. de primer nivel se
+    # valida como único campo de un record envoltorio
+    esquema = json.loads(texto)
+    if isinstance(esquema, dict) and esquema.get('type') in ('record', 'error'):
+        return texto
+    return json.dumps({'type': 'record', 'name': 'Raiz', 'fields': [{'name': 'valor', 'type': esquema}]})
+
+
+def _validar(tarea):
+    from validate_compatibility import validar_par
+
+    ruta, texto_ant, texto_nuevo, compatibilidad = tarea
+    if texto_ant is None:
+        return ruta, 'nuevo', [], []
+    try:
+        errores, advertencias = validar_par(_como_record(texto_ant), _como_record(texto_nuevo),
+                                            compatibilidad.replace('_TRANSITIVE', ''))
+    except Exception as e:
+        return ruta, 'error', [str(e)], []
+    return ruta, 'incompatible' if errores else 'compatible', errores, advertencias
+
+
+def _compatibilidad(subject, fija):
+    return fija or obtener_cliente().compatibilidad(subject)
+
+
+def _ultima_registrada(subject):
+    # Texto de la última versión de `subject`, o None si no está registrado
+    try:
+        return obtener_cliente().version(subject)['schema']
+    except ErrorRegistry as e:
+        if e.status_code != 404:
+            raise
+        return None
+
+
+def validar_incremental(directorio, base, indice, compatibilidad=None, procesos=None, estrategia=None):
+    raiz = _git('rev-parse', '--show-toplevel').strip()
+    cabeza = _git('rev-parse', 'HEAD').strip()
+    esquemas = indice['esquemas']
+
+    actuales = {os.path.relpath(os.path.abspath(ruta), raiz): subject
+                for ruta, subject in cargar_manifiesto(os.path.join(raiz, directorio), estrategia).items()}
+    if base is None:
+        # Primera ejecución: todo es nuevo para el índice y se compara con el registry
+        cambiados = set(actuales)
+    else:
+        cambiados = archivos_cambiados(base, directorio) | (set(actuales) - set(esquemas))
+
+    def leer_actual(ruta):
+        try:
+            with open(os.path.join(raiz, ruta), 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # Tipos definidos y usados: solo se vuelven a leer los archivos cambiados
+    tipos_cambiados, borrados = set(), []
+    for ruta in cambiados:
+        entrada = esquemas.setdefault(ruta, {'define': [], 'referencia': []})
+        tipos_cambiados.update(entrada['define'])
+        texto = leer_actual(ruta)
+        if texto is None:
+            borrados.append(ruta)
+            continue
+        definidos, referencias = tipos_de(json.loads(texto))
+        tipos_cambiados.update(definidos)
+        entrada.update({'define': sorted(definidos), 'referencia': sorted(referencias), 'subject': actuales[ruta]})
+
+    pendientes = afectados(cambiados, tipos_cambiados, esquemas)
+    for ruta in borrados:
+        del esquemas[ruta]
+    pendientes = sorted(ruta for ruta in pendientes if ruta in esquemas)
+    definidores = {nombre: ruta for ruta, entrada in esquemas.items() for nombre in entrada['define']}
+
+    if base is None:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            registrados = dict(zip(pendientes, pool.map(
+                _ultima_registrada, [esquemas[ruta]['subject'] for ruta in pendientes])))
+
+    tareas, reutilizados = [], []
+    for ruta in pendientes:
+        entrada = esquemas[ruta]
+        texto_nuevo = _textos_expandidos(ruta, definidores, leer_actual)
+        if base is None:
+            texto_ant = registrados[ruta]
+        else:
+            texto_ant = _textos_expandidos(ruta, definidores, lambda r: texto_en(base, r))
+        modo = _compatibilidad(entrada['subject'], compatibilidad)
+        # La forma canónica omite defaults y aliases, que sí cambian el veredicto
+        clave = f"{huella_completa(texto_ant) if texto_ant else '-'}:{huella_completa(texto_nuevo)}:{modo}"
+        if entrada.get('resultado', {}).get('clave') == clave:
+            reutilizados.append(ruta)
+            continue
+        entrada['resultado'] = {'clave': clave, 'compatibilidad': modo}
+        tareas.append((ruta, texto_ant, texto_nuevo, modo))
+
+    if len(tareas) > 1 and procesos != 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_validar, tareas))
+    else:
+        resultados = [_validar(tarea) for tarea in tareas]
+
+    for ruta, estado, errores, advertencias in resultados:
+        esquemas[ruta]['resultado'].update({'estado': estado, 'errores': errores, 'advertencias': advertencias})
+
+    validados = {ruta for ruta, *_ in resultados}
+    resumen = [
+        {'ruta': ruta, 'origen': 'validado' if ruta in validados else 'reutilizado', **esquemas[ruta]['resultado']}
+        for ruta in sorted(esquemas)
+        if 'resultado' in esquemas[ruta]
+    ]
+    # Un esquema rechazado no pasa a ser la referencia de la siguiente ejecución
+    if not any(r['estado'] in ('incompatible', 'error') for r in resumen):
+        indice['commit'] = cabeza
+    return resumen, len(reutilizados)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validación incremental de los esquemas .avsc cambiados en git")
+    parser.add_argument('--directorio', default=DIRECTORIO, help="Directorio de esquemas relativo a la raíz del repositorio")
+    parser.add_argument('--base', help="Commit de referencia (por defecto, el de la última ejecución)")
+    parser.add_argument('--indice', default=RUTA_INDICE, help="Archivo del índice local")
+    parser.add_argument('--compatibilidad', help="Modo de compatibilidad (por defecto, el de cada subject en el registry)")
+    parser.add_argument('--procesos', type=int, help="Procesos para validar en paralelo")
+    parser.add_argument('--estrategia', choices=sorted(ESTRATEGIAS),
+                        help=f"Subject de los .avsc que no estén en el {MANIFIESTO_DIRECTORIO} del directorio")
+    parser.add_argument('--salida', help="Guardar el resultado en un archivo JSON")
+    args = parser.parse_args()
+
+    try:
+        indice = cargar_indice(args.indice)
+        base = args.base or os.environ.get('GIT_PREVIOUS_SUCCESSFUL_COMMIT') or indice['commit']
+        resultados, reutilizados_por_huella = validar_incremental(
+            args.directorio, base, indice, args.compatibilidad, args.procesos, args.estrategia)
+        guardar_indice(args.indice, indice)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    iconos = {'compatible': '✅', 'nuevo': '🆕', 'incompatible': '❌', 'error': '❌'}
+    for r in resultados:
+        print(f"{iconos[r['estado']]} {r['ruta']} [{r['compatibilidad']}] ({r['origen']})")
+        for e in r['errores']:
+            print(f"   - {e}")
+        for a in r['advertencias']:
+            print(f"   ⚠️ {a}")
+
+    validados = sum(r['origen'] == 'validado' for r in resultados)
+    print(f"\n📊 {len(resultados)} esquemas: {validados} validados, "
+          f"{len(resultados) - validados} reutilizados del índice ({reutilizados_por_huella} por huella)")
+    sys.exit(1 if any(r['estado'] in ('incompatible', 'error') for r in resultados) else 0)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# Índice de tipos con nombre de todos los .avsc de un directorio.
+#
+# Recorre el directorio una sola vez (solo JSON, sin avro), ordena los archivos
+# topológicamente según los tipos que usan de otros archivos y los parsea en
+# ese orden en un único espacio de nombres compartido: cada tipo se construye
+# una vez y los demás archivos lo referencian por nombre. Además precalcula
+# qué subjects embeben cada tipo, de forma directa o a través de otros, para
+# responder en O(1) al alcance de un cambio en un tipo compartido.
+#
+#   python indice_tipos.py common/src/main/avro --tipo com.example.kafka.PaymentMethod
+import argparse
+import json
+import os
+import sys
+from functools import lru_cache
+
+from huella import PRIMITIVOS
+from resolucion import TIPOS_CON_NOMBRE
+
+PALABRAS_TIPO = PRIMITIVOS | set(TIPOS_CON_NOMBRE) | {'array', 'map'}
+
+
+def nombre_completo(nombre, namespace):
+    if '.' in nombre or not namespace:
+        return nombre
+    return f"{namespace}.{nombre}"
+
+
+def es_envoltorio(tipo):
+    # {"type": <esquema>} equivale al esquema interior (incluidas referencias)
+    return isinstance(tipo, (dict, list)) or (tipo is not None and tipo not in PALABRAS_TIPO)
+
+
+def recorrer_tipos(esquema):
+    # Devuelve (definiciones, usos, raices):
+    #   definiciones: nombre completo → JSON de la definición
+    #   usos: nombre completo → nombres que usa directamente (definidos dentro o referenciados)
+    #   raices: nombres usados directamente en el primer nivel del esquema
+    definiciones, usos, raices = {}, {}, set()
+
+    def recorrer(nodo, namespace, dueño):
+        destino = raices if dueño is None else usos[dueño]
+        if isinstance(nodo, str):
+            if nodo not in PRIMITIVOS:
+                destino.add(nombre_completo(nodo, namespace))
+        elif isinstance(nodo, list):
+            for rama in nodo:
+                recorrer(rama, namespace, dueño)
+        elif isinstance(nodo, dict):
+            tipo = nodo.get('type')
+            if es_envoltorio(tipo):
+                recorrer(tipo, namespace, dueño)
+                return
+            if tipo in TIPOS_CON_NOMBRE:
+                nombre = nombre_completo(nodo['name'], nodo.get('namespace', namespace))
+                destino.add(nombre)
+                definiciones[nombre] = nodo
+                usos.setdefault(nombre, set())
+                namespace, dueño = nombre.rpartition('.')[0], nombre
+            for campo in nodo.get('fields', []):
+                recorrer(campo['type'], namespace, dueño)
+            for clave in ('items', 'values'):
+                if clave in nodo:
+                    recorrer(nodo[clave], namespace, dueño)
+
+    recorrer(esquema, '', None)
+    return definiciones, usos, raices
+
+
+def tipos_de(esquema):
+    # (definidos, referenciados): nombres completos de los tipos que define el
+    # esquema y de los que usa sin definir
+    definiciones, usos, raices = recorrer_tipos(esquema)
+    usados = set(raices).union(*usos.values())
+    return set(definiciones), usados - set(definiciones)
+
+
+class IndiceTipos:
+    def __init__(self, origen):
+        # `origen`: directorio de .avsc o manifiesto JSON {ruta: subject}.
+        # avro solo se importa si algún esquema necesita el índice.
+        from avro.name import Names
+        from validar_lote import cargar_manifiesto
+
+        # Se indexan todos los .avsc: los que no declaran subject se nombran por su archivo
+        self.subjects = cargar_manifiesto(origen, estrategia='archivo')
+        self.define = {}
+        self.referencia = {}
+        self.definidor = {}
+        self.usos = {}
+        self.raices = {}
+        self.duplicados = {}
+        self._json = {}
+
+        for ruta in self.subjects:
+            with open(ruta, 'r') as f:
+                esquema = json.load(f)
+            definiciones, usos, raices = recorrer_tipos(esquema)
+            self._json[ruta] = esquema
+            self.raices[ruta] = raices
+            self.define[ruta] = set(definiciones)
+            self.referencia[ruta] = set(raices).union(*usos.values()) - set(definiciones)
+            for nombre in definiciones:
+                # Un tipo repetido en línea en varios archivos: vale la primera definición
+                if nombre in self.definidor:
+                    self.duplicados.setdefault(nombre, [self.definidor[nombre]]).append(ruta)
+                    continue
+                self.definidor[nombre] = ruta
+                self.usos[nombre] = usos[nombre]
+
+        self.orden = self._ordenar()
+        self.nombres = Names()
+        self.esquemas = {}
+        self.subjects_por_tipo, self.archivos_por_tipo = self._embebidos()
+
+    def dependencias(self, ruta):
+        return {self.definidor[nombre] for nombre in self.referencia[ruta] if nombre in self.definidor} - {ruta}
+
+    def _ordenar(self):
+        # Orden topológico (Kahn): cada archivo va después de los que definen
+        # los tipos que usa
+        pendientes = {ruta: len(self.dependencias(ruta)) for ruta in self.subjects}
+        dependientes = {}
+        for ruta in self.subjects:
+            for dependencia in self.dependencias(ruta):
+                dependientes.setdefault(dependencia, []).append(ruta)
+
+        listos = sorted(ruta for ruta, n in pendientes.items() if n == 0)
+        orden = []
+        while listos:
+            ruta = listos.pop()
+            orden.append(ruta)
+            for dependiente in dependientes.get(ruta, ()):
+                pendientes[dependiente] -= 1
+                if pendientes[dependiente] == 0:
+                    listos.append(dependiente)
+
+        if len(orden) != len(self.subjects):
+            ciclo = sorted(ruta for ruta, n in pendientes.items() if n > 0)
+            raise ValueError(f"Referencias circulares entre archivos: {ciclo}")
+        return orden
+
+    def _cierres(self):
+        # Tipos alcanzables desde cada tipo. Componentes fuertemente conexas de
+        # Tarjan: los tipos mutuamente recursivos comparten el mismo cierre y
+        # cada componente se resuelve una sola vez.
+        orden, bajo, pila, en_pila, cierres = {}, {}, [], set(), {}
+
+        def visitar(nombre):
+            orden[nombre] = bajo[nombre] = len(orden)
+            pila.append(nombre)
+            en_pila.add(nombre)
+            for usado in self.usos.get(nombre, ()):
+                if usado not in orden:
+                    visitar(usado)
+                    bajo[nombre] = min(bajo[nombre], bajo[usado])
+                elif usado in en_pila:
+                    bajo[nombre] = min(bajo[nombre], orden[usado])
+
+            if bajo[nombre] == orden[nombre]:
+                miembros = []
+                while True:
+                    miembro = pila.pop()
+                    en_pila.discard(miembro)
+                    miembros.append(miembro)
+                    if miembro == nombre:
+                        break
+                cierre = set(miembros)
+                for miembro in miembros:
+                    for usado in self.usos.get(miembro, ()):
+                        if usado not in cierre:
+                            cierre |= cierres[usado]
+                for miembro in miembros:
+                    cierres[miembro] = cierre
+
+        for nombre in self.usos:
+            if nombre not in orden:
+                visitar(nombre)
+        return cierres
+
+    def _embebidos(self):
+        # Para cada subject, todos los tipos alcanzables desde su primer nivel;
+        # se invierte para responder "qué subjects embeben X" con una consulta
+        cierres = self._cierres()
+
+        subjects_por_tipo, archivos_por_tipo = {}, {}
+        for ruta in self.orden:
+            alcanzables = set()
+            for nombre in self.raices[ruta]:
+                alcanzables |= cierres.get(nombre, {nombre})
+            for nombre in alcanzables:
+                subjects_por_tipo.setdefault(nombre, set()).add(self.subjects[ruta])
+                archivos_por_tipo.setdefault(nombre, set()).add(ruta)
+        return ({n: frozenset(s) for n, s in subjects_por_tipo.items()},
+                {n: frozenset(a) for n, a in archivos_por_tipo.items()})
+
+    # --- Consultas ---
+
+    def subjects_con(self, nombre):
+        return self.subjects_por_tipo.get(nombre, frozenset())
+
+    def archivos_con(self, nombre):
+        return self.archivos_por_tipo.get(nombre, frozenset())
+
+    def esquema(self, ruta):
+        if ruta not in self.esquemas:
+            self.cargar()
+        return self.esquemas[ruta]
+
+    def tipo(self, nombre):
+        if not self.esquemas:
+            self.cargar()
+        return self.nombres.names[nombre]
+
+    def texto(self, ruta):
+        # JSON autocontenido: avro escribe cada tipo con nombre completo en su
+        # primer uso, incluidos los definidos en otros archivos
+        return str(self.esquema(ruta))
+
+    def cargar(self):
+        from avro.name import Names
+        from avro.schema import make_avsc_object
+
+        for ruta in self.orden:
+            if ruta in self.esquemas:
+                continue
+            faltan = {n for n in self.referencia[ruta] if n not in self.definidor}
+            if faltan:
+                raise ValueError(f"'{ruta}' usa tipos que no están definidos en ningún archivo: {sorted(faltan)}")
+            propios = self.define[ruta] & self.nombres.names.keys()
+            if propios:
+                # Repite en línea tipos ya registrados: se parsea en un espacio
+                # propio que solo comparte los tipos que no redefine
+                nombres = Names()
+                nombres.names = {n: s for n, s in self.nombres.names.items() if n not in propios}
+            else:
+                nombres = self.nombres
+            self.esquemas[ruta] = make_avsc_object(self._json[ruta], nombres)
+            if nombres is not self.nombres:
+                for nombre, esquema in nombres.names.items():
+                    self.nombres.names.setdefault(nombre, esquema)
+        return self.esquemas
+
+
+@lru_cache(maxsize=None)
+def indice_de(directorio):
+    return IndiceTipos(directorio)
+
+
+def texto_autocontenido(ruta, texto):
+    # El texto tal cual si no usa tipos de otros archivos; si no, el esquema
+    # resuelto con el índice del directorio en el que está
+    _, referencias = tipos_de(json.loads(texto))
+    if not referencias:
+        return texto
+    return indice_de(os.path.dirname(os.path.abspath(ruta))).texto(os.path.abspath(ruta))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de tipos con nombre de un directorio de esquemas .avsc")
+    parser.add_argument('origen', help="Directorio con archivos .avsc o manifiesto JSON {ruta: subject}")
+    parser.add_argument('--tipo', action='append', help="Mostrar los subjects que embeben este tipo (repetible)")
+    args = parser.parse_args()
+
+    try:
+        indice = IndiceTipos(args.origen)
+        indice.cargar()
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    print(f"📚 {len(indice.orden)} archivos, {len(indice.definidor)} tipos con nombre")
+    for ruta in indice.orden:
+        dependencias = sorted(indice.dependencias(ruta))
+        print(f" - {ruta} ({indice.subjects[ruta]})" + (f" ← {', '.join(dependencias)}" if dependencias else ""))
+    for nombre, rutas in sorted(indice.duplicados.items()):
+        print(f"⚠️ '{nombre}' está definido en varios archivos: {rutas}")
+    for nombre in args.tipo or []:
+        subjects = sorted(indice.subjects_con(nombre))
+        print(f"\n🔍 {nombre}: {len(subjects)} subjects" + (f" → {', '.join(subjects)}" if subjects else ""))
+    sys.exit(0)
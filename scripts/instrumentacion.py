@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Instrumentación compartida por los scripts: tiempos por etapa, contadores y,
+# opcionalmente, perfil de CPU (cProfile) y pico de memoria (tracemalloc).
+#
+# Las métricas se acumulan en el proceso y se exportan al terminar si
+# METRICAS_SALIDA indica un archivo ('{script}' se sustituye por el nombre del
+# script): con extensión '.prom' en formato de texto de Prometheus (textfile
+# collector o pushgateway) y con cualquier otra en JSON, para adjuntarlo a la
+# ejecución de Jenkins.
+#
+#   METRICAS_SALIDA=metricas/{script}.json    exportar al terminar
+#   METRICAS_PERFIL=perfil.prof               guardar el perfil de cProfile
+#   METRICAS_MEMORIA=1                        medir el pico de memoria
+#
+#   with etapa('analisis', subject='orders-value'):
+#       ...
+#   contar('campos_comparados', len(campos))
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIJO = 'kafka_avro'
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formato_etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+
+
+class Metricas:
+    def __init__(self):
+        self.bloqueo = threading.Lock()
+        self.tiempos = {}       # (etapa, etiquetas) -> [llamadas, segundos totales, máximo]
+        self.contadores = {}    # (nombre, etiquetas) -> total
+        self.valores = {}       # (nombre, etiquetas) -> último valor
+        self.inicio = time.time()
+
+    def reiniciar(self):
+        # Un proceso creado con fork parte de cero y no hereda un bloqueo tomado
+        self.__init__()
+
+    def registrar(self, nombre, segundos, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self.bloqueo:
+            tiempo = self.tiempos.get(clave)
+            if tiempo is None:
+                self.tiempos[clave] = [1, segundos, segundos]
+            else:
+                tiempo[0] += 1
+                tiempo[1] += segundos
+                tiempo[2] = max(tiempo[2], segundos)
+
+    def contar(self, nombre, n=1, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self.bloqueo:
+            self.contadores[clave] = self.contadores.get(clave, 0) + n
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self.bloqueo:
+            self.valores[(nombre, _etiquetas(etiquetas))] = valor
+
+    @contextmanager
+    def etapa(self, nombre, **etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def extraer(self):
+        # Tiempos y contadores acumulados desde la última extracción, para
+        # enviarlos desde un proceso del pool al principal
+        with self.bloqueo:
+            datos = (self.tiempos, self.contadores)
+            self.tiempos, self.contadores = {}, {}
+        return datos
+
+    def incorporar(self, datos):
+        tiempos, contadores = datos
+        with self.bloqueo:
+            for clave, (n, total, maximo) in tiempos.items():
+                tiempo = self.tiempos.setdefault(clave, [0, 0.0, 0.0])
+                tiempo[0] += n
+                tiempo[1] += total
+                tiempo[2] = max(tiempo[2], maximo)
+            for clave, valor in contadores.items():
+                self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    # --- Exportación ---
+
+    def exportar_json(self):
+        with self.bloqueo:
+            return {
+                'script': os.path.basename(sys.argv[0]),
+                'inicio': self.inicio,
+                'fin': time.time(),
+                'etapas': [
+                    {'etapa': nombre, 'etiquetas': dict(etiquetas), 'llamadas': n, 'segundos': total, 'maximo_s': maximo}
+                    for (nombre, etiquetas), (n, total, maximo) in sorted(self.tiempos.items())
+                ],
+                'contadores': [
+                    {'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+                    for (nombre, etiquetas), valor in sorted(self.contadores.items())
+                ],
+                'valores': [
+                    {'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+                    for (nombre, etiquetas), valor in sorted(self.valores.items())
+                ],
+            }
+
+    def exportar_prometheus(self):
+        script = (('script', os.path.basename(sys.argv[0])),)
+        lineas = []
+        with self.bloqueo:
+            if self.tiempos:
+                lineas.append(f"# TYPE {PREFIJO}_etapa_segundos summary")
+                for (nombre, etiquetas), (n, total, _) in sorted(self.tiempos.items()):
+                    e = _formato_etiquetas(script + (('etapa', nombre),) + etiquetas)
+                    lineas.append(f"{PREFIJO}_etapa_segundos_sum{e} {total:.6f}")
+                    lineas.append(f"{PREFIJO}_etapa_segundos_count{e} {n}")
+                lineas.append(f"# TYPE {PREFIJO}_etapa_segundos_max gauge")
+                for (nombre, etiquetas), (_, _, maximo) in sorted(self.tiempos.items()):
+                    e = _formato_etiquetas(script + (('etapa', nombre),) + etiquetas)
+                    lineas.append(f"{PREFIJO}_etapa_segundos_max{e} {maximo:.6f}")
+            anterior = None
+            for (nombre, etiquetas), valor in sorted(self.contadores.items()):
+                if nombre != anterior:
+                    lineas.append(f"# TYPE {PREFIJO}_{nombre}_total counter")
+                    anterior = nombre
+                lineas.append(f"{PREFIJO}_{nombre}_total{_formato_etiquetas(script + etiquetas)} {valor}")
+            for (nombre, etiquetas), valor in sorted(self.valores.items()):
+                if nombre != anterior:
+                    lineas.append(f"# TYPE {PREFIJO}_{nombre} gauge")
+                    anterior = nombre
+                lineas.append(f"{PREFIJO}_{nombre}{_formato_etiquetas(script + etiquetas)} {valor}")
+        return '\n'.join(lineas) + '\n'
+
+    def guardar(self, ruta):
+        ruta = ruta.replace('{script}', os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'python')
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        contenido = (self.exportar_prometheus() if ruta.endswith('.prom')
+                     else json.dumps(self.exportar_json(), indent=2, ensure_ascii=False) + '\n')
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w') as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+        return ruta
+
+
+METRICAS = Metricas()
+etapa = METRICAS.etapa
+contar = METRICAS.contar
+fijar = METRICAS.fijar
+registrar = METRICAS.registrar
+os.register_at_fork(after_in_child=METRICAS.reiniciar)
+
+
+def _activar():
+    # Solo el proceso que activa la instrumentación exporta al salir: los
+    # procesos de los pools heredan el entorno pero no escriben nada
+    salida = os.environ.get('METRICAS_SALIDA')
+    ruta_perfil = os.environ.get('METRICAS_PERFIL')
+    memoria = os.environ.get('METRICAS_MEMORIA') == '1'
+    if not (salida or ruta_perfil or memoria):
+        return
+    if os.environ.setdefault('METRICAS_PID', str(os.getpid())) != str(os.getpid()):
+        return
+
+    perfil = None
+    if ruta_perfil:
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+    if memoria:
+        import tracemalloc
+        tracemalloc.start()
+
+    def al_salir():
+        if perfil is not None:
+            perfil.disable()
+            perfil.dump_stats(ruta_perfil)
+        if memoria:
+            import tracemalloc
+            fijar('memoria_pico_bytes', tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        if salida:
+            try:
+                METRICAS.guardar(salida)
+            except OSError as e:
+                print(f"⚠️ No se pudieron guardar las métricas en '{salida}': {e}", file=sys.stderr)
+
+    atexit.register(al_salir)
+
+
+_activar()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Matriz de compatibilidad entre todas las versiones de un subject: qué versión
+# de consumidor (lector) puede leer los datos de qué versión de productor
+# (escritor), para planificar despliegues.
+#
+# Las versiones se cargan una vez (del registry, del espejo o de un directorio
+# de .avsc) y cada par no ordenado de esquemas distintos se analiza una sola
+# vez en un pool de procesos: el mismo análisis da ambos sentidos. El resultado
+# de cada par se guarda en la caché en disco (SCHEMA_CACHE_DIR) con la huella
+# de ambos textos, así que al registrar una versión nueva solo se calculan sus
+# N pares con las anteriores.
+#
+#   python matriz.py --subject orders-value --formato csv --salida matriz.csv
+#   python matriz.py --directorio esquemas/orders/ --formato json
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+from itertools import combinations
+
+from cache_esquemas import clave_analisis, guardar_analisis, leer_analisis
+from huella import huella_texto
+from instrumentacion import contar, etapa
+
+FORMATOS = ('csv', 'json')
+
+
+def cargar_versiones(subject=None, url=None, directorio=None):
+    # {versión: texto}; en un directorio, la versión es el nombre del archivo sin extensión
+    if directorio:
+        versiones = {}
+        for ruta in sorted(glob.glob(os.path.join(directorio, '*.avsc'))):
+            nombre = os.path.splitext(os.path.basename(ruta))[0]
+            with open(ruta, 'r') as f:
+                versiones[int(nombre) if nombre.isdigit() else nombre] = f.read()
+        return versiones
+    from cliente_registry import obtener_cliente
+    return obtener_cliente(url).todas_las_versiones(subject)
+
+
+def comparar_par(tarea):
+    # Errores en ambos sentidos de un par (a, b): 'ab' = b lee datos escritos con a
+    from validate_compatibility import validar_par
+
+    clave, texto_a, texto_b = tarea
+    return clave, {'ab': validar_par(texto_a, texto_b, 'BACKWARD')[0],
+                   'ba': validar_par(texto_a, texto_b, 'FORWARD')[0]}
+
+
+def calcular_matriz(versiones, procesos=None):
+    # Devuelve (matriz {escritor: {lector: compatible}}, errores {(escritor, lector): [...]}, estadísticas)
+    huellas = {version: huella_texto(texto) for version, texto in versiones.items()}
+    textos = {huellas[version]: texto for version, texto in versiones.items()}
+
+    resultados, pendientes, tareas = {}, {}, []
+    for a, b in combinations(sorted(textos), 2):
+        clave = clave_analisis('matriz', textos[a], textos[b])
+        resultado = leer_analisis(clave)
+        if resultado is None:
+            pendientes[clave] = (a, b)
+            tareas.append((clave, textos[a], textos[b]))
+        else:
+            resultados[(a, b)] = resultado
+    contar('pares_matriz', len(resultados), origen='cache')
+    contar('pares_matriz', len(tareas), origen='calculado')
+
+    with etapa('matriz', pares=len(tareas)):
+        if procesos == 1 or len(tareas) < 2:
+            calculados = [comparar_par(tarea) for tarea in tareas]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                trozo = max(1, len(tareas) // ((procesos or os.cpu_count() or 1) * 4))
+                calculados = list(pool.map(comparar_par, tareas, chunksize=trozo))
+    for clave, resultado in calculados:
+        guardar_analisis(clave, resultado)
+        resultados[pendientes[clave]] = resultado
+
+    matriz, errores = {}, {}
+    for escritor in versiones:
+        matriz[escritor] = {}
+        for lector in versiones:
+            a, b = huellas[escritor], huellas[lector]
+            if a == b:
+                fallos = []
+            elif a < b:
+                fallos = resultados[(a, b)]['ab']
+            else:
+                fallos = resultados[(b, a)]['ba']
+            matriz[escritor][lector] = not fallos
+            if fallos:
+                errores[(escritor, lector)] = fallos
+    estadisticas = {'versiones': len(versiones), 'distintas': len(textos),
+                    'pares_cache': len(resultados) - len(calculados), 'pares_calculados': len(calculados)}
+    return matriz, errores, estadisticas
+
+
+def escribir_csv(matriz, salida):
+    # Filas = escritor (productor), columnas = lector (consumidor); 1 = compatible
+    versiones = list(matriz)
+    escritor = csv.writer(salida, lineterminator='\n')
+    escritor.writerow(['escritor\\lector'] + versiones)
+    for version in versiones:
+        escritor.writerow([version] + [int(matriz[version][lector]) for lector in versiones])
+
+
+def escribir_json(matriz, errores, salida, subject=None):
+    json.dump({
+        'subject': subject,
+        'versiones': list(matriz),
+        'matriz': {str(escritor): {str(lector): compatible for lector, compatible in fila.items()}
+                   for escritor, fila in matriz.items()},
+        'errores': [{'escritor': escritor, 'lector': lector, 'errores': fallos}
+                    for (escritor, lector), fallos in errores.items()],
+    }, salida, indent=2, ensure_ascii=False)
+    salida.write('\n')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matriz de compatibilidad lector × escritor de todas las versiones de un subject")
+    parser.add_argument('--subject', default=os.environ.get('SUBJECT_NAME', 'orders-value'),
+                        help="Subject del Schema Registry (por defecto, SUBJECT_NAME)")
+    parser.add_argument('--url', help="URL del Schema Registry (por defecto, SCHEMA_REGISTRY_URL)")
+    parser.add_argument('--directorio', help="Directorio con una versión por archivo (<versión>.avsc) en lugar del registry")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv')
+    parser.add_argument('--salida', help="Archivo de salida (por defecto, salida estándar)")
+    parser.add_argument('--procesos', type=int, help="Procesos para analizar los pares")
+    args = parser.parse_args()
+
+    try:
+        with etapa('carga', subject=args.subject):
+            versiones = cargar_versiones(args.subject, args.url, args.directorio)
+        if not versiones:
+            print(f"❌ No hay versiones de '{args.subject}'")
+            sys.exit(1)
+        matriz, errores, estadisticas = calcular_matriz(versiones, args.procesos)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    contenido = io.StringIO()
+    if args.formato == 'csv':
+        escribir_csv(matriz, contenido)
+    else:
+        escribir_json(matriz, errores, contenido, args.subject if not args.directorio else None)
+    if not args.salida:
+        sys.stdout.write(contenido.getvalue())
+        sys.exit(0)
+
+    with open(args.salida, 'w') as f:
+        f.write(contenido.getvalue())
+    incompatibles = len(errores)
+    print(f"📊 {estadisticas['versiones']} versiones ({estadisticas['distintas']} distintas): "
+          f"{estadisticas['pares_calculados']} pares calculados, {estadisticas['pares_cache']} desde la caché")
+    print(f"{'⚠️' if incompatibles else '✅'} {incompatibles} combinaciones escritor → lector incompatibles; "
+          f"matriz en {args.salida}")
+    sys.exit(0)
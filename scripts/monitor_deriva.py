@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# Monitor de deriva de esquemas para los health checks de productores y
+# consumidores, en lugar de consultar el registry en cada petición como
+# SchemaStatusController. Los controladores Java de producer y consumer aún no
+# lo usan: comparan la clase Order compilada en cada servicio, que el monitor
+# no conoce.
+#
+# Un hilo sondea cada `intervalo` segundos solo la lista de versiones de los
+# subjects vigilados (con If-None-Match cuando el registry envía ETag). La
+# última versión se descarga y se analiza solo cuando esa lista cambia: su
+# huella canónica se compara con la del esquema local y, si difieren, se
+# comprueba si el esquema local puede leer los datos escritos con la última
+# versión. Las consultas se responden desde memoria en tiempo constante:
+#
+#   GET /schema-status?subject=orders-value[&lectura=1]
+#       200 al día (o, con lectura=1, desactualizado pero capaz de leer la
+#       última versión), 417 desactualizado, 404 subject sin versiones,
+#       503 sin un sondeo reciente
+#   GET /salud
+#
+#   python monitor_deriva.py common/src/main/avro/Order.avsc --subject orders-value
+#   python monitor_deriva.py esquemas/ --una-vez
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from cliente_registry import ClienteRegistry, ErrorRegistry
+from huella import huella, huella_completa
+from indice_tipos import texto_autocontenido
+from instrumentacion import contar, etapa
+from servidor_validacion import ServidorValidacion
+from validar_lote import ESTRATEGIAS, MANIFIESTO_DIRECTORIO, cargar_manifiesto
+
+
+class EstadoSubject:
+    __slots__ = ('subject', 'version', 'schema_id', 'al_dia', 'compatible', 'errores', 'comprobado', 'error')
+
+    def __init__(self, subject, version=None, schema_id=None, al_dia=False, compatible=False, errores=(),
+                 comprobado=None, error=None):
+        self.subject = subject
+        self.version = version
+        self.schema_id = schema_id
+        self.al_dia = al_dia              # misma forma canónica que el esquema local
+        self.compatible = compatible      # el esquema local lee los datos de la última versión
+        self.errores = list(errores)
+        self.comprobado = comprobado      # instante del último sondeo correcto
+        self.error = error                # error del último sondeo, si falló
+
+    def como_dict(self):
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__}
+
+
+class MonitorDeriva:
+    def __init__(self, locales, url=None, intervalo=10):
+        # `locales`: {subject: texto del esquema que usa el servicio}
+        self.locales = {subject: (texto, huella(texto)) for subject, texto in locales.items()}
+        self.cliente = ClienteRegistry(url)
+        self.intervalo = intervalo
+        self.estados = {subject: EstadoSubject(subject) for subject in self.locales}
+        self.versiones = {}       # subject -> (lista de versiones, etag)
+        self.analisis = {}        # (huella_completa remota, huella_completa local) -> (compatible, errores)
+        self.parar = threading.Event()
+        self.hilo = None
+
+    # --- Sondeo ---
+
+    def _analizar(self, texto_remoto, texto_local):
+        # El esquema local como lector de los datos escritos con la versión remota.
+        # La clave conserva los defaults: con la forma canónica, dos esquemas
+        # locales que solo difieren en un default no válido compartirían veredicto.
+        from validate_compatibility import validar_par
+
+        clave = (huella_completa(texto_remoto), huella_completa(texto_local))
+        resultado = self.analisis.get(clave)
+        if resultado is None:
+            if clave[0] == clave[1]:
+                resultado = (True, [])
+            else:
+                errores, _ = validar_par(texto_remoto, texto_local, 'BACKWARD')
+                resultado = (not errores, errores)
+            self.analisis[clave] = resultado
+        return resultado
+
+    def sondear(self, subject):
+        texto_local, huella_local = self.locales[subject]
+        anteriores, etag = self.versiones.get(subject, (None, None))
+        try:
+            with etapa('sondeo', subject=subject):
+                versiones, etag = self.cliente.versiones_si_cambian(subject, etag)
+        except ErrorRegistry as e:
+            if e.status_code == 404:
+                self.versiones.pop(subject, None)
+                self.estados[subject] = EstadoSubject(subject, comprobado=time.time())
+            else:
+                self._fallo(subject, e)
+            return self.estados[subject]
+        except Exception as e:
+            self._fallo(subject, e)
+            return self.estados[subject]
+
+        estado = self.estados[subject]
+        if versiones is None or versiones == anteriores:
+            # Sin cambios: solo se renueva el instante del sondeo
+            contar('sondeos_sin_cambios', subject=subject)
+            estado.comprobado, estado.error = time.time(), None
+            self.versiones[subject] = (anteriores, etag)
+            return estado
+
+        contar('sondeos_con_cambios', subject=subject)
+        try:
+            # Las versiones son inmutables: la caché del cliente evita repetir descargas
+            metadatos = self.cliente.version(subject, max(versiones))
+            compatible, errores = self._analizar(metadatos['schema'], texto_local)
+        except Exception as e:
+            self._fallo(subject, e)
+            return self.estados[subject]
+        self.versiones[subject] = (versiones, etag)
+        self.estados[subject] = EstadoSubject(
+            subject, metadatos['version'], metadatos['id'], huella(metadatos['schema']) == huella_local,
+            compatible, errores, time.time())
+        return self.estados[subject]
+
+    def _fallo(self, subject, error):
+        # Se conserva el último estado conocido; `comprobado` envejece y la consulta lo detecta
+        contar('sondeos_fallidos', subject=subject)
+        self.estados[subject].error = str(error)
+
+    def sondear_todos(self):
+        return {subject: self.sondear(subject) for subject in self.locales}
+
+    def _bucle(self):
+        while not self.parar.is_set():
+            self.sondear_todos()
+            self.parar.wait(self.intervalo)
+
+    def iniciar(self):
+        self.hilo = threading.Thread(target=self._bucle, daemon=True)
+        self.hilo.start()
+        return self
+
+    def detener(self):
+        self.parar.set()
+        if self.hilo is not None:
+            self.hilo.join()
+        self.cliente.cerrar()
+
+    # --- Consulta ---
+
+    def consultar(self, subject, lectura=False):
+        # (código HTTP, cuerpo) a partir del último sondeo, sin tocar la red
+        estado = self.estados.get(subject)
+        if estado is None:
+            return 404, {'error': f"El subject '{subject}' no está vigilado"}
+        cuerpo = estado.como_dict()
+        if estado.comprobado is None or time.time() - estado.comprobado > 3 * self.intervalo:
+            return 503, cuerpo
+        if estado.version is None:
+            return 404, cuerpo
+        if estado.al_dia or (lectura and estado.compatible):
+            return 200, cuerpo
+        return 417, cuerpo
+
+
+class ServidorDeriva(ServidorValidacion):
+    # Mismo servidor HTTP que servidor_validacion con las rutas del monitor
+    def __init__(self, monitor):
+        super().__init__(concurrencia=1, max_resultados=1)
+        self.monitor = monitor
+
+    async def _despachar(self, metodo, ruta, datos):
+        partes = urlsplit(ruta)
+        parametros = parse_qs(partes.query)
+        if metodo == 'GET' and partes.path == '/salud':
+            return 200, {'estado': 'ok', 'subjects': len(self.monitor.estados), 'peticiones': self.monitor.cliente.peticiones}
+        if metodo == 'GET' and partes.path == '/schema-status':
+            subject = parametros.get('subject', [os.environ.get('SUBJECT_NAME', 'orders-value')])[0]
+            lectura = parametros.get('lectura', ['0'])[0] in ('1', 'true')
+            return self.monitor.consultar(subject, lectura)
+        return 404, {'error': f"Ruta no encontrada: {metodo} {ruta}"}
+
+
+async def servir(monitor, host, puerto):
+    servidor = await asyncio.start_server(ServidorDeriva(monitor).atender, host, puerto)
+    print(f"🚀 Monitor de deriva escuchando en http://{host}:{puerto} ({len(monitor.locales)} subjects, "
+          f"sondeo cada {monitor.intervalo}s)")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def cargar_locales(origen, subject, estrategia=None):
+    # Un .avsc con su subject, o un directorio/manifiesto como en validar_lote
+    if origen.endswith('.avsc'):
+        rutas = {origen: subject}
+    else:
+        rutas = cargar_manifiesto(origen, estrategia)
+    locales = {}
+    for ruta, subject_ruta in rutas.items():
+        with open(ruta, 'r') as f:
+            # Los tipos definidos en otros .avsc del directorio se resuelven con el índice
+            locales[subject_ruta] = texto_autocontenido(ruta, f.read())
+    return locales
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor de deriva entre los esquemas locales y el Schema Registry")
+    parser.add_argument('origen', help="Esquema .avsc, directorio con .avsc o manifiesto JSON {ruta: subject}")
+    parser.add_argument('--subject', default=os.environ.get('SUBJECT_NAME', 'orders-value'),
+                        help="Subject del esquema .avsc (por defecto, SUBJECT_NAME)")
+    parser.add_argument('--url', help="URL del Schema Registry (por defecto, SCHEMA_REGISTRY_URL)")
+    parser.add_argument('--estrategia', choices=sorted(ESTRATEGIAS),
+                        help=f"Subject de los .avsc de un directorio que no estén en su {MANIFIESTO_DIRECTORIO}")
+    parser.add_argument('--intervalo', type=float, default=10, help="Segundos entre sondeos")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8096)
+    parser.add_argument('--una-vez', action='store_true', help="Sondear una vez, mostrar el estado y salir")
+    args = parser.parse_args()
+
+    try:
+        monitor = MonitorDeriva(cargar_locales(args.origen, args.subject, args.estrategia), args.url, args.intervalo)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    if args.una_vez:
+        desactualizados = 0
+        for subject, estado in sorted(monitor.sondear_todos().items()):
+            if estado.error:
+                desactualizados += 1
+                print(f"❌ {subject}: {estado.error}")
+            elif estado.version is None:
+                print(f"⚠️ {subject}: sin versiones en el registry")
+            elif estado.al_dia:
+                print(f"✅ {subject}: al día con la versión {estado.version}")
+            else:
+                desactualizados += 1
+                lectura = "puede leer" if estado.compatible else "NO puede leer"
+                print(f"❌ {subject}: desactualizado respecto a la versión {estado.version} ({lectura} sus datos)")
+                for e in estado.errores:
+                    print(f"   - {e}")
+        monitor.cliente.cerrar()
+        sys.exit(1 if desactualizados else 0)
+
+    try:
+        monitor.iniciar()
+        asyncio.run(servir(monitor, args.host, args.puerto))
+    except KeyboardInterrupt:
+        monitor.detener()
+        sys.exit(0)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# Carga incremental de esquemas muy grandes (.avsc de decenas de MB o el
+# esquema en bruto del registry) sin tener a la vez el texto completo, el
+# árbol JSON y los objetos de avro.
+#
+# El texto se lee por bloques y solo se conserva el bloque en curso. Un
+# tokenizador recorre la estructura externa del record y decodifica cada campo
+# por separado (raw_decode de json, en C): los campos se entregan uno a uno a
+# make_avsc_object de avro, que crea su Field y descarta el JSON del campo antes
+# de leer el siguiente. Que avro recorra los campos una sola vez y en orden se
+# comprueba una vez por proceso; si una versión de avro deja de hacerlo, los
+# campos se leen enteros en una lista (más memoria, mismo resultado). Los
+# nombres, namespaces, tipos, símbolos y aliases se internan, así que los miles
+# de campos que repiten "string" o el mismo namespace comparten una única cadena.
+#
+# Hace falta que 'type' y 'name' (y 'namespace', si lo hay) vayan antes que
+# 'fields', como en los .avsc generados y en las respuestas del registry; si
+# no, se lanza EsquemaNoSecuencial y el llamador usa el parseo normal.
+#
+#   python parseo_flujo.py esquema_enorme.avsc
+#   python parseo_flujo.py registry:orders-value
+import codecs
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+
+TAMAÑO_BLOQUE = 1 << 20
+UMBRAL_FLUJO = 8 << 20          # a partir de este tamaño los scripts cargan en flujo
+ESPACIOS = re.compile(r'[ \t\n\r]*')
+DECODIFICADOR = json.JSONDecoder()
+SIN_RESOLVER = 'Could not make an Avro Schema object from'   # mensaje de avro para un tipo desconocido
+NOMBRES = frozenset(('name', 'namespace', 'type', 'aliases', 'symbols', 'logicalType', 'items', 'values'))
+
+
+class EsquemaNoSecuencial(ValueError):
+    pass
+
+
+class LectorFlujo:
+    # Buffer de texto que se rellena bajo demanda desde un iterable de bloques
+    # (str o bytes en UTF-8) y descarta lo ya consumido
+    __slots__ = ('bloques', 'texto', 'pos', 'agotado', 'decodificador')
+
+    def __init__(self, bloques):
+        self.bloques = iter(bloques)
+        self.texto = ''
+        self.pos = 0
+        self.agotado = False
+        self.decodificador = codecs.getincrementaldecoder('utf-8')()
+
+    def _rellenar(self):
+        bloque = next(self.bloques, None)
+        if bloque is None:
+            self.agotado = True
+            return False
+        if isinstance(bloque, bytes):
+            bloque = self.decodificador.decode(bloque)
+        self.texto = self.texto[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def caracter(self):
+        # Siguiente carácter significativo sin consumirlo ('' al final)
+        while True:
+            self.pos = ESPACIOS.match(self.texto, self.pos).end()
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self._rellenar():
+                return ''
+
+    def esperar(self, caracter):
+        encontrado = self.caracter()
+        if encontrado != caracter:
+            raise json.JSONDecodeError(f"Se esperaba '{caracter}' y hay '{encontrado}'", self.texto, self.pos)
+        self.pos += 1
+
+    def valor(self):
+        # Un valor JSON completo; si el bloque lo corta, se lee más y se reintenta
+        self.caracter()
+        while True:
+            try:
+                valor, fin = DECODIFICADOR.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if not self._rellenar():
+                    raise
+                continue
+            if fin == len(self.texto) and not isinstance(valor, (str, list, dict)) and self._rellenar():
+                continue    # un número o literal al final del bloque puede seguir en el siguiente
+            self.pos = fin
+            return valor
+
+
+def internar(valor, clave=None):
+    # Copia de `valor` con las claves y los nombres internados; los defaults no se tocan
+    if isinstance(valor, str):
+        return sys.intern(valor) if clave in NOMBRES else valor
+    if isinstance(valor, list):
+        return [internar(v, clave) for v in valor]
+    if isinstance(valor, dict):
+        return {sys.intern(k): v if k == 'default' else internar(v, k) for k, v in valor.items()}
+    return valor
+
+
+class _CamposEnFlujo(list):
+    # Lista vacía para el isinstance de RecordSchema que, al recorrerla, lee los campos del flujo
+    def __init__(self, campos):
+        super().__init__()
+        self.campos = campos
+
+    def __iter__(self):
+        return self.campos
+
+
+@lru_cache(maxsize=1)
+def flujo_soportado():
+    # Comprueba con un record mínimo que avro construye los campos recorriendo
+    # una sola vez la lista que recibe, que es de lo que depende _CamposEnFlujo
+    from avro.name import Names
+    from avro.schema import make_avsc_object
+
+    campos = [{'name': 'a', 'type': 'int'}, {'name': 'b', 'type': 'string'}]
+    try:
+        esquema = make_avsc_object({'type': 'record', 'name': 'Prueba', 'fields': _CamposEnFlujo(iter(campos))},
+                                   Names())
+    except Exception:
+        return False
+    return [campo.name for campo in esquema.fields] == ['a', 'b']
+
+
+def _campos(lector):
+    lector.esperar('[')
+    if lector.caracter() == ']':
+        lector.pos += 1
+        return
+    while True:
+        yield internar(lector.valor(), 'fields')
+        separador = lector.caracter()
+        lector.pos += 1
+        if separador == ']':
+            return
+        if separador != ',':
+            raise json.JSONDecodeError(f"Se esperaba ',' o ']' y hay '{separador}'", lector.texto, lector.pos - 1)
+
+
+def _record(lector, names):
+    from avro.schema import make_avsc_object
+
+    atributos = {}
+    esquema = None
+    lector.esperar('{')
+    while lector.caracter() != '}':
+        if atributos or esquema is not None:
+            lector.esperar(',')
+        clave = lector.valor()
+        if not isinstance(clave, str):
+            raise json.JSONDecodeError("Clave no válida", lector.texto, lector.pos)
+        clave = sys.intern(clave)
+        lector.esperar(':')
+
+        if clave == 'fields' and esquema is None:
+            tipo, nombre = atributos.get('type'), atributos.get('name')
+            if tipo in ('record', 'error') and isinstance(nombre, str):
+                # make_avsc_object registra el record en `names` antes de crear sus campos
+                campos = _CamposEnFlujo(_campos(lector)) if flujo_soportado() else list(_campos(lector))
+                esquema = make_avsc_object(dict(atributos, fields=campos), names)
+            else:
+                atributos['fields'] = list(_campos(lector))
+            continue
+
+        valor = internar(lector.valor(), clave)
+        if esquema is None:
+            atributos[clave] = valor
+        elif clave in ('type', 'name', 'namespace'):
+            raise EsquemaNoSecuencial(f"'{clave}' aparece después de 'fields'")
+        else:
+            esquema.set_prop(clave, valor)
+    lector.pos += 1
+    return esquema if esquema is not None else make_avsc_object(atributos, names)
+
+
+def parsear_flujo(bloques):
+    # Esquema de avro a partir de un iterable de bloques de texto
+    from avro.name import Names
+    from avro.schema import make_avsc_object
+
+    lector = LectorFlujo(bloques)
+    names = Names()
+    if lector.caracter() == '{':
+        esquema = _record(lector, names)
+    else:
+        esquema = make_avsc_object(internar(lector.valor(), 'type'), names)
+    if lector.caracter():
+        raise json.JSONDecodeError("Contenido adicional tras el esquema", lector.texto, lector.pos)
+    return esquema
+
+
+def cargar_flujo(ruta, tamaño_bloque=TAMAÑO_BLOQUE):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return parsear_flujo(iter(lambda: f.read(tamaño_bloque), ''))
+
+
+def es_grande(ruta):
+    return os.path.isfile(ruta) and os.path.getsize(ruta) >= UMBRAL_FLUJO
+
+
+def cargar_si_grande(ruta):
+    # El esquema cargado en flujo si `ruta` es un archivo grande; None para usar
+    # el parseo normal, también si el flujo no basta: 'namespace' tras 'fields'
+    # o tipos definidos en otros .avsc, que el parseo normal resuelve con el índice
+    if not es_grande(ruta):
+        return None
+    from avro.errors import SchemaParseException
+    try:
+        return cargar_flujo(ruta)
+    except EsquemaNoSecuencial:
+        return None
+    except SchemaParseException as e:
+        if SIN_RESOLVER in str(e):
+            return None
+        raise ValueError(f"Error al parsear '{ruta}': {e}")
+    except ValueError as e:
+        raise ValueError(f"Error al parsear '{ruta}': {e}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python parseo_flujo.py <esquema.avsc | registry:<subject>[:<versión>]>")
+        sys.exit(1)
+
+    import time
+    import tracemalloc
+
+    from cliente_registry import PREFIJO_REFERENCIA, ClienteRegistry
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        if sys.argv[1].startswith(PREFIJO_REFERENCIA):
+            subject, _, version = sys.argv[1][len(PREFIJO_REFERENCIA):].partition(':')
+            esquema = ClienteRegistry().esquema_en_flujo(subject, version or 'latest')
+        else:
+            esquema = cargar_flujo(sys.argv[1])
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    campos = len(esquema.fields) if esquema.type in ('record', 'error') else 0
+    print(f"✅ {esquema.type} {getattr(esquema, 'fullname', '')}: {campos} campos en {segundos:.2f} s, "
+          f"pico de memoria {pico / (1 << 20):.1f} MB")
+    sys.exit(0)
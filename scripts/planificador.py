@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# Planificador de migraciones: cuando un cambio no se puede registrar de una
+# vez, busca la secuencia más corta de versiones intermedias registrables que
+# lleva del esquema actual al objetivo con la compatibilidad del subject (por
+# ejemplo: añadir un default a un campo y, en la versión siguiente, eliminarlo).
+#
+# La compatibilidad de un record es la conjunción de la de sus campos, así que
+# la búsqueda se hace campo a campo: cada campo pasa por unas pocas formas
+# (ausente, la actual o la objetivo, con o sin un default sintético) y una BFS
+# encuentra su camino más corto; el plan tiene tantas versiones como el camino
+# más largo y cada campo avanza en las primeras. Los campos con la misma firma
+# en ambos esquemas se descartan antes de buscar (una sola fusión por
+# columnas) y cada par de tipos se resuelve una única vez, memorizado por firma.
+# Por último cada versión del plan se valida completa contra la anterior (o
+# contra todas las anteriores en los modos *_TRANSITIVE).
+#
+#   python planificador.py new_schema.avsc --actual old_schema.avsc --compatibilidad FULL --salida plan/
+#   python planificador.py new_schema.avsc --subject orders-value
+import argparse
+import json
+import os
+import sys
+from collections import deque
+
+from cliente_registry import obtener_cliente
+from columnar import fusionar_esquemas
+from diferencias import firma_tipo
+from resolucion import es_compatible, resolver
+from validate_compatibility import leer_texto, parsear_texto, validar_par, validar_transitivo
+
+ACTUAL, OBJETIVO = 0, 1
+ESCRITOR_LEE = {
+    # Sentidos que exige cada modo: (escritor, lector) entre versión previa y siguiente
+    'BACKWARD': (('previa', 'siguiente'),),
+    'FORWARD': (('siguiente', 'previa'),),
+    'FULL': (('previa', 'siguiente'), ('siguiente', 'previa')),
+    'NONE': (),
+}
+
+
+def default_sintetico(tipo):
+    # Un valor por defecto válido para `tipo`, o None si no se puede construir
+    # (las uniones solo admiten defaults de su primera rama)
+    sin_valor = object()
+
+    def construir(t, visitados):
+        if t.type == 'union':
+            return construir(t.schemas[0], visitados)
+        if t.type == 'null':
+            return None
+        if t.type in ('record', 'error'):
+            if t.fullname in visitados:
+                return sin_valor
+            valor = {}
+            for campo in t.fields:
+                if campo.has_default:
+                    valor[campo.name] = campo.default
+                    continue
+                valor[campo.name] = construir(campo.type, visitados | {t.fullname})
+                if valor[campo.name] is sin_valor:
+                    return sin_valor
+            return valor
+        if t.type == 'enum':
+            return t.props.get('default', t.symbols[0])
+        if t.type == 'fixed':
+            return '\u0000' * t.size
+        return {'boolean': False, 'int': 0, 'long': 0, 'float': 0.0, 'double': 0.0,
+                'bytes': '', 'string': '', 'array': [], 'map': {}}.get(t.type, sin_valor)
+
+    valor = construir(tipo, frozenset())
+    return (False, None) if valor is sin_valor else (True, valor)
+
+
+class PlanCampo:
+    __slots__ = ('nombre', 'campos', 'formas', 'inicio', 'fin', 'camino')
+
+    def __init__(self, nombre, campo_actual, campo_objetivo):
+        # Forma: None (ausente) o (origen, con_default); el tipo es el del origen
+        self.nombre = nombre
+        self.campos = (campo_actual, campo_objetivo)
+        self.formas = [None]
+        for origen, campo in enumerate(self.campos):
+            if campo is None:
+                continue
+            self.formas.append((origen, campo.has_default))
+            if not campo.has_default and default_sintetico(campo.type)[0]:
+                self.formas.append((origen, True))
+        self.inicio = None if campo_actual is None else (ACTUAL, campo_actual.has_default)
+        self.fin = None if campo_objetivo is None else (OBJETIVO, campo_objetivo.has_default)
+        self.camino = None
+
+
+class Planificador:
+    def __init__(self, texto_actual, texto_objetivo, compatibilidad, historial=()):
+        # `historial`: versiones registradas anteriores a la actual, para la
+        # verificación de los modos *_TRANSITIVE
+        self.historial = list(historial)
+        self.textos = (texto_actual, texto_objetivo)
+        self.esquemas = (parsear_texto(texto_actual), parsear_texto(texto_objetivo))
+        self.compatibilidad = compatibilidad
+        self.transitivo = compatibilidad.endswith('_TRANSITIVE')
+        self.sentidos = ESCRITOR_LEE.get(compatibilidad.replace('_TRANSITIVE', ''), ())
+        self.firmas = {}
+        self.resueltos = {}   # (firma escritor, firma lector) -> compatible
+        self.evaluados = 0
+
+    # --- Compatibilidad de un campo entre dos formas ---
+
+    def _tipos_compatibles(self, escritor, lector):
+        clave = (firma_tipo(escritor, self.firmas), firma_tipo(lector, self.firmas))
+        if clave[0] == clave[1]:
+            return True
+        compatible = self.resueltos.get(clave)
+        if compatible is None:
+            self.evaluados += 1
+            compatible = self.resueltos[clave] = es_compatible(resolver(escritor, lector))
+        return compatible
+
+    def _lee(self, plan, escritor, lector):
+        if lector is None:
+            return True                              # el lector ignora el campo
+        if escritor is None:
+            return lector[1]                         # el lector necesita un default
+        return self._tipos_compatibles(plan.campos[escritor[0]].type, plan.campos[lector[0]].type)
+
+    def _paso_valido(self, plan, previa, siguiente):
+        formas = {'previa': previa, 'siguiente': siguiente}
+        return all(self._lee(plan, formas[e], formas[l]) for e, l in self.sentidos)
+
+    def camino_campo(self, plan):
+        # BFS sobre las formas del campo; en modo transitivo el estado es el
+        # camino completo, porque cada forma nueva debe ser compatible con todas
+        inicio = (plan.inicio,)
+        visitados = {inicio if self.transitivo else plan.inicio}
+        cola = deque([inicio])
+        while cola:
+            camino = cola.popleft()
+            if camino[-1] == plan.fin:
+                return list(camino[1:])
+            for forma in plan.formas:
+                if forma in camino:
+                    continue
+                previas = camino if self.transitivo else camino[-1:]
+                if not all(self._paso_valido(plan, previa, forma) for previa in previas):
+                    continue
+                siguiente = camino + (forma,)
+                clave = siguiente if self.transitivo else forma
+                if clave not in visitados:
+                    visitados.add(clave)
+                    cola.append(siguiente)
+        return None
+
+    # --- Plan completo ---
+
+    def planificar(self):
+        actual, objetivo = self.esquemas
+        if actual.type not in ('record', 'error') or objetivo.type not in ('record', 'error'):
+            return self._directo()
+
+        # Solo entran en la búsqueda los campos cuya firma (tipo, default,
+        # orden, doc y aliases) cambia
+        fusion = fusionar_esquemas(actual, objetivo, self.firmas)
+        planes = [PlanCampo(objetivo.fields[p].name, None, objetivo.fields[p]) for p in fusion.añadidos]
+        planes += [PlanCampo(actual.fields[p].name, actual.fields[p], None) for p in fusion.eliminados]
+        planes += [PlanCampo(actual.fields[a].name, actual.fields[a], objetivo.fields[n]) for a, n in fusion.campo_distinto]
+
+        imposibles = []
+        for plan in planes:
+            plan.camino = self.camino_campo(plan)
+            if plan.camino is None:
+                imposibles.append(plan.nombre)
+        if imposibles:
+            return {'posible': False, 'imposibles': sorted(imposibles), 'pasos': []}
+
+        longitud = max((len(plan.camino) for plan in planes), default=0)
+        if longitud <= 1:
+            return self._directo()
+
+        pasos = []
+        for indice in range(longitud):
+            acciones = []
+            for plan in planes:
+                if indice < len(plan.camino):
+                    anterior = plan.inicio if indice == 0 else plan.camino[indice - 1]
+                    acciones.append(_describir(plan, anterior, plan.camino[indice]))
+            estado = {plan.nombre: plan.camino[min(indice, len(plan.camino) - 1)] for plan in planes}
+            texto = self.textos[OBJETIVO] if indice == longitud - 1 else self._construir(planes, estado)
+            pasos.append({'acciones': acciones, 'esquema': texto})
+        return self._verificar({'posible': True, 'imposibles': [], 'pasos': pasos})
+
+    def _directo(self):
+        return self._verificar({'posible': True, 'imposibles': [],
+                                'pasos': [{'acciones': ['registrar el esquema objetivo'], 'esquema': self.textos[OBJETIVO]}]})
+
+    def _construir(self, planes, estado):
+        # Versión intermedia: el JSON del esquema actual con cada campo que se
+        # planifica en su forma del paso (los campos nuevos, al final)
+        base = json.loads(self.textos[ACTUAL])
+        originales = [{campo['name']: campo for campo in json.loads(texto)['fields']} for texto in self.textos]
+        por_nombre = {plan.nombre: plan for plan in planes}
+
+        def forma_json(nombre):
+            forma = estado[nombre]
+            if forma is None:
+                return None
+            origen, con_default = forma
+            campo = dict(originales[origen][nombre])
+            if con_default and 'default' not in campo:
+                campo['default'] = default_sintetico(por_nombre[nombre].campos[origen].type)[1]
+            return campo
+
+        campos = []
+        for campo in base['fields']:
+            if campo['name'] in por_nombre:
+                campo = forma_json(campo['name'])
+            if campo is not None:
+                campos.append(campo)
+        actuales = {campo['name'] for campo in base['fields']}
+        for campo in json.loads(self.textos[OBJETIVO])['fields']:
+            if campo['name'] not in actuales and campo['name'] in por_nombre:
+                nuevo = forma_json(campo['name'])
+                if nuevo is not None:
+                    campos.append(nuevo)
+        base['fields'] = campos
+        return json.dumps(base, indent=2, ensure_ascii=False)
+
+    def _verificar(self, resultado):
+        # Cada versión completa con el motor de validación: cubre también
+        # metadatos y tipos con nombre, que la búsqueda por campos no mira
+        previos = self.historial + [self.textos[ACTUAL]]
+        base = self.compatibilidad.replace('_TRANSITIVE', '')
+        for paso in resultado['pasos']:
+            if self.transitivo:
+                resultados, _ = validar_transitivo(paso['esquema'], dict(enumerate(previos)), self.compatibilidad, procesos=1)
+                errores = [e for _, errs, _ in resultados for e in errs]
+            else:
+                errores, _ = validar_par(previos[-1], paso['esquema'], base)
+            paso['errores'] = errores
+            if errores:
+                resultado['posible'] = False
+            previos.append(paso['esquema'])
+        return resultado
+
+
+def _describir(plan, anterior, siguiente):
+    nombre = plan.nombre
+    if siguiente is None:
+        return f"eliminar '{nombre}'"
+    origen, con_default = siguiente
+    sintetico = con_default and not plan.campos[origen].has_default
+    if anterior is None:
+        return f"añadir '{nombre}'" + (" con un default provisional" if sintetico else "")
+    if anterior[0] != origen:
+        return f"cambiar '{nombre}' a su definición final" + (" con un default provisional" if sintetico else "")
+    if con_default and not anterior[1]:
+        return f"añadir un default provisional a '{nombre}'"
+    return f"quitar el default provisional de '{nombre}'"
+
+
+def planificar(texto_actual, texto_objetivo, compatibilidad, historial=()):
+    return Planificador(texto_actual, texto_objetivo, compatibilidad, historial).planificar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Secuencia mínima de versiones registrables hasta un esquema objetivo")
+    parser.add_argument('objetivo', help="Esquema objetivo (.avsc o registry:<subject>[:<versión>])")
+    parser.add_argument('--actual', help="Esquema de partida (por defecto, la última versión del subject)")
+    parser.add_argument('--subject', default=os.environ.get('SUBJECT_NAME', 'orders-value'))
+    parser.add_argument('--compatibilidad', help="Modo de compatibilidad (por defecto, el del subject)")
+    parser.add_argument('--salida', help="Directorio en el que escribir paso-NN.avsc")
+    args = parser.parse_args()
+
+    try:
+        texto_objetivo = leer_texto(args.objetivo)
+        texto_actual = leer_texto(args.actual or f"registry:{args.subject}")
+        compatibilidad = args.compatibilidad
+        historial = []
+        if compatibilidad is None or not args.actual:
+            cliente = obtener_cliente()
+            compatibilidad = compatibilidad or cliente.compatibilidad(args.subject)
+            if not args.actual and compatibilidad.endswith('_TRANSITIVE'):
+                # La versión actual es la última: el resto forma el historial
+                versiones = cliente.todas_las_versiones(args.subject)
+                historial = [versiones[v] for v in sorted(versiones)][:-1]
+        print(f"🔍 Modo de compatibilidad: {compatibilidad}")
+        resultado = planificar(texto_actual, texto_objetivo, compatibilidad, historial)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    if resultado['imposibles']:
+        print(f"❌ No hay ninguna secuencia de versiones compatible para: {resultado['imposibles']}")
+        sys.exit(1)
+
+    print(f"📊 Plan de {len(resultado['pasos'])} versión(es):")
+    for numero, paso in enumerate(resultado['pasos'], 1):
+        print(f"\n{numero}. " + "; ".join(paso['acciones']))
+        for e in paso['errores']:
+            print(f"   ❌ {e}")
+        if args.salida:
+            os.makedirs(args.salida, exist_ok=True)
+            with open(os.path.join(args.salida, f"paso-{numero:02d}.avsc"), 'w') as f:
+                f.write(paso['esquema'])
+
+    if not resultado['posible']:
+        print("\n❌ Alguna versión del plan no supera la validación completa")
+        sys.exit(1)
+    print("\n✅ Cada versión del plan es compatible con la anterior")
+    sys.exit(0)
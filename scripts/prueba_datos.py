@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# Prueba de compatibilidad con datos: en lugar de razonar sobre las listas de
+# campos, codifica registros de muestra con el esquema escritor y los decodifica
+# con el esquema lector, comparando cada valor leído con el original.
+#
+#   BACKWARD: escribe el esquema anterior, lee el nuevo
+#   FORWARD:  escribe el esquema nuevo, lee el anterior
+#   FULL:     ambos sentidos
+#
+# Los registros se generan de forma aleatoria (reproducible con --semilla) o se
+# cargan de un archivo JSONL o de un contenedor .avro. Cada bloque se codifica
+# en un único buffer y se decodifica sin copias sobre un memoryview, repartiendo
+# los bloques entre varios procesos.
+#
+# La lectura usa la resolución de avro para Python, más estricta que la
+# especificación en algunos casos (aliases de campos, string ↔ bytes,
+# promociones dentro de arrays y maps): esos casos aparecen como fallos.
+#
+#   python prueba_datos.py old_schema.avsc new_schema.avsc --registros 1000000
+import argparse
+import datetime
+import decimal
+import io
+import json
+import os
+import random
+import string
+import struct
+import sys
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import avro.errors
+from avro.io import BinaryEncoder, DatumReader, DatumWriter, validate
+
+from codec import DecodificadorMemoria
+from validate_compatibility import leer_texto, obtener_compatibilidad, parsear_texto
+
+TAMAÑO_BLOQUE = 50_000
+MAX_MOTIVOS = 50
+PROFUNDIDAD_MAXIMA = 4
+
+FLOAT = struct.Struct('<f')
+DOUBLE = struct.Struct('<d')
+CARACTERES = string.ascii_letters + string.digits + ' ñáéíóú€'
+
+
+# --- Generación de registros ---
+#
+# Cada esquema se compila una vez en una función generadora (rnd, profundidad)
+# para no despachar por tipo en cada valor de cada registro.
+
+def compilar_generador(esquema, memo=None, primitivos=None):
+    # `primitivos` sustituye a GENERADORES_PRIMITIVOS (por ejemplo, bytes que sean UTF-8 válido)
+    if memo is None:
+        memo = {}
+    if primitivos is None:
+        primitivos = GENERADORES_PRIMITIVOS
+    clave = id(esquema)
+    if clave in memo:
+        return memo[clave]
+
+    tipo = esquema.type
+    logico = esquema.props.get('logicalType')
+
+    if tipo in ('record', 'error'):
+        # Se registra antes de compilar los campos para soportar tipos recursivos
+        campos = []
+
+        def generar(rnd, profundidad):
+            return {nombre: g(rnd, profundidad + 1) for nombre, g in campos}
+        memo[clave] = generar
+        campos.extend((campo.name, compilar_generador(campo.type, memo, primitivos)) for campo in esquema.fields)
+        return generar
+
+    if tipo == 'enum':
+        simbolos = list(esquema.symbols)
+        generar = lambda rnd, profundidad: rnd.choice(simbolos)
+    elif tipo == 'union':
+        ramas = [compilar_generador(rama, memo, primitivos) for rama in esquema.schemas]
+        tiene_null = any(rama.type == 'null' for rama in esquema.schemas)
+
+        def generar(rnd, profundidad):
+            # Pasado el límite de profundidad se elige 'null' para cortar la recursión
+            if tiene_null and profundidad >= PROFUNDIDAD_MAXIMA:
+                return None
+            return rnd.choice(ramas)(rnd, profundidad)
+    elif tipo == 'array':
+        elementos = compilar_generador(esquema.items, memo, primitivos)
+
+        def generar(rnd, profundidad):
+            n = 0 if profundidad >= PROFUNDIDAD_MAXIMA else rnd.getrandbits(2)
+            return [elementos(rnd, profundidad + 1) for _ in range(n)]
+    elif tipo == 'map':
+        valores = compilar_generador(esquema.values, memo, primitivos)
+
+        def generar(rnd, profundidad):
+            n = 0 if profundidad >= PROFUNDIDAD_MAXIMA else rnd.getrandbits(2)
+            return {rnd.choice(CADENAS): valores(rnd, profundidad + 1) for _ in range(n)}
+    elif logico == 'decimal' and tipo in ('bytes', 'fixed'):
+        generar = _generador_decimal(esquema, esquema.size if tipo == 'fixed' else 8)
+    elif tipo == 'fixed':
+        tamaño = esquema.size
+        generar = lambda rnd, profundidad: rnd.randbytes(tamaño)
+    else:
+        generar = GENERADORES_LOGICOS.get((tipo, logico)) or primitivos.get(tipo)
+        if generar is None:
+            raise ValueError(f"Tipo no soportado para generar datos: {tipo}")
+
+    memo[clave] = generar
+    return generar
+
+
+def _cadenas(cantidad, semilla=0):
+    # Reserva fija de cadenas (con caracteres multibyte) de la que se eligen los valores
+    rnd = random.Random(semilla)
+    return [''.join(rnd.choices(CARACTERES, k=rnd.randint(0, 16))) for _ in range(cantidad)]
+
+
+CADENAS = _cadenas(4096)
+EPOCA = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _entero(bits):
+    # Mitad valores pequeños, mitad cualquier valor del rango con signo
+    desplazamiento = 1 << (bits - 1)
+    return lambda rnd, profundidad: (rnd.getrandbits(8) - 128 if rnd.getrandbits(1)
+                                     else rnd.getrandbits(bits) - desplazamiento)
+
+
+def _float32(rnd, profundidad):
+    # Se redondea a 32 bits para que el original sea representable
+    return FLOAT.unpack(FLOAT.pack(rnd.uniform(-1e6, 1e6)))[0]
+
+
+def _timestamp(escala):
+    return lambda rnd, profundidad: EPOCA + datetime.timedelta(microseconds=rnd.getrandbits(41) * escala)
+
+
+def _hora(escala):
+    return lambda rnd, profundidad: datetime.time(
+        rnd.randrange(24), rnd.randrange(60), rnd.randrange(60), rnd.randrange(1_000_000 // escala) * escala)
+
+
+GENERADORES_PRIMITIVOS = {
+    'null': lambda rnd, profundidad: None,
+    'boolean': lambda rnd, profundidad: bool(rnd.getrandbits(1)),
+    'int': _entero(32),
+    'long': _entero(64),
+    'float': _float32,
+    'double': lambda rnd, profundidad: rnd.uniform(-1e12, 1e12),
+    'bytes': lambda rnd, profundidad: rnd.randbytes(rnd.getrandbits(4)),
+    'string': lambda rnd, profundidad: rnd.choice(CADENAS),
+}
+
+GENERADORES_LOGICOS = {
+    ('int', 'date'): lambda rnd, profundidad: datetime.date(1970, 1, 1) + datetime.timedelta(days=rnd.randrange(40_000)),
+    ('int', 'time-millis'): _hora(1000),
+    ('long', 'time-micros'): _hora(1),
+    ('long', 'timestamp-millis'): _timestamp(1000),
+    ('long', 'timestamp-micros'): _timestamp(1),
+    ('string', 'uuid'): lambda rnd, profundidad: str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+}
+
+
+def _generador_decimal(esquema, tamaño):
+    precision = esquema.props.get('precision', 9)
+    escala = esquema.props.get('scale', 0)
+    limite = min(10 ** precision - 1, 2 ** (8 * tamaño - 1) - 1)
+    return lambda rnd, profundidad: decimal.Decimal(rnd.randint(-limite, limite)).scaleb(-escala)
+
+
+def generar_registros(esquema, cantidad, semilla):
+    rnd = random.Random(semilla)
+    generar = compilar_generador(esquema)
+    return [generar(rnd, 0) for _ in range(cantidad)]
+
+
+def cargar_muestras(ruta):
+    # JSONL (un registro JSON por línea) o contenedor Avro (.avro)
+    if ruta.endswith('.avro'):
+        from avro.datafile import DataFileReader
+        with open(ruta, 'rb') as f, DataFileReader(f, DatumReader()) as lector:
+            return list(lector)
+    with open(ruta, 'r') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+# --- Codificación y decodificación por bloques ---
+
+def codificar_bloque(esquema, registros, validar=False):
+    # Todos los registros del bloque en un único buffer; desplazamientos[i] es
+    # el inicio del registro i y el último elemento, el final del buffer.
+    salida = io.BytesIO()
+    codificador = BinaryEncoder(salida)
+    escritor = DatumWriter(esquema)
+    desplazamientos = array('Q', [0])
+    for registro in registros:
+        if validar:
+            escritor.write(registro, codificador)
+        else:
+            escritor.write_data(esquema, registro, codificador)
+        desplazamientos.append(salida.tell())
+    return salida, desplazamientos
+
+
+def _rama(union, valor):
+    # Misma elección que hace el escritor de avro: la primera rama válida
+    for rama in union.schemas:
+        if validate(rama, valor):
+            return rama
+    return None
+
+
+def _campo_escritor(campo_lector, campos_escritor):
+    campo = campos_escritor.get(campo_lector.name)
+    if campo is None:
+        for alias in campo_lector.props.get('aliases') or ():
+            campo = campos_escritor.get(alias)
+            if campo is not None:
+                break
+    return campo
+
+
+def compilar_comparador(escritor, lector, memo=None):
+    # Función (original, leído, ruta, diferencias) que compara el valor escrito
+    # con el leído tras la resolución de esquemas. None significa que basta con
+    # la igualdad (mismo tipo primitivo, enums, promociones numéricas...).
+    # Los campos que solo existen en el lector toman su default y no se comparan.
+    if memo is None:
+        memo = {}
+    clave = (id(escritor), id(lector))
+    if clave in memo:
+        return memo[clave]
+
+    if escritor.type == 'union':
+        ramas = [(rama, compilar_comparador(rama, lector, memo)) for rama in escritor.schemas]
+
+        def comparar(original, leido, ruta, diferencias):
+            rama = _rama(escritor, original)
+            for candidata, comparador in ramas:
+                if candidata is rama:
+                    _comparar(comparador, original, leido, ruta, diferencias)
+                    return
+            diferencias.append((ruta, original, leido))
+        memo[clave] = comparar
+        return comparar
+
+    if lector.type == 'union':
+        destino = next((rama for rama in lector.schemas if rama.match(escritor)), None)
+        comparar = compilar_comparador(escritor, destino, memo) if destino is not None else None
+        memo[clave] = comparar
+        return comparar
+
+    tipo = escritor.type
+    if tipo in ('record', 'error'):
+        pares = []
+
+        def comparar(original, leido, ruta, diferencias):
+            if not isinstance(leido, dict):
+                diferencias.append((ruta, original, leido))
+                return
+            for nombre_escritor, nombre_lector, comparador in pares:
+                a, b = original[nombre_escritor], leido[nombre_lector]
+                if comparador is None:
+                    if a != b:
+                        diferencias.append((f"{ruta}.{nombre_lector}" if ruta else nombre_lector, a, b))
+                else:
+                    comparador(a, b, f"{ruta}.{nombre_lector}" if ruta else nombre_lector, diferencias)
+        memo[clave] = comparar
+
+        if lector.type in ('record', 'error'):
+            campos_escritor = escritor.fields_dict
+            for campo in lector.fields:
+                origen = _campo_escritor(campo, campos_escritor)
+                if origen is not None:
+                    pares.append((origen.name, campo.name, compilar_comparador(origen.type, campo.type, memo)))
+        return comparar
+
+    if tipo in ('array', 'map') and lector.type == tipo:
+        es_array = tipo == 'array'
+        interior = (compilar_comparador(escritor.items, lector.items, memo) if es_array
+                    else compilar_comparador(escritor.values, lector.values, memo))
+
+        def comparar(original, leido, ruta, diferencias):
+            if es_array:
+                if not isinstance(leido, list) or len(original) != len(leido):
+                    diferencias.append((ruta, original, leido))
+                    return
+                elementos = ((f"{ruta}[]", a, b) for a, b in zip(original, leido))
+            else:
+                if not isinstance(leido, dict) or original.keys() != leido.keys():
+                    diferencias.append((ruta, original, leido))
+                    return
+                elementos = ((f"{ruta}{{}}", v, leido[k]) for k, v in original.items())
+            for ruta_elemento, a, b in elementos:
+                _comparar(interior, a, b, ruta_elemento, diferencias)
+        memo[clave] = comparar
+        return comparar
+
+    if tipo == 'float':
+        def comparar(original, leido, ruta, diferencias):
+            # Las muestras cargadas pueden traer floats de 64 bits
+            if FLOAT.unpack(FLOAT.pack(original))[0] != leido:
+                diferencias.append((ruta, original, leido))
+    elif tipo in ('int', 'long') and lector.type in ('float', 'double'):
+        # avro para Python devuelve el entero sin convertir; un lector Java lo
+        # recibe como float/double y puede perder precisión
+        convertir = (lambda v: FLOAT.unpack(FLOAT.pack(v))[0]) if lector.type == 'float' else float
+
+        def comparar(original, leido, ruta, diferencias):
+            convertido = convertir(original)
+            if convertido != original:
+                diferencias.append((ruta, original, convertido))
+    elif tipo == 'string' and lector.type == 'bytes':
+        def comparar(original, leido, ruta, diferencias):
+            if original.encode('utf-8') != leido:
+                diferencias.append((ruta, original, leido))
+    elif tipo == 'bytes' and lector.type == 'string':
+        def comparar(original, leido, ruta, diferencias):
+            if original != leido.encode('utf-8'):
+                diferencias.append((ruta, original, leido))
+    else:
+        # Igualdad: incluye símbolos de enum sustituidos por el default del lector
+        comparar = None
+    memo[clave] = comparar
+    return comparar
+
+
+def _comparar(comparador, original, leido, ruta, diferencias):
+    if comparador is None:
+        if original != leido:
+            diferencias.append((ruta, original, leido))
+    else:
+        comparador(original, leido, ruta, diferencias)
+
+
+def _anotar(motivos, tipo, motivo, indice, ejemplo):
+    # Los registros se agrupan por motivo (mensaje de error o ruta cambiada) y
+    # de cada uno se conserva el primer ejemplo
+    entrada = motivos.get((tipo, motivo))
+    if entrada is None:
+        if len(motivos) >= MAX_MOTIVOS:
+            return
+        entrada = motivos[(tipo, motivo)] = {'tipo': tipo, 'motivo': motivo, 'registros': 0,
+                                             'indice': indice, 'ejemplo': ejemplo}
+    entrada['registros'] += 1
+
+
+def decodificar_bloque(buffer, desplazamientos, registros, escritor, lector):
+    # Devuelve (fallos, cambios, motivos); `registros` son los originales
+    decodificador = DecodificadorMemoria(buffer)
+    lector_datos = DatumReader(escritor, lector)
+    comparador = compilar_comparador(escritor, lector)
+    fallos = cambios = 0
+    motivos = {}
+    for i, original in enumerate(registros):
+        decodificador.pos = desplazamientos[i]
+        try:
+            leido = lector_datos.read(decodificador)
+            if decodificador.pos != desplazamientos[i + 1]:
+                raise avro.errors.InvalidAvroBinaryEncoding(
+                    f"se consumieron {decodificador.pos - desplazamientos[i]} bytes de {desplazamientos[i + 1] - desplazamientos[i]}")
+        except Exception as e:
+            fallos += 1
+            _anotar(motivos, 'fallo', f"{type(e).__name__}: {str(e).splitlines()[0]}", i, None)
+            continue
+
+        diferencias = []
+        _comparar(comparador, original, leido, '', diferencias)
+        if diferencias:
+            cambios += 1
+            for ruta, anterior, nuevo in diferencias:
+                _anotar(motivos, 'cambio', ruta, i, {'original': anterior, 'leido': nuevo})
+    decodificador.vista.release()
+    return fallos, cambios, motivos
+
+
+def probar_bloque(tarea):
+    texto_escritor, texto_lector, inicio, cantidad, semilla, muestras = tarea
+    escritor = parsear_texto(texto_escritor)
+    lector = parsear_texto(texto_lector)
+
+    if muestras is None:
+        registros = generar_registros(escritor, cantidad, semilla + inicio)
+    else:
+        registros = muestras
+
+    salida, desplazamientos = codificar_bloque(escritor, registros, validar=muestras is not None)
+    fallos, cambios, motivos = decodificar_bloque(salida.getbuffer(), desplazamientos, registros, escritor, lector)
+    for entrada in motivos.values():
+        entrada['indice'] += inicio
+    return {'registros': len(registros), 'bytes': desplazamientos[-1],
+            'fallos': fallos, 'cambios': cambios, 'motivos': list(motivos.values())}
+
+
+def probar_sentido(texto_escritor, texto_lector, registros, semilla=0, muestras=None, procesos=None):
+    if muestras is not None:
+        tareas = [(texto_escritor, texto_lector, i, None, semilla, muestras[i:i + TAMAÑO_BLOQUE])
+                  for i in range(0, len(muestras), TAMAÑO_BLOQUE)]
+    else:
+        tareas = [(texto_escritor, texto_lector, i, min(TAMAÑO_BLOQUE, registros - i), semilla, None)
+                  for i in range(0, registros, TAMAÑO_BLOQUE)]
+
+    if procesos == 1 or len(tareas) <= 1:
+        resultados = [probar_bloque(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos or os.cpu_count() or 1, len(tareas))) as ejecutor:
+            resultados = list(ejecutor.map(probar_bloque, tareas))
+
+    total = {'registros': 0, 'bytes': 0, 'fallos': 0, 'cambios': 0}
+    motivos = {}
+    for resultado in resultados:
+        for clave in total:
+            total[clave] += resultado[clave]
+        # Los bloques llegan en orden: el primer ejemplo de cada motivo se mantiene
+        for entrada in resultado['motivos']:
+            clave = (entrada['tipo'], entrada['motivo'])
+            if clave in motivos:
+                motivos[clave]['registros'] += entrada['registros']
+            elif len(motivos) < MAX_MOTIVOS:
+                motivos[clave] = entrada
+    total['motivos'] = list(motivos.values())
+    return total
+
+
+def sentidos(compatibilidad):
+    resultado = []
+    if compatibilidad.startswith(('BACKWARD', 'FULL')):
+        resultado.append('BACKWARD')
+    if compatibilidad.startswith(('FORWARD', 'FULL')):
+        resultado.append('FORWARD')
+    return resultado
+
+
+def probar_compatibilidad(texto_ant, texto_nuevo, compatibilidad, registros, semilla=0, muestras=None, procesos=None):
+    resultados = {}
+    for sentido in sentidos(compatibilidad):
+        if sentido == 'BACKWARD':
+            resultados[sentido] = probar_sentido(texto_ant, texto_nuevo, registros, semilla, muestras, procesos)
+        else:
+            # Las muestras cargadas son del esquema anterior: en FORWARD se generan
+            resultados[sentido] = probar_sentido(texto_nuevo, texto_ant, registros, semilla, None, procesos)
+    return resultados
+
+
+def _mostrar(valor):
+    texto = repr(valor)
+    return texto if len(texto) <= 80 else texto[:77] + '...'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de compatibilidad codificando y decodificando registros de muestra")
+    parser.add_argument('anterior', help="Esquema anterior (.avsc o registry:<subject>[:<versión>])")
+    parser.add_argument('nuevo', help="Esquema nuevo (.avsc o registry:<subject>[:<versión>])")
+    parser.add_argument('--compatibilidad', help="Modo de compatibilidad (por defecto, el del Schema Registry)")
+    parser.add_argument('--registros', type=int, default=100_000, help="Registros generados por sentido")
+    parser.add_argument('--muestras', help="Registros del esquema anterior en JSONL o contenedor .avro")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--procesos', type=int, help="Procesos para decodificar en paralelo")
+    parser.add_argument('--salida', help="Guardar el resultado en un archivo JSON")
+    args = parser.parse_args()
+
+    try:
+        texto_ant = leer_texto(args.anterior)
+        texto_nuevo = leer_texto(args.nuevo)
+        compatibilidad = args.compatibilidad
+        if compatibilidad is None:
+            compatibilidad = obtener_compatibilidad(
+                os.environ.get('SCHEMA_REGISTRY_URL', "http://schema-registry:8081"),
+                os.environ.get('SUBJECT_NAME', "orders-value"))
+        print(f"🔍 Modo de compatibilidad: {compatibilidad}")
+
+        if not sentidos(compatibilidad):
+            print("✅ Sin restricciones de compatibilidad: no hay nada que probar")
+            sys.exit(0)
+
+        muestras = cargar_muestras(args.muestras) if args.muestras else None
+        resultados = probar_compatibilidad(texto_ant, texto_nuevo, compatibilidad, args.registros,
+                                           args.semilla, muestras, args.procesos)
+
+        if args.salida:
+            with open(args.salida, 'w') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False, default=str)
+
+        hay_errores = False
+        for sentido, total in resultados.items():
+            escritor, lector = ('anterior', 'nuevo') if sentido == 'BACKWARD' else ('nuevo', 'anterior')
+            print(f"\n📊 {sentido}: {total['registros']} registros escritos con el esquema {escritor} "
+                  f"y leídos con el {lector} ({total['bytes']} bytes)")
+            print(f" - Fallos de lectura: {total['fallos']}")
+            print(f" - Valores modificados: {total['cambios']}")
+            for entrada in total['motivos']:
+                if entrada['tipo'] == 'fallo':
+                    print(f"   ❌ {entrada['registros']} registros: {entrada['motivo']} (p. ej. registro {entrada['indice']})")
+                else:
+                    ejemplo = entrada['ejemplo']
+                    print(f"   ❌ {entrada['registros']} registros cambian [{entrada['motivo']}]: p. ej. registro "
+                          f"{entrada['indice']}, {_mostrar(ejemplo['original'])} → {_mostrar(ejemplo['leido'])}")
+            hay_errores = hay_errores or total['fallos'] or total['cambios']
+
+        if hay_errores:
+            print("\n❌ Hay registros que no se leen igual con el otro esquema")
+            sys.exit(1)
+
+        print("\n✅ Todos los registros se leen sin cambios en los sentidos exigidos")
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\n❌ Error crítico: {str(e)}")
+        sys.exit(1)
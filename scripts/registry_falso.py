@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# Schema Registry falso en proceso para pruebas locales de los scripts.
+#
+# Implementa el subconjunto de la API REST que usan los scripts (subjects,
+# versiones, esquemas por ID, configuración de compatibilidad y registro) y
+# cuenta las peticiones recibidas por ruta.
+#
+#   with RegistryFalso() as registry:
+#       registry.añadir('orders-value', open('Order.avsc').read())
+#       cliente = ClienteRegistry(registry.url)
+import json
+import re
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RegistryFalso:
+    def __init__(self, compatibilidad='BACKWARD', host='127.0.0.1', puerto=0):
+        self.compatibilidad_global = compatibilidad
+        self.compatibilidad_subjects = {}
+        self.subjects = {}      # subject -> [schema_id, ...] (índice = versión - 1)
+        self.esquemas = {}      # schema_id -> texto
+        self.ids_por_texto = {}
+        self.peticiones = Counter()
+        self.bloqueo = threading.Lock()
+        self.servidor = ThreadingHTTPServer((host, puerto), self._manejador())
+        self.servidor.daemon_threads = True
+        self.hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hilo.start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excepcion):
+        self.detener()
+
+    # --- Estado ---
+
+    def añadir(self, subject, texto_esquema):
+        with self.bloqueo:
+            # Como el registry real, un texto distinto (aunque solo cambie 'doc') es otro esquema
+            schema_id = self.ids_por_texto.get(texto_esquema)
+            if schema_id is None:
+                schema_id = len(self.esquemas) + 1
+                self.esquemas[schema_id] = texto_esquema
+                self.ids_por_texto[texto_esquema] = schema_id
+            versiones = self.subjects.setdefault(subject, [])
+            if schema_id not in versiones:
+                versiones.append(schema_id)
+            return schema_id
+
+    def fijar_compatibilidad(self, nivel, subject=None):
+        if subject is None:
+            self.compatibilidad_global = nivel
+        else:
+            self.compatibilidad_subjects[subject] = nivel
+
+    def _metadatos(self, subject, version):
+        schema_id = self.subjects[subject][version - 1]
+        return {'subject': subject, 'version': version, 'id': schema_id, 'schema': self.esquemas[schema_id]}
+
+    # --- API REST ---
+
+    def responder_get(self, ruta):
+        if ruta == '/subjects':
+            return 200, list(self.subjects)
+        if ruta == '/config':
+            return 200, {'compatibilityLevel': self.compatibilidad_global}
+
+        m = re.fullmatch(r'/config/([^/]+)', ruta)
+        if m:
+            if m.group(1) in self.compatibilidad_subjects:
+                return 200, {'compatibilityLevel': self.compatibilidad_subjects[m.group(1)]}
+            return 404, {'error_code': 40401, 'message': 'Subject not found'}
+
+        m = re.fullmatch(r'/schemas/ids/(\d+)', ruta)
+        if m:
+            schema_id = int(m.group(1))
+            if schema_id in self.esquemas:
+                return 200, {'schema': self.esquemas[schema_id]}
+            return 404, {'error_code': 40403, 'message': 'Schema not found'}
+
+        m = re.fullmatch(r'/subjects/([^/]+)/versions(?:/(\d+|latest)(/schema)?)?', ruta)
+        if m:
+            subject, version, en_bruto = m.groups()
+            if subject not in self.subjects:
+                return 404, {'error_code': 40401, 'message': 'Subject not found'}
+            versiones = self.subjects[subject]
+            if version is None:
+                return 200, list(range(1, len(versiones) + 1))
+            numero = len(versiones) if version == 'latest' else int(version)
+            if not 1 <= numero <= len(versiones):
+                return 404, {'error_code': 40402, 'message': 'Version not found'}
+            metadatos = self._metadatos(subject, numero)
+            return 200, json.loads(metadatos['schema']) if en_bruto else metadatos
+
+        return 404, {'error_code': 404, 'message': 'Not found'}
+
+    def responder_post(self, ruta, cuerpo):
+        m = re.fullmatch(r'/subjects/([^/]+)/versions', ruta)
+        if m:
+            return 200, {'id': self.añadir(m.group(1), cuerpo['schema'])}
+        return 404, {'error_code': 404, 'message': 'Not found'}
+
+    def _manejador(self):
+        registry = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _enviar(self, estado, cuerpo):
+                datos = json.dumps(cuerpo).encode('utf-8')
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/vnd.schemaregistry.v1+json')
+                self.send_header('Content-Length', str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                registry.peticiones[('GET', self.path)] += 1
+                self._enviar(*registry.responder_get(self.path))
+
+            def do_POST(self):
+                registry.peticiones[('POST', self.path)] += 1
+                longitud = int(self.headers.get('Content-Length', 0))
+                cuerpo = json.loads(self.rfile.read(longitud) or b'{}')
+                self._enviar(*registry.responder_post(self.path, cuerpo))
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
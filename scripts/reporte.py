@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# Modelo tipado de las diferencias entre esquemas y serializadores en streaming.
+#
+# compare_schemas.iterar_cambios() produce las entradas de una en una y cada
+# serializador las escribe en cuanto llegan, sin acumular el informe completo:
+#   - texto: el formato legible de siempre (con resumen final)
+#   - jsonl: un objeto JSON por línea, para ingerir en dashboards
+#   - sarif: SARIF 2.1.0, para herramientas de análisis estático y PRs
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+
+@dataclass(slots=True)
+class DetalleCampo:
+    nombre: str
+    tipo: Any
+    doc: Optional[str] = None
+    default: Any = None
+    orden: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CambioMetadato:
+    atributo: str
+    anterior: Any
+    nuevo: Any
+    categoria: str = 'metadato'
+
+
+@dataclass(slots=True)
+class CambioCampo:
+    categoria: str  # 'añadido', 'eliminado', 'renombrado' o 'modificado'
+    nombre: str
+    anterior: Optional[DetalleCampo] = None
+    nuevo: Optional[DetalleCampo] = None
+    nombre_anterior: Optional[str] = None
+    # Cambios atributo a atributo: {'atributo', 'ruta', 'anterior', 'nuevo'}
+    cambios: list = field(default_factory=list)
+
+
+def formatear_campo(campo):
+    if isinstance(campo, DetalleCampo):
+        campo = asdict(campo)
+    detalles = []
+    if campo['doc']: detalles.append(f"Doc: {campo['doc']}")
+    if campo['default'] is not None: detalles.append(f"Default: {campo['default']}")
+    if campo['orden']: detalles.append(f"Orden: {campo['orden']}")
+    return f"{campo['nombre']} ({campo['tipo']})" + (f" [{', '.join(detalles)}]" if detalles else "")
+
+
+def formatear_cambio(cambio):
+    return f"{cambio['atributo']} [{cambio['ruta']}]: {cambio['anterior']} → {cambio['nuevo']}"
+
+
+class SerializadorTexto:
+    CABECERAS = {
+        'añadido': "\n🟢 CAMPOS AÑADIDOS:",
+        'eliminado': "\n🔴 CAMPOS ELIMINADOS:",
+        'renombrado': "\n🟣 CAMPOS RENOMBRADOS:",
+        'modificado': "\n🟠 CAMPOS MODIFICADOS:",
+    }
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.seccion = None
+        self.totales = {'metadato': 0, 'añadido': 0, 'eliminado': 0, 'renombrado': 0, 'modificado': 0}
+
+    def _linea(self, texto):
+        self.salida.write(texto + '\n')
+
+    def escribir(self, entrada):
+        # Las entradas llegan agrupadas por categoría: basta con abrir una
+        # sección cada vez que cambia.
+        if entrada.categoria != self.seccion:
+            self.seccion = entrada.categoria
+            if entrada.categoria == 'metadato':
+                self._linea("=== CAMBIOS EN METADATOS ===")
+            else:
+                self._linea(self.CABECERAS[entrada.categoria])
+        self.totales[entrada.categoria] += 1
+
+        if entrada.categoria == 'metadato':
+            self._linea(f"🔵 {entrada.atributo.upper()}:")
+            self._linea(f"  Anterior: {entrada.anterior}")
+            self._linea(f"  Nuevo:    {entrada.nuevo}")
+        elif entrada.categoria in ('modificado', 'renombrado'):
+            if entrada.categoria == 'renombrado':
+                self._linea(f"  ↪ {entrada.nombre_anterior} → {entrada.nombre}:")
+            else:
+                self._linea(f"  ~ {entrada.nombre}:")
+            self._linea("    Anterior: " + formatear_campo(entrada.anterior))
+            self._linea("    Nuevo:    " + formatear_campo(entrada.nuevo))
+            for cambio in entrada.cambios:
+                self._linea("    · " + formatear_cambio(cambio))
+        else:
+            self._linea(formatear_campo(entrada.nuevo or entrada.anterior))
+
+    def cerrar(self):
+        t = self.totales
+        self._linea("\n=== RESUMEN ===")
+        self._linea(f"Metadatos modificados: {t['metadato']}")
+        self._linea(f"Campos añadidos: {t['añadido']}")
+        self._linea(f"Campos eliminados: {t['eliminado']}")
+        self._linea(f"Campos renombrados: {t['renombrado']}")
+        self._linea(f"Campos modificados: {t['modificado']}")
+        self._linea(f"Total de cambios: {sum(t.values())}")
+
+
+class SerializadorJSONL:
+    def __init__(self, salida):
+        self.salida = salida
+
+    def escribir(self, entrada):
+        self.salida.write(json.dumps(asdict(entrada), ensure_ascii=False, default=str) + '\n')
+
+    def cerrar(self):
+        pass
+
+
+class SerializadorSARIF:
+    REGLAS = {
+        'metadato': ('schema/metadato-modificado', 'warning', "Cambio en los metadatos del esquema"),
+        'añadido': ('schema/campo-añadido', 'note', "Campo añadido al esquema"),
+        'eliminado': ('schema/campo-eliminado', 'warning', "Campo eliminado del esquema"),
+        'renombrado': ('schema/campo-renombrado', 'note', "Campo renombrado mediante aliases"),
+        'modificado': ('schema/campo-modificado', 'warning', "Campo modificado en el esquema"),
+    }
+
+    def __init__(self, salida, artefacto=None):
+        self.salida = salida
+        self.artefacto = artefacto
+        self.primero = True
+        reglas = [{'id': regla, 'shortDescription': {'text': texto}} for regla, _, texto in self.REGLAS.values()]
+        driver = {'name': 'compare_schemas', 'rules': reglas}
+        # La cabecera se escribe completa y el array de resultados queda abierto
+        cabecera = json.dumps({
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+            'runs': [{'tool': {'driver': driver}, 'results': []}],
+        }, ensure_ascii=False)
+        self.salida.write(cabecera[:-len(']}]}')] + '\n')
+
+    def escribir(self, entrada):
+        regla, nivel, _ = self.REGLAS[entrada.categoria]
+        if entrada.categoria == 'metadato':
+            nombre = entrada.atributo
+            mensaje = f"'{entrada.atributo}': {entrada.anterior} → {entrada.nuevo}"
+        elif entrada.categoria == 'modificado':
+            nombre = entrada.nombre
+            mensaje = '; '.join(formatear_cambio(c) for c in entrada.cambios)
+        elif entrada.categoria == 'renombrado':
+            nombre = entrada.nombre
+            mensaje = f"{entrada.nombre_anterior} → {entrada.nombre}"
+        else:
+            nombre = entrada.nombre
+            mensaje = formatear_campo(entrada.nuevo or entrada.anterior)
+
+        resultado = {
+            'ruleId': regla,
+            'level': nivel,
+            'message': {'text': mensaje},
+            'locations': [{'logicalLocations': [{'fullyQualifiedName': nombre}]}],
+            'properties': asdict(entrada),
+        }
+        if self.artefacto:
+            resultado['locations'][0]['physicalLocation'] = {'artifactLocation': {'uri': self.artefacto}}
+
+        self.salida.write(('' if self.primero else ',\n') + json.dumps(resultado, ensure_ascii=False, default=str))
+        self.primero = False
+
+    def cerrar(self):
+        self.salida.write('\n]}]}\n')
+
+
+SERIALIZADORES = {
+    'texto': SerializadorTexto,
+    'jsonl': SerializadorJSONL,
+    'sarif': SerializadorSARIF,
+}
+
+
+def escribir_reporte(entradas, serializador):
+    for entrada in entradas:
+        serializador.escribir(entrada)
+    serializador.cerrar()
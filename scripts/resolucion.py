@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# Motor de resolución escritor/lector según la especificación de Avro.
+#
+# Recorre ambos esquemas de forma recursiva (records anidados, enums, arrays,
+# maps, uniones y fixed) y memoriza cada par (escritor, lector) ya visitado, de
+# modo que los tipos con nombre compartidos o recursivos se comprueban una
+# única vez y el coste total es lineal en el tamaño de los esquemas.
+
+# Promociones de tipo permitidas: (tipo del escritor, tipo del lector)
+PROMOCIONES = {
+    ('int', 'long'), ('int', 'float'), ('int', 'double'),
+    ('long', 'float'), ('long', 'double'),
+    ('float', 'double'),
+    ('string', 'bytes'), ('bytes', 'string'),
+}
+
+TIPOS_CON_NOMBRE = ('record', 'error', 'enum', 'fixed')
+
+
+def hallazgo(ruta, tipo, detalle, compatible):
+    return {'ruta': ruta or '<raíz>', 'tipo': tipo, 'detalle': detalle, 'compatible': compatible}
+
+
+def _aliases(esquema):
+    props = getattr(esquema, 'props', None) or {}
+    return props.get('aliases') or []
+
+
+def _nombres_coinciden(escritor, lector):
+    # Para tipos con nombre basta con que coincida el nombre sin namespace,
+    # o que el nombre del escritor figure entre los aliases del lector.
+    if escritor.name == lector.name:
+        return True
+    return escritor.fullname in _aliases(lector) or escritor.name in _aliases(lector)
+
+
+def describir(esquema):
+    # Descripción corta de un tipo: los tipos con nombre no se expanden
+    if esquema.type in TIPOS_CON_NOMBRE:
+        return f"{esquema.type} {esquema.fullname}"
+    if esquema.type == 'union':
+        return 'union[' + ', '.join(describir(s) for s in esquema.schemas) + ']'
+    if esquema.type == 'array':
+        return f"array<{describir(esquema.items)}>"
+    if esquema.type == 'map':
+        return f"map<{describir(esquema.values)}>"
+    return esquema.type
+
+
+def _coincide_rama(escritor, lector):
+    # Emparejamiento superficial usado para elegir la rama de una unión
+    if escritor.type != lector.type:
+        return (escritor.type, lector.type) in PROMOCIONES
+    if escritor.type in TIPOS_CON_NOMBRE:
+        return _nombres_coinciden(escritor, lector)
+    return True
+
+
+def _indice_ramas(ramas):
+    # (tipo, nombre o alias) -> (posición, rama) de la primera rama que lo
+    # declara, para emparejar en O(1) en uniones grandes
+    indice = {}
+    for posicion, rama in enumerate(ramas):
+        if rama.type in TIPOS_CON_NOMBRE:
+            for nombre in (rama.name, *_aliases(rama)):
+                indice.setdefault((rama.type, nombre), (posicion, rama))
+        else:
+            indice.setdefault((rama.type, None), (posicion, rama))
+    return indice
+
+
+def _elegir_rama(escritor, ramas, indice):
+    # Primero una coincidencia exacta de tipo, después una promoción
+    if escritor.type in TIPOS_CON_NOMBRE:
+        candidatas = [indice.get((escritor.type, escritor.name)), indice.get((escritor.type, escritor.fullname))]
+    else:
+        candidatas = [indice.get((escritor.type, None))]
+    candidatas = [c for c in candidatas if c is not None]
+    if candidatas:
+        return min(candidatas, key=lambda c: c[0])[1]
+    for rama in ramas:
+        if _coincide_rama(escritor, rama):
+            return rama
+    return None
+
+
+# Devuelve los hallazgos al leer datos escritos con `escritor` usando `lector`.
+# Pasar el mismo `memo` en varias llamadas evita revisitar los tipos compartidos.
+def resolver(escritor, lector, ruta='', memo=None):
+    if memo is None:
+        memo = set()
+    hallazgos = []
+    _resolver(escritor, lector, ruta, memo, hallazgos)
+    return hallazgos
+
+
+def es_compatible(hallazgos):
+    return all(h['compatible'] for h in hallazgos)
+
+
+def _resolver(escritor, lector, ruta, memo, hallazgos):
+    clave = (id(escritor), id(lector))
+    if clave in memo:
+        return
+    memo.add(clave)
+
+    # Uniones: cada rama del escritor debe poder leerse con el lector
+    if escritor.type == 'union' or lector.type == 'union':
+        _resolver_union(escritor, lector, ruta, memo, hallazgos)
+        return
+
+    if escritor.type != lector.type:
+        if (escritor.type, lector.type) in PROMOCIONES:
+            hallazgos.append(hallazgo(ruta, 'promocion', f"{escritor.type} → {lector.type}", True))
+        else:
+            hallazgos.append(hallazgo(
+                ruta, 'tipo_incompatible',
+                f"{describir(escritor)} no puede leerse como {describir(lector)}", False))
+        return
+
+    tipo = escritor.type
+    if tipo in TIPOS_CON_NOMBRE and not _nombres_coinciden(escritor, lector):
+        hallazgos.append(hallazgo(
+            ruta, 'nombre',
+            f"'{escritor.fullname}' no coincide con '{lector.fullname}' ni con sus aliases", False))
+        return
+
+    if tipo in ('record', 'error'):
+        _resolver_record(escritor, lector, ruta, memo, hallazgos)
+    elif tipo == 'enum':
+        _resolver_enum(escritor, lector, ruta, hallazgos)
+    elif tipo == 'fixed':
+        if escritor.size != lector.size:
+            hallazgos.append(hallazgo(
+                ruta, 'fixed_tamaño', f"tamaño {escritor.size} → {lector.size}", False))
+    elif tipo == 'array':
+        _resolver(escritor.items, lector.items, f"{ruta}[]", memo, hallazgos)
+    elif tipo == 'map':
+        _resolver(escritor.values, lector.values, f"{ruta}{{}}", memo, hallazgos)
+
+
+def _resolver_record(escritor, lector, ruta, memo, hallazgos):
+    campos_escritor = {campo.name: campo for campo in escritor.fields}
+    nombres_lector = {campo.name for campo in lector.fields}
+    prefijo = f"{ruta}." if ruta else ''
+
+    # Cada campo del escritor va a un solo campo del lector: primero por nombre
+    # y, si nadie lo lee por su nombre, al primer campo que lo tenga como alias
+    por_alias = set()
+    for campo in lector.fields:
+        origen = campos_escritor.get(campo.name)
+        if origen is None:
+            for alias in campo.props.get('aliases') or []:
+                if alias in nombres_lector or alias in por_alias:
+                    continue
+                origen = campos_escritor.get(alias)
+                if origen is not None:
+                    por_alias.add(alias)
+                    break
+
+        ruta_campo = prefijo + campo.name
+        if origen is not None:
+            _resolver(origen.type, campo.type, ruta_campo, memo, hallazgos)
+        elif campo.has_default:
+            hallazgos.append(hallazgo(ruta_campo, 'campo_con_default', "ausente en el escritor, se usa el default", True))
+        else:
+            hallazgos.append(hallazgo(ruta_campo, 'campo_sin_default', "ausente en el escritor y sin default en el lector", False))
+
+
+def _resolver_enum(escritor, lector, ruta, hallazgos):
+    simbolos_escritor = set(escritor.symbols)
+    simbolos_lector = set(lector.symbols)
+    faltantes = [s for s in escritor.symbols if s not in simbolos_lector]
+    nuevos = [s for s in lector.symbols if s not in simbolos_escritor]
+    if not faltantes and not nuevos:
+        return
+
+    default = lector.props.get('default')
+    compatible = not faltantes or default is not None
+    detalle = []
+    if faltantes:
+        detalle.append(f"símbolos eliminados {faltantes}")
+    if nuevos:
+        detalle.append(f"símbolos añadidos {nuevos}")
+    if faltantes and default is not None:
+        detalle.append(f"se resuelven con el default '{default}'")
+    hallazgos.append(hallazgo(ruta, 'enum_simbolos', ', '.join(detalle), compatible))
+
+
+def _resolver_union(escritor, lector, ruta, memo, hallazgos):
+    ramas_escritor = escritor.schemas if escritor.type == 'union' else [escritor]
+    ramas_lector = lector.schemas if lector.type == 'union' else [lector]
+
+    if escritor.type == 'union' and lector.type == 'union':
+        tipos_escritor = [describir(r) for r in ramas_escritor]
+        tipos_lector = [describir(r) for r in ramas_lector]
+        conjunto_escritor, conjunto_lector = set(tipos_escritor), set(tipos_lector)
+        eliminadas = [t for t in tipos_escritor if t not in conjunto_lector]
+        añadidas = [t for t in tipos_lector if t not in conjunto_escritor]
+        if añadidas:
+            hallazgos.append(hallazgo(ruta, 'union_ramas', f"ramas añadidas {añadidas}", True))
+        if eliminadas:
+            # Su compatibilidad la decide la resolución de cada rama más abajo
+            hallazgos.append(hallazgo(ruta, 'union_ramas', f"ramas eliminadas {eliminadas}", True))
+
+    indice = _indice_ramas(ramas_lector)
+    for rama in ramas_escritor:
+        destino = _elegir_rama(rama, ramas_lector, indice)
+        sufijo = f"<{describir(rama)}>" if escritor.type == 'union' else ''
+        if destino is None:
+            hallazgos.append(hallazgo(
+                ruta + sufijo, 'union_incompatible',
+                f"la rama {describir(rama)} no existe en {describir(lector)}", False))
+        else:
+            _resolver(rama, destino, ruta + sufijo, memo, hallazgos)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Pipeline completo de un esquema en un único proceso: descarga la última
+# versión registrada, compara, valida la compatibilidad, prueba con datos
+# (opcional), anota la fecha en 'doc' y registra el nuevo esquema.
+#
+# Sustituye a las stages de curl, jq y sed del Jenkinsfile: el esquema se lee
+# y se parsea una sola vez y el mismo objeto pasa por todas las etapas, con una
+# única sesión HTTP. Si el subject ya tiene una versión con el mismo JSON que
+# el nuevo esquema (salvo el 'doc' de la raíz, que es la fecha anotada), no se
+# anota ni se registra. La forma canónica no basta: ignora defaults, aliases y
+# 'doc' de los campos, y un cambio solo de default debe registrarse.
+#
+#   python schema_pipeline.py common/src/main/avro/Order.avsc --subject orders-value \
+#       --reporte schema_diff.txt --registros 1000000 --resumen schema_pipeline.json
+import argparse
+import json
+import os
+import sys
+import time
+
+from cliente_registry import ClienteRegistry, ErrorRegistry, obtener_cliente
+from compare_schemas import iterar_cambios
+from huella import huella_rabin, huella_texto
+from instrumentacion import etapa
+from reporte import SERIALIZADORES, SerializadorSARIF, escribir_reporte
+from validate_compatibility import leer_texto, parsear_texto, validar_par, validar_transitivo
+
+
+def descargar(cliente, subject):
+    # Compatibilidad del subject y metadatos de su última versión (None si es nuevo)
+    compatibilidad = cliente.compatibilidad(subject)
+    try:
+        return compatibilidad, cliente.version(subject)
+    except ErrorRegistry as e:
+        if e.status_code != 404:
+            raise
+        return compatibilidad, None
+
+
+def escribir_diferencias(texto_ant, texto_nuevo, salida, formato='texto', artefacto=None):
+    if formato == 'sarif':
+        serializador = SerializadorSARIF(salida, artefacto)
+    else:
+        serializador = SERIALIZADORES[formato](salida)
+    if json.loads(texto_ant) == json.loads(texto_nuevo):
+        entradas = iter(())
+    else:
+        entradas = iterar_cambios(parsear_texto(texto_ant), parsear_texto(texto_nuevo))
+    escribir_reporte(entradas, serializador)
+
+
+def validar(cliente, subject, compatibilidad, ultima, texto_nuevo, procesos=None):
+    # Devuelve [(versión, errores, advertencias)] contra las versiones que exige el modo
+    if compatibilidad.endswith('_TRANSITIVE'):
+        resultados, _ = validar_transitivo(texto_nuevo, cliente.todas_las_versiones(subject), compatibilidad, procesos)
+        return sorted(resultados)
+    errores, advertencias = validar_par(ultima['schema'], texto_nuevo, compatibilidad)
+    return [(ultima['version'], errores, advertencias)]
+
+
+def huella_registro(texto):
+    # Huella del JSON normalizado sin el 'doc' de la raíz, que anotar() sustituye
+    esquema = json.loads(texto)
+    if isinstance(esquema, dict):
+        esquema = {clave: valor for clave, valor in esquema.items() if clave != 'doc'}
+    return huella_texto(json.dumps(esquema, sort_keys=True, separators=(',', ':'), ensure_ascii=False))
+
+
+def version_registrada(cliente, subject, texto):
+    # Versión del subject con el mismo esquema que `texto` (salvo la anotación), si existe
+    objetivo = huella_registro(texto)
+    try:
+        versiones = cliente.todas_las_versiones(subject)
+    except ErrorRegistry as e:
+        if e.status_code != 404:
+            raise
+        return None
+    for version, texto_version in sorted(versiones.items(), reverse=True):
+        if huella_registro(texto_version) == objetivo:
+            return version
+    return None
+
+
+def anotar(texto, instante=None):
+    # Equivalente al sed del Jenkinsfile: 'doc' con la fecha justo tras 'namespace'
+    esquema = json.loads(texto)
+    if not isinstance(esquema, dict):
+        return texto
+    marca = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(instante))
+    anotado = {}
+    for clave, valor in esquema.items():
+        if clave != 'doc':
+            anotado[clave] = valor
+        if clave == 'namespace':
+            anotado['doc'] = f"Actualizado el {marca}"
+    anotado.setdefault('doc', f"Actualizado el {marca}")
+    return json.dumps(anotado, indent=2, ensure_ascii=False)
+
+
+def ejecutar_pipeline(archivo, subject, url=None, reporte=None, formato='texto', registros=0, procesos=None,
+                      registrar=True):
+    resumen = {'subject': subject, 'archivo': archivo, 'compatibilidad': None, 'version_anterior': None,
+               'compatible': False, 'registrado': False, 'schema_id': None, 'version_existente': None}
+    # Las lecturas pueden venir del espejo (ESPEJO_REGISTRY); el registro siempre va al registry
+    cliente = obtener_cliente(url)
+    registrador = cliente if isinstance(cliente, ClienteRegistry) else None
+
+    with etapa('carga'):
+        texto_nuevo = leer_texto(archivo)
+        parsear_texto(texto_nuevo)
+    resumen['huella'] = huella_rabin(texto_nuevo)
+
+    with etapa('descarga', subject=subject):
+        compatibilidad, ultima = descargar(cliente, subject)
+    resumen['compatibilidad'] = compatibilidad
+    print(f"🔍 Modo de compatibilidad: {compatibilidad}")
+
+    if ultima is None:
+        print(f"🆕 El subject '{subject}' no tiene versiones: no hay nada con lo que comparar")
+        resumen['compatible'] = True
+    else:
+        resumen['version_anterior'] = ultima['version']
+        print(f"📚 Última versión registrada: {ultima['version']} (ID {ultima['id']})")
+
+        with etapa('diff'):
+            if reporte:
+                with open(reporte, 'w') as f:
+                    escribir_diferencias(ultima['schema'], texto_nuevo, f, formato, archivo)
+            else:
+                print("📊 Cambios detectados:")
+                escribir_diferencias(ultima['schema'], texto_nuevo, sys.stdout, formato, archivo)
+                sys.stdout.flush()
+
+        with etapa('validacion', subject=subject):
+            resultados = validar(cliente, subject, compatibilidad, ultima, texto_nuevo, procesos)
+        incompatibles = 0
+        for version, errores, advertencias in resultados:
+            if errores:
+                incompatibles += 1
+                print(f"\n❌ Versión {version}:")
+                for e in errores:
+                    print(f" - {e}")
+            elif advertencias:
+                print(f"\n⚠️ Versión {version}:")
+                for a in advertencias:
+                    print(f" - {a}")
+        if incompatibles:
+            print(f"\n❌ El esquema es incompatible con {incompatibles} versión(es) registrada(s)")
+            return resumen
+        print(f"\n✅ El esquema es compatible ({len(resultados)} versión(es) comprobada(s))")
+
+        if registros:
+            from prueba_datos import probar_compatibilidad
+            with etapa('prueba_datos', subject=subject):
+                pruebas = probar_compatibilidad(ultima['schema'], texto_nuevo, compatibilidad, registros,
+                                                procesos=procesos)
+            for sentido, total in pruebas.items():
+                print(f"📊 {sentido}: {total['registros']} registros, {total['fallos']} fallos de lectura, "
+                      f"{total['cambios']} valores modificados")
+                for entrada in total['motivos']:
+                    print(f"   ❌ {entrada['registros']} registros: {entrada['motivo']}")
+            if any(total['fallos'] or total['cambios'] for total in pruebas.values()):
+                print("\n❌ Hay registros que no se leen igual con el otro esquema")
+                return resumen
+        resumen['compatible'] = True
+
+    existente = version_registrada(cliente, subject, texto_nuevo) if ultima is not None else None
+    if existente is not None:
+        resumen['version_existente'] = existente
+        print(f"✅ La versión {existente} de '{subject}' ya tiene el mismo esquema: no se registra")
+        return resumen
+    if not registrar:
+        print("⚠️ Registro omitido (--sin-registro)")
+        return resumen
+
+    with etapa('registro', subject=subject):
+        if registrador is None:
+            registrador = ClienteRegistry(url)
+        resumen['schema_id'] = registrador.registrar(subject, anotar(texto_nuevo))
+    resumen['registrado'] = True
+    print(f"✅ Esquema registrado en '{subject}' con ID {resumen['schema_id']}")
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga, compara, valida, anota y registra un esquema en un solo proceso")
+    parser.add_argument('esquema', help="Nuevo esquema .avsc")
+    parser.add_argument('--subject', default=os.environ.get('SUBJECT_NAME', 'orders-value'),
+                        help="Subject del Schema Registry (por defecto, SUBJECT_NAME)")
+    parser.add_argument('--url', help="URL del Schema Registry (por defecto, SCHEMA_REGISTRY_URL)")
+    parser.add_argument('--reporte', help="Archivo para el informe de cambios (por defecto, salida estándar)")
+    parser.add_argument('--formato', choices=sorted(SERIALIZADORES), default='texto')
+    parser.add_argument('--registros', type=int, default=0, help="Registros por sentido para la prueba con datos (0 = sin prueba)")
+    parser.add_argument('--procesos', type=int, help="Procesos para la validación transitiva y la prueba con datos")
+    parser.add_argument('--sin-registro', action='store_true', help="Validar sin registrar el esquema")
+    parser.add_argument('--resumen', help="Guardar el resumen de la ejecución en un archivo JSON")
+    args = parser.parse_args()
+
+    try:
+        resumen = ejecutar_pipeline(args.esquema, args.subject, args.url, args.reporte, args.formato,
+                                    args.registros, args.procesos, not args.sin_registro)
+    except Exception as e:
+        print(f"\n❌ Error crítico: {str(e)}")
+        sys.exit(1)
+
+    if args.resumen:
+        with open(args.resumen, 'w') as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+    sys.exit(0 if resumen['compatible'] else 1)
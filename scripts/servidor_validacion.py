@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Servidor de validación de larga duración (asyncio, HTTP/1.1 con keep-alive).
+#
+# Evita pagar el arranque del intérprete y los imports de avro/requests en cada
+# comprobación: mantiene en memoria los esquemas parseados, las respuestas del
+# Schema Registry y los resultados ya calculados.
+#
+#   POST /compare   {"anterior": <esquema>, "nuevo": <esquema>}
+#   POST /validate  {"anterior": <esquema>, "nuevo": <esquema>,
+#                    "compatibilidad": "BACKWARD" | "subject": "orders-value"}
+#   GET  /salud
+#
+# Los esquemas pueden enviarse como objeto JSON o como texto. Las peticiones
+# idénticas en curso se agrupan y esperan al mismo cálculo, y el trabajo de CPU
+# se limita con un semáforo para no degradar la latencia bajo carga.
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import asdict
+
+from cliente_registry import CacheTTL, obtener_cliente
+from huella import huella_completa, huella_texto
+
+MAX_CUERPO = 64 * 1024 * 1024
+
+
+class ServidorValidacion:
+    def __init__(self, concurrencia=8, max_resultados=4096):
+        self.semaforo = asyncio.Semaphore(concurrencia)
+        self.resultados = CacheTTL(max_resultados)
+        self.en_curso = {}
+
+    # --- Cálculo ---
+
+    def _comparar(self, texto_ant, texto_nuevo):
+        from compare_schemas import iterar_cambios
+        from validate_compatibility import parsear_texto
+
+        if huella_texto(texto_ant) == huella_texto(texto_nuevo):
+            return {'cambios': []}
+        cambios = iterar_cambios(parsear_texto(texto_ant), parsear_texto(texto_nuevo))
+        return {'cambios': [asdict(c) for c in cambios]}
+
+    def _validar(self, texto_ant, texto_nuevo, compatibilidad):
+        from validate_compatibility import validar_par
+
+        # Mismo JSON salvo 'doc': la forma canónica ignoraría los defaults
+        if huella_completa(texto_ant) == huella_completa(texto_nuevo):
+            return {'compatible': True, 'compatibilidad': compatibilidad, 'errores': [], 'advertencias': []}
+        errores, advertencias = validar_par(texto_ant, texto_nuevo, compatibilidad.replace('_TRANSITIVE', ''))
+        return {'compatible': not errores, 'compatibilidad': compatibilidad,
+                'errores': errores, 'advertencias': advertencias}
+
+    async def _calcular(self, clave, funcion, *argumentos):
+        resultado = self.resultados.obtener(clave)
+        if resultado is not None:
+            return resultado
+
+        # Agrupación de peticiones idénticas en curso
+        pendiente = self.en_curso.get(clave)
+        if pendiente is not None:
+            try:
+                return await asyncio.shield(pendiente)
+            except asyncio.CancelledError:
+                # Se canceló la petición que calculaba, no esta: se calcula de nuevo
+                if not pendiente.cancelled():
+                    raise
+                return await self._calcular(clave, funcion, *argumentos)
+
+        pendiente = asyncio.get_running_loop().create_future()
+        self.en_curso[clave] = pendiente
+        try:
+            async with self.semaforo:
+                resultado = await asyncio.to_thread(funcion, *argumentos)
+            self.resultados.guardar(clave, resultado)
+            pendiente.set_result(resultado)
+            return resultado
+        except Exception as e:
+            pendiente.set_exception(e)
+            # Se marca como recuperada para no avisar si nadie más la esperaba
+            pendiente.exception()
+            raise
+        finally:
+            del self.en_curso[clave]
+            # Cancelada esta petición (CancelledError no es Exception), las
+            # agrupadas con ella no pueden quedarse esperando para siempre
+            if not pendiente.done():
+                pendiente.cancel()
+
+    async def comparar(self, cuerpo):
+        texto_ant, texto_nuevo = _texto(cuerpo['anterior']), _texto(cuerpo['nuevo'])
+        clave = ('compare', huella_texto(texto_ant), huella_texto(texto_nuevo))
+        return await self._calcular(clave, self._comparar, texto_ant, texto_nuevo)
+
+    async def validar(self, cuerpo):
+        texto_ant, texto_nuevo = _texto(cuerpo['anterior']), _texto(cuerpo['nuevo'])
+        compatibilidad = cuerpo.get('compatibilidad')
+        if compatibilidad is None:
+            subject = cuerpo.get('subject', os.environ.get('SUBJECT_NAME', 'orders-value'))
+            # La respuesta del registry queda en la caché con TTL del cliente
+            compatibilidad = await asyncio.to_thread(obtener_cliente().compatibilidad, subject)
+        clave = ('validate', huella_texto(texto_ant), huella_texto(texto_nuevo), compatibilidad)
+        return await self._calcular(clave, self._validar, texto_ant, texto_nuevo, compatibilidad)
+
+    # --- HTTP ---
+
+    async def atender(self, lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = linea.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                longitud = int(cabeceras.get('content-length', 0))
+                if longitud > MAX_CUERPO:
+                    await self._responder(escritor, 413, {'error': 'Cuerpo demasiado grande'}, cerrar=True)
+                    break
+                datos = await lector.readexactly(longitud) if longitud else b''
+
+                estado, respuesta = await self._despachar(metodo, ruta, datos)
+                cerrar = cabeceras.get('connection', '').lower() == 'close'
+                await self._responder(escritor, estado, respuesta, cerrar)
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self, metodo, ruta, datos):
+        if metodo == 'GET' and ruta == '/salud':
+            return 200, {'estado': 'ok', 'resultados_en_cache': len(self.resultados.entradas)}
+        if metodo != 'POST' or ruta not in ('/compare', '/validate'):
+            return 404, {'error': f"Ruta no encontrada: {metodo} {ruta}"}
+        try:
+            cuerpo = json.loads(datos or b'{}')
+            if ruta == '/compare':
+                return 200, await self.comparar(cuerpo)
+            return 200, await self.validar(cuerpo)
+        except (KeyError, ValueError) as e:
+            return 400, {'error': f"Petición no válida: {e}"}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def _responder(self, escritor, estado, cuerpo, cerrar=False):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode('utf-8')
+        cabecera = (
+            f"HTTP/1.1 {estado} {'OK' if estado == 200 else 'Error'}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+        )
+        escritor.write(cabecera.encode('latin-1') + datos)
+        await escritor.drain()
+
+
+def _texto(esquema):
+    return esquema if isinstance(esquema, str) else json.dumps(esquema)
+
+
+async def servir(host, puerto, concurrencia):
+    # Se precargan avro y los módulos de validación para que la primera
+    # petición no pague los imports; los scripts los importan bajo demanda.
+    import avro.schema  # noqa: F401
+    import columnar  # noqa: F401
+    import compare_schemas  # noqa: F401
+    import validate_compatibility  # noqa: F401
+    import valores_default  # noqa: F401
+
+    servidor_validacion = ServidorValidacion(concurrencia)
+    servidor = await asyncio.start_server(servidor_validacion.atender, host, puerto)
+    print(f"🚀 Servidor de validación escuchando en http://{host}:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP de comparación y validación de esquemas Avro")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8095)
+    parser.add_argument('--concurrencia', type=int, default=8, help="Cálculos simultáneos como máximo")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.concurrencia))
+    except KeyboardInterrupt:
+        sys.exit(0)
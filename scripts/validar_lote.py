@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Validación por lotes de muchos subjects en un solo proceso.
+#
+# Recibe un manifiesto JSON {"ruta/al/esquema.avsc": "subject", ...} o un
+# directorio con archivos .avsc. En un directorio, el subject de cada archivo
+# sale de su subjects.json (mismo formato que el manifiesto) o, para los que no
+# figuran en él, de la estrategia de nombres que se indique:
+#
+#   registro  nombre completo del esquema (RecordNameStrategy)
+#   archivo   '<nombre del archivo en minúsculas>-value'
+#
+# Sin manifiesto ni estrategia no se adivina el subject: Order.avsc se registra
+# en 'orders-value', que no sale del nombre del archivo. Las consultas al
+# Schema Registry se hacen en un pool de hilos y el parseo y la resolución en un
+# pool de procesos que importan avro una sola vez; cada subject se envía a
+# validar en cuanto llegan sus datos del registry.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from cliente_registry import ErrorRegistry, obtener_cliente
+from instrumentacion import METRICAS, etapa, registrar
+
+
+MANIFIESTO_DIRECTORIO = 'subjects.json'
+
+
+def _subject_registro(ruta):
+    with open(ruta, 'r') as f:
+        esquema = json.load(f)
+    if not isinstance(esquema, dict) or 'name' not in esquema:
+        raise ValueError(f"'{ruta}' no es un tipo con nombre: no tiene subject con la estrategia 'registro'")
+    nombre, namespace = esquema['name'], esquema.get('namespace')
+    return nombre if '.' in nombre or not namespace else f"{namespace}.{nombre}"
+
+
+ESTRATEGIAS = {
+    'registro': _subject_registro,
+    'archivo': lambda ruta: f"{os.path.splitext(os.path.basename(ruta))[0].lower()}-value",
+}
+
+
+def _leer_manifiesto(ruta):
+    with open(ruta, 'r') as f:
+        manifiesto = json.load(f)
+    # Las rutas del manifiesto son relativas al propio manifiesto
+    base = os.path.dirname(os.path.abspath(ruta))
+    return {os.path.normpath(os.path.join(base, archivo)): subject for archivo, subject in manifiesto.items()}
+
+
+def cargar_manifiesto(origen, estrategia=None):
+    # {ruta: subject}; en un directorio, subjects.json y después `estrategia`
+    if not os.path.isdir(origen):
+        return _leer_manifiesto(origen)
+
+    propio = os.path.join(origen, MANIFIESTO_DIRECTORIO)
+    declarados = _leer_manifiesto(propio) if os.path.exists(propio) else {}
+    manifiesto, sin_subject = {}, []
+    for raiz, _, archivos in os.walk(origen):
+        for archivo in sorted(archivos):
+            if not archivo.endswith('.avsc'):
+                continue
+            ruta = os.path.join(raiz, archivo)
+            subject = declarados.get(os.path.abspath(ruta))
+            if subject is None and estrategia:
+                subject = ESTRATEGIAS[estrategia](ruta)
+            if subject is None:
+                sin_subject.append(ruta)
+            else:
+                manifiesto[ruta] = subject
+    if sin_subject:
+        raise ValueError(f"Sin subject para {sin_subject}: añádelos a {propio} o indica una estrategia de nombres "
+                         f"({', '.join(ESTRATEGIAS)})")
+    return manifiesto
+
+
+def consultar_registry(subject):
+    cliente = obtener_cliente()
+    with etapa('registry', subject=subject):
+        compatibilidad = cliente.compatibilidad(subject)
+        try:
+            if compatibilidad.endswith('_TRANSITIVE'):
+                versiones = cliente.todas_las_versiones(subject)
+            else:
+                ultima = cliente.version(subject)
+                versiones = {ultima['version']: ultima['schema']}
+        except ErrorRegistry as e:
+            if e.status_code != 404:
+                raise
+            versiones = {}  # Subject nuevo: no hay nada con lo que ser compatible
+    return compatibilidad, versiones
+
+
+def validar_subject(tarea):
+    # Se ejecuta en un proceso del pool; el import es único por proceso
+    from validate_compatibility import validar_transitivo
+
+    subject, archivo, texto_nuevo, compatibilidad, versiones = tarea
+    inicio = time.perf_counter()
+    resultados, omitidas = validar_transitivo(texto_nuevo, versiones, compatibilidad, procesos=1)
+    duracion = time.perf_counter() - inicio
+    errores = [f"v{version}: {e}" for version, errs, _ in sorted(resultados) for e in errs]
+    advertencias = sorted({a for _, _, advs in resultados for a in advs})
+    return {
+        'subject': subject,
+        'archivo': archivo,
+        'compatibilidad': compatibilidad,
+        'estado': 'incompatible' if errores else 'compatible',
+        'versiones_comprobadas': len(resultados),
+        'versiones_omitidas': len(omitidas),
+        'errores': errores,
+        'advertencias': advertencias,
+        'duracion_s': round(duracion, 6),
+        # Métricas del proceso del pool; el principal las incorpora y las quita
+        'metricas': METRICAS.extraer(),
+    }
+
+
+def resultado_error(subject, archivo, error):
+    return {'subject': subject, 'archivo': archivo, 'estado': 'error', 'errores': [str(error)], 'advertencias': []}
+
+
+def validar_lote(manifiesto, hilos=16, procesos=None):
+    # Los esquemas se leen igual que en validate_compatibility: referencias al
+    # registry y tipos definidos en otros .avsc del mismo directorio incluidos
+    from validate_compatibility import leer_texto
+
+    resultados = []
+    with ThreadPoolExecutor(max_workers=hilos) as pool_hilos, \
+            ProcessPoolExecutor(max_workers=procesos) as pool_procesos:
+        consultas = {pool_hilos.submit(consultar_registry, subject): (subject, archivo)
+                     for archivo, subject in manifiesto.items()}
+
+        validaciones = {}
+        for consulta in as_completed(consultas):
+            subject, archivo = consultas[consulta]
+            try:
+                compatibilidad, versiones = consulta.result()
+                texto_nuevo = leer_texto(archivo)
+            except Exception as e:
+                resultados.append(resultado_error(subject, archivo, e))
+                continue
+            tarea = (subject, archivo, texto_nuevo, compatibilidad, versiones)
+            validaciones[pool_procesos.submit(validar_subject, tarea)] = (subject, archivo)
+
+        for validacion in as_completed(validaciones):
+            subject, archivo = validaciones[validacion]
+            try:
+                resultado = validacion.result()
+            except Exception as e:
+                resultados.append(resultado_error(subject, archivo, e))
+                continue
+            METRICAS.incorporar(resultado.pop('metricas'))
+            registrar('validacion', resultado['duracion_s'], subject=subject)
+            resultados.append(resultado)
+
+    resultados.sort(key=lambda r: r['subject'])
+    return {
+        'total': len(resultados),
+        'compatibles': sum(r['estado'] == 'compatible' for r in resultados),
+        'incompatibles': sum(r['estado'] == 'incompatible' for r in resultados),
+        'errores': sum(r['estado'] == 'error' for r in resultados),
+        'resultados': resultados,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida en lote la compatibilidad de muchos esquemas .avsc")
+    parser.add_argument('origen', help="Directorio con archivos .avsc o manifiesto JSON {ruta: subject}")
+    parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument('--hilos', type=int, default=16, help="Hilos para las consultas al Schema Registry")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos para el parseo y la resolución")
+    parser.add_argument('--estrategia', choices=sorted(ESTRATEGIAS),
+                        help=f"Subject de los .avsc de un directorio que no estén en su {MANIFIESTO_DIRECTORIO}")
+    args = parser.parse_args()
+
+    try:
+        resumen = validar_lote(cargar_manifiesto(args.origen, args.estrategia), args.hilos, args.procesos)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    salida = json.dumps(resumen, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida)
+        print(f"📊 {resumen['compatibles']} compatibles, {resumen['incompatibles']} incompatibles, "
+              f"{resumen['errores']} con error de {resumen['total']} subjects")
+    else:
+        print(salida)
+
+    sys.exit(0 if resumen['incompatibles'] == 0 and resumen['errores'] == 0 else 1)
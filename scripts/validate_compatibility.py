@@ -1,25 +1,47 @@
 #!/usr/bin/env python3
+import os
+import re
 import sys
-import requests
-from avro.schema import parse
+import time
+from functools import lru_cache
+from cache_esquemas import clave_analisis, esquema_parseado, guardar_analisis, leer_analisis
+from cliente_registry import es_referencia, leer_referencia, obtener_cliente
+from huella import huella_completa, huella_rabin
+from indice_tipos import texto_autocontenido
+from instrumentacion import contar, etapa, registrar
+from parseo_flujo import cargar_si_grande, es_grande
+from resolucion import hallazgo, resolver
+
+RAIZ_RUTA = re.compile(r'[^.\[{<]*')
+
+def leer_texto(archivo):
+    with etapa('carga'):
+        if es_referencia(archivo):
+            return leer_referencia(archivo)
+        with open(archivo, 'r') as f:
+            # Los tipos definidos en otros .avsc del mismo directorio se resuelven con el índice
+            return texto_autocontenido(archivo, f.read())
 
 def cargar_esquema(archivo):
-    with open(archivo, 'r') as f:
-        return parse(f.read())
+    # Los .avsc muy grandes se cargan en flujo, sin tener el texto completo en memoria
+    with etapa('carga'):
+        esquema = None if es_referencia(archivo) else cargar_si_grande(archivo)
+    return esquema if esquema is not None else esquema_parseado(leer_texto(archivo))
 
 def obtener_compatibilidad(schema_registry_url, subject_name):
     try:
-        response = requests.get(f"{schema_registry_url}/config/{subject_name}", timeout=10)
-        if response.status_code == 200:
-            return response.json()['compatibilityLevel']
-        response = requests.get(f"{schema_registry_url}/config", timeout=10)
-        if response.status_code == 200:
-            return response.json().get('compatibilityLevel', 'BACKWARD')
-        return 'BACKWARD'
+        return obtener_cliente(schema_registry_url).compatibilidad(subject_name)
     except Exception as e:
         print(f"❌ Error al obtener compatibilidad: {e}")
         sys.exit(1)
 
+def obtener_versiones(schema_registry_url, subject_name):
+    try:
+        return obtener_cliente(schema_registry_url).todas_las_versiones(subject_name)
+    except Exception as e:
+        print(f"❌ Error al obtener las versiones de '{subject_name}': {e}")
+        sys.exit(1)
+
 def validar_metadatos(esquema_ant, esquema_nuevo):
     errores = []
     advertencias = []
@@ -39,48 +61,123 @@ def validar_metadatos(esquema_ant, esquema_nuevo):
     return errores, advertencias
 
 def analizar_cambios(esquema_ant, esquema_nuevo):
-    campos_anteriores = {campo.name: campo for campo in esquema_ant.fields}
-    campos_nuevos = {campo.name: campo for campo in esquema_nuevo.fields}
+    with etapa('diff'):
+        return _analizar_cambios(esquema_ant, esquema_nuevo)
+
+def _campo_raiz(ruta):
+    # Campo de primer nivel de la ruta de un hallazgo ('items[]' o 'cliente.id' -> su campo)
+    return RAIZ_RUTA.match(ruta).group()
+
+def _analizar_cambios(esquema_ant, esquema_nuevo):
+    # Una sola fusión de las columnas ordenadas por nombre clasifica los campos
+    # de la raíz; solo se resuelven los comunes cuyo tipo ha cambiado y los
+    # campos sin pareja por nombre, que pueden leerse a través de 'aliases'.
+    # BACKWARD = el nuevo esquema lee datos del anterior, FORWARD = al revés.
+    # Un campo del lector sin origen en el escritor es un campo añadido
+    # (BACKWARD) o eliminado (FORWARD).
+    from columnar import fusionar_esquemas
+    fusion = fusionar_esquemas(esquema_ant, esquema_nuevo, atributos=False)
+    campos_anteriores = esquema_ant.fields
+    campos_nuevos = esquema_nuevo.fields
+    contar('campos_comparados', len(campos_anteriores) + len(campos_nuevos))
+    backward = _resolver_raiz(
+        esquema_ant, esquema_nuevo, [(nue, ant) for ant, nue in fusion.tipo_distinto],
+        fusion.añadidos, fusion.eliminados)
+    forward = _resolver_raiz(
+        esquema_nuevo, esquema_ant, fusion.tipo_distinto, fusion.eliminados, fusion.añadidos)
 
     cambios = {
         'añadidos_sin_default': [],
         'eliminados_sin_default': [],
         'añadidos_con_default': [],
         'eliminados_con_default': [],
-        'modificados': []
+        'modificados': [],
+        'promociones': [],
+        'cambios_enum': [],
+        'cambios_union': [],
+        'incompatibles_backward': [],
+        'incompatibles_forward': [],
+        'defaults_invalidos': []
     }
 
-    for nombre in campos_nuevos:
-        if nombre not in campos_anteriores:
-            campo = campos_nuevos[nombre]
-            if campo.has_default:
-                cambios['añadidos_con_default'].append(nombre)
-            else:
-                cambios['añadidos_sin_default'].append(nombre)
-
-    for nombre in campos_anteriores:
-        if nombre not in campos_nuevos:
-            campo = campos_anteriores[nombre]
-            if campo.has_default:
-                cambios['eliminados_con_default'].append(nombre)
-            else:
-                cambios['eliminados_sin_default'].append(nombre)
-
-    for nombre in campos_anteriores:
-        if nombre in campos_nuevos:
-            ant = campos_anteriores[nombre]
-            nue = campos_nuevos[nombre]
-            if ant != nue:
-                cambios['modificados'].append(nombre)
+    # Campos modificados en orden de aparición; el dict evita buscar en la lista
+    modificados = {}
+    for hallazgos, clave_incompatibles, prefijo in ((backward, 'incompatibles_backward', 'añadidos'),
+                                                     (forward, 'incompatibles_forward', 'eliminados')):
+        resto = []
+        for h in hallazgos:
+            campo = _campo_raiz(h['ruta']) or h['ruta']
+            if h['tipo'] in ('campo_con_default', 'campo_sin_default') and campo == h['ruta']:
+                sufijo = '_con_default' if h['tipo'] == 'campo_con_default' else '_sin_default'
+                cambios[prefijo + sufijo].append(h['ruta'])
+                continue
+            resto.append(h)
+            modificados.setdefault(campo, None)
+        registrar_hallazgos(cambios, resto, clave_incompatibles)
+    cambios['modificados'] = list(modificados)
+    contar('campos_resueltos', len(cambios['modificados']))
+
+    # has_default solo indica que hay un 'default': se comprueba que corresponda a su tipo
+    from valores_default import validar_defaults
+    cambios['defaults_invalidos'] = validar_defaults(esquema_nuevo)
 
     return cambios
 
+def _resolver_raiz(escritor, lector, comunes, sin_origen, sobrantes):
+    # Equivale a resolucion.resolver(escritor, lector) sin recorrer los campos
+    # comunes de tipo idéntico. `comunes` son pares (posición en el lector,
+    # posición en el escritor); `sin_origen`, los campos del lector que no están
+    # en el escritor y `sobrantes`, los del escritor que nadie lee por nombre:
+    # solo a estos puede apuntar un alias.
+    campos_escritor = escritor.fields
+    campos_lector = lector.fields
+    restantes = {campos_escritor[i].name: campos_escritor[i] for i in sobrantes}
+    parejas = [(i, campos_escritor[j]) for i, j in comunes]
+    for i in sin_origen:
+        origen = None
+        for alias in campos_lector[i].props.get('aliases') or []:
+            origen = restantes.pop(alias, None)
+            if origen is not None:
+                break
+        parejas.append((i, origen))
+    parejas.sort(key=lambda pareja: pareja[0])
+
+    # La raíz ya está visitada, como en resolver(): una referencia recursiva a
+    # ella desde un campo no vuelve a recorrer el record completo
+    memo = {(id(escritor), id(lector))}
+    hallazgos = []
+    for i, origen in parejas:
+        campo = campos_lector[i]
+        if origen is not None:
+            hallazgos.extend(resolver(origen.type, campo.type, campo.name, memo))
+        elif campo.has_default:
+            hallazgos.append(hallazgo(campo.name, 'campo_con_default', "ausente en el escritor, se usa el default", True))
+        else:
+            hallazgos.append(hallazgo(campo.name, 'campo_sin_default', "ausente en el escritor y sin default en el lector", False))
+    return hallazgos
+
+def registrar_hallazgos(cambios, hallazgos, clave_incompatibles):
+    for h in hallazgos:
+        descripcion = f"{h['ruta']}: {h['detalle']}"
+        if not h['compatible']:
+            cambios[clave_incompatibles].append(descripcion)
+        # Las promociones y cambios de enum/unión se detectan en ambos sentidos;
+        # se anotan solo desde el punto de vista del nuevo esquema como lector.
+        if clave_incompatibles == 'incompatibles_backward':
+            if h['tipo'] == 'promocion':
+                cambios['promociones'].append(descripcion)
+            elif h['tipo'] == 'enum_simbolos':
+                cambios['cambios_enum'].append(descripcion)
+            elif h['tipo'] == 'union_ramas':
+                cambios['cambios_union'].append(descripcion)
+
 def validar_compatibilidad(cambios, compatibilidad):
     errores = []
     advertencias = []
 
-    if cambios['modificados']:
-        errores.append(f"Modificación de campos existentes no permitida: {cambios['modificados']}")
+    # Un default que no corresponde a su tipo rompe la lectura en cualquier modo
+    if cambios['defaults_invalidos']:
+        errores.append(f"Valores por defecto que no corresponden a su tipo: {cambios['defaults_invalidos']}")
 
     if compatibilidad.startswith('BACKWARD'):
         if cambios['añadidos_sin_default']:
@@ -88,12 +185,20 @@ def validar_compatibilidad(cambios, compatibilidad):
                 f"BACKWARD: Campos añadidos sin valor por defecto: {cambios['añadidos_sin_default']}. "
                 "Deben tener 'default' o usar FORWARD compatibility."
             )
+        if cambios['incompatibles_backward']:
+            errores.append(
+                f"BACKWARD: El nuevo esquema no puede leer datos del anterior: {cambios['incompatibles_backward']}"
+            )
     if compatibilidad.startswith('FORWARD'):
         if cambios['eliminados_sin_default']:
             errores.append(
                 f"FORWARD: Campos eliminados sin valor por defecto: {cambios['eliminados_sin_default']}. "
                 "Deben mantenerse o usar BACKWARD compatibility."
             )
+        if cambios['incompatibles_forward']:
+            errores.append(
+                f"FORWARD: El esquema anterior no puede leer datos del nuevo: {cambios['incompatibles_forward']}"
+            )
     if compatibilidad.startswith('FULL'):
         if cambios['añadidos_sin_default'] or cambios['eliminados_sin_default']:
             errores.append(
@@ -101,30 +206,167 @@ def validar_compatibilidad(cambios, compatibilidad):
                 f"Añadidos sin default: {cambios['añadidos_sin_default']}. "
                 f"Eliminados sin default: {cambios['eliminados_sin_default']}."
             )
+        if cambios['incompatibles_backward'] or cambios['incompatibles_forward']:
+            errores.append(
+                f"FULL: Modificaciones incompatibles en campos existentes. "
+                f"BACKWARD: {cambios['incompatibles_backward']}. "
+                f"FORWARD: {cambios['incompatibles_forward']}."
+            )
 
     if cambios['añadidos_con_default']:
         advertencias.append(f"Campos añadidos con valor por defecto: {cambios['añadidos_con_default']}")
     if cambios['eliminados_con_default']:
         advertencias.append(f"Campos eliminados con valor por defecto: {cambios['eliminados_con_default']}")
+    if cambios['promociones']:
+        advertencias.append(f"Promociones de tipo: {cambios['promociones']}")
+    if cambios['cambios_enum']:
+        advertencias.append(f"Cambios en símbolos de enums: {cambios['cambios_enum']}")
+    if cambios['cambios_union']:
+        advertencias.append(f"Cambios en ramas de uniones: {cambios['cambios_union']}")
 
     return errores, advertencias
 
+@lru_cache(maxsize=1024)
+def parsear_texto(texto):
+    # Cada proceso parsea una sola vez el esquema candidato y cada versión histórica
+    return esquema_parseado(texto)
+
+def analizar_textos(texto_ant, texto_nuevo):
+    # El resultado del análisis depende solo del contenido de ambos esquemas:
+    # se reutiliza desde la caché en disco sin volver a parsear.
+    clave = clave_analisis('validacion', texto_ant, texto_nuevo)
+    analisis = leer_analisis(clave)
+    if analisis is None:
+        esquema_ant = parsear_texto(texto_ant)
+        esquema_nuevo = parsear_texto(texto_nuevo)
+        errores_meta, advertencias_meta = validar_metadatos(esquema_ant, esquema_nuevo)
+        cambios = None if errores_meta else analizar_cambios(esquema_ant, esquema_nuevo)
+        analisis = {'errores_meta': errores_meta, 'advertencias_meta': advertencias_meta, 'cambios': cambios}
+        guardar_analisis(clave, analisis)
+    return analisis['errores_meta'], analisis['advertencias_meta'], analisis['cambios']
+
+def validar_par(texto_ant, texto_nuevo, compatibilidad):
+    errores, advertencias, cambios = analizar_textos(texto_ant, texto_nuevo)
+    if errores:
+        return errores, advertencias
+
+    errores_campos, advertencias_campos = validar_compatibilidad(cambios, compatibilidad)
+    return errores + errores_campos, advertencias + advertencias_campos
+
+def _validar_version(tarea):
+    version, texto_ant, texto_nuevo, compatibilidad = tarea
+    errores, advertencias = validar_par(texto_ant, texto_nuevo, compatibilidad)
+    return version, errores, advertencias
+
+def validar_transitivo(texto_nuevo, versiones, compatibilidad, procesos=None):
+    # Los modos *_TRANSITIVE aplican la regla base contra cada versión registrada
+    compatibilidad_base = compatibilidad.replace('_TRANSITIVE', '')
+    huella_nueva = huella_completa(texto_nuevo)
+
+    # Deduplicación por JSON normalizado (con defaults y aliases, sin 'doc'):
+    # las versiones idénticas al candidato son compatibles por definición y
+    # las repetidas se comprueban una vez. La forma canónica no sirve: dos
+    # versiones que solo difieren en un default se resuelven distinto.
+    unicas = {}
+    omitidas = []
+    for version in sorted(versiones):
+        huella_version = huella_completa(versiones[version])
+        if huella_version == huella_nueva:
+            omitidas.append((version, 'idéntica al nuevo esquema'))
+        elif huella_version in unicas:
+            omitidas.append((version, f"idéntica a la versión {unicas[huella_version][0]}"))
+        else:
+            unicas[huella_version] = (version, versiones[version])
+
+    tareas = [(version, texto, texto_nuevo, compatibilidad_base) for version, texto in unicas.values()]
+    if procesos == 1 or len(tareas) < 2:
+        resultados = [_validar_version(tarea) for tarea in tareas]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            trozo = max(1, len(tareas) // ((procesos or 4) * 4))
+            resultados = list(pool.map(_validar_version, tareas, chunksize=trozo))
+
+    return resultados, omitidas
+
+def ejecutar_transitivo(archivo_nuevo, procesos=None):
+    with open(archivo_nuevo, 'r') as f:
+        texto_nuevo = f.read()
+
+    schema_registry_url = os.environ.get('SCHEMA_REGISTRY_URL', "http://schema-registry:8081")
+    subject_name = os.environ.get('SUBJECT_NAME', "orders-value")
+    compatibilidad = obtener_compatibilidad(schema_registry_url, subject_name)
+    print(f"🔍 Modo de compatibilidad: {compatibilidad} (validación transitiva)")
+
+    versiones = obtener_versiones(schema_registry_url, subject_name)
+    with etapa('validacion', subject=subject_name, modo='transitivo'):
+        resultados, omitidas = validar_transitivo(texto_nuevo, versiones, compatibilidad, procesos)
+    contar('versiones_comprobadas', len(resultados), subject=subject_name)
+    print(f"📚 Versiones registradas: {len(versiones)}, comprobadas: {len(resultados)}, omitidas: {len(omitidas)}")
+    for version, motivo in omitidas:
+        print(f" - Versión {version} omitida: {motivo}")
+
+    incompatibles = 0
+    for version, errores, advertencias in sorted(resultados):
+        if errores:
+            incompatibles += 1
+            print(f"\n❌ Versión {version}:")
+            for e in errores:
+                print(f" - {e}")
+        elif advertencias:
+            print(f"\n⚠️ Versión {version}:")
+            for a in advertencias:
+                print(f" - {a}")
+
+    if incompatibles:
+        print(f"\n❌ El esquema es incompatible con {incompatibles} versión(es) registrada(s)")
+        sys.exit(1)
+
+    print("\n✅ El esquema es compatible con todas las versiones registradas")
+    sys.exit(0)
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == '--transitivo':
+        try:
+            procesos = int(sys.argv[3]) if len(sys.argv) > 3 else None
+            ejecutar_transitivo(sys.argv[2], procesos)
+        except Exception as e:
+            print(f"\n❌ Error crítico: {str(e)}")
+            sys.exit(1)
+
     if len(sys.argv) != 3:
         print("Uso: python validate_compatibility.py <esquema_anterior.avsc> <esquema_nuevo.avsc>")
+        print("     python validate_compatibility.py --transitivo <esquema_nuevo.avsc> [procesos]")
         sys.exit(1)
 
+    subject_name = os.environ.get('SUBJECT_NAME', "orders-value")
+    inicio = time.perf_counter()
     try:
-        esquema_ant = cargar_esquema(sys.argv[1])
-        esquema_nuevo = cargar_esquema(sys.argv[2])
+        if any(es_grande(a) for a in sys.argv[1:]):
+            # Esquemas muy grandes: en flujo, sin el atajo de la huella ni la caché
+            # de análisis, que exigen el texto completo
+            esquema_ant = cargar_esquema(sys.argv[1])
+            esquema_nuevo = cargar_esquema(sys.argv[2])
+            errores_meta, advertencias_meta = validar_metadatos(esquema_ant, esquema_nuevo)
+            cambios = None if errores_meta else analizar_cambios(esquema_ant, esquema_nuevo)
+        else:
+            texto_ant = leer_texto(sys.argv[1])
+            texto_nuevo = leer_texto(sys.argv[2])
 
-        schema_registry_url = "http://schema-registry:8081"
-        subject_name = "orders-value"
+            # Atajo: con el mismo JSON salvo 'doc' el esquema es compatible en
+            # cualquier modo y no hace falta el registry. La forma canónica no
+            # basta: no ve un default quitado ni uno que no corresponde a su tipo.
+            if huella_completa(texto_ant) == huella_completa(texto_nuevo):
+                print(f"✅ Sin cambios semánticos (huella {huella_rabin(texto_nuevo)}): el esquema es compatible")
+                sys.exit(0)
+
+            errores_meta, advertencias_meta, cambios = analizar_textos(texto_ant, texto_nuevo)
+
+        schema_registry_url = os.environ.get('SCHEMA_REGISTRY_URL', "http://schema-registry:8081")
         compatibilidad = obtener_compatibilidad(schema_registry_url, subject_name)
         print(f"🔍 Modo de compatibilidad: {compatibilidad}")
 
         # Validación de metadatos iniciales
-        errores_meta, advertencias_meta = validar_metadatos(esquema_ant, esquema_nuevo)
         if errores_meta:
             print("\n❌ Errores de metadatos:")
             for e in errores_meta:
@@ -136,13 +378,16 @@ if __name__ == "__main__":
                 print(f" - {a}")
 
         # Análisis y validación de campos
-        cambios = analizar_cambios(esquema_ant, esquema_nuevo)
         print("📊 Cambios detectados:")
         print(f" - Añadidos sin default: {cambios['añadidos_sin_default']}")
         print(f" - Eliminados sin default: {cambios['eliminados_sin_default']}")
         print(f" - Añadidos con default: {cambios['añadidos_con_default']}")
         print(f" - Eliminados con default: {cambios['eliminados_con_default']}")
         print(f" - Modificados: {cambios['modificados']}")
+        print(f" - Promociones de tipo: {cambios['promociones']}")
+        print(f" - Cambios en enums: {cambios['cambios_enum']}")
+        print(f" - Cambios en uniones: {cambios['cambios_union']}")
+        print(f" - Defaults inválidos: {cambios['defaults_invalidos']}")
 
         errores, advertencias = validar_compatibilidad(cambios, compatibilidad)
 
@@ -163,6 +408,9 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ Error crítico: {str(e)}")
         sys.exit(1)
+    finally:
+        # Latencia de la validación por subject, también cuando termina con sys.exit
+        registrar('validacion', time.perf_counter() - inicio, subject=subject_name)
 
 
 
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Validación de los valores por defecto de un esquema y su codificación binaria.
+#
+# avro parsea el esquema sin comprobar que cada 'default' corresponda al tipo
+# de su campo. Aquí se comprueban según la especificación, también dentro de
+# records anidados, arrays y maps: las uniones solo admiten un default de su
+# primera rama, los enums uno de sus símbolos, bytes y fixed una cadena con
+# caracteres de 0 a 255 (fixed, de su tamaño exacto) y float/double cualquier
+# número JSON (el 1 de 'discount' en Order.avsc es válido).
+#
+# Cada default válido se codifica en binario una sola vez y se guarda en una
+# LRU por firma del tipo (diferencias.firma_tipo, memorizada por nodo) y por
+# el JSON del valor: los lectores compilados de codec.py
+# decodifican esos bytes para dar a cada registro su propia copia de un default
+# mutable (array, map o record), sin serializarlo de nuevo con json.
+#
+#   python valores_default.py common/src/main/avro/Order.avsc
+import json
+import sys
+
+from cliente_registry import CacheTTL
+from codec import DecodificadorMemoria, compilar_escritor, compilar_lector, escribir_long, valor_default
+from diferencias import firma_tipo
+from resolucion import TIPOS_CON_NOMBRE
+
+MAX_DEFAULTS = 4096
+RANGOS = {'int': (-0x80000000, 0x7FFFFFFF), 'long': (-(1 << 63), (1 << 63) - 1)}
+
+
+def _mostrar(valor):
+    return json.dumps(valor, ensure_ascii=False)
+
+
+def errores_valor(tipo, valor, ruta):
+    # Motivos por los que `valor` (JSON) no es un default válido de `tipo`
+    t = tipo.type
+    if t == 'union':
+        return errores_valor(tipo.schemas[0], valor, ruta)
+    if t == 'null':
+        valido = valor is None
+    elif t == 'boolean':
+        valido = isinstance(valor, bool)
+    elif t in RANGOS:
+        minimo, maximo = RANGOS[t]
+        valido = isinstance(valor, int) and not isinstance(valor, bool) and minimo <= valor <= maximo
+    elif t in ('float', 'double'):
+        valido = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+    elif t == 'string':
+        valido = isinstance(valor, str)
+    elif t in ('bytes', 'fixed'):
+        valido = isinstance(valor, str) and all(ord(c) < 256 for c in valor)
+        if valido and t == 'fixed' and len(valor) != tipo.size:
+            return [f"{ruta}: el default {_mostrar(valor)} tiene {len(valor)} bytes y el fixed "
+                    f"'{tipo.fullname}' espera {tipo.size}"]
+    elif t == 'enum':
+        valido = valor in tipo.symbols
+        if isinstance(valor, str) and not valido:
+            return [f"{ruta}: el default '{valor}' no es un símbolo de '{tipo.fullname}'"]
+    elif t == 'array':
+        if not isinstance(valor, list):
+            return [f"{ruta}: el default {_mostrar(valor)} no es un array"]
+        return [e for i, v in enumerate(valor) for e in errores_valor(tipo.items, v, f"{ruta}[{i}]")]
+    elif t == 'map':
+        if not isinstance(valor, dict):
+            return [f"{ruta}: el default {_mostrar(valor)} no es un map"]
+        return [e for k, v in valor.items() for e in errores_valor(tipo.values, v, f"{ruta}[{k}]")]
+    elif t in ('record', 'error'):
+        if not isinstance(valor, dict):
+            return [f"{ruta}: el default {_mostrar(valor)} no es un record '{tipo.fullname}'"]
+        errores = []
+        for campo in tipo.fields:
+            if campo.name in valor:
+                errores += errores_valor(campo.type, valor[campo.name], f"{ruta}.{campo.name}")
+            elif not campo.has_default:
+                errores.append(f"{ruta}: al default le falta el campo '{campo.name}', que no tiene default")
+        return errores
+    else:
+        valido = False
+    return [] if valido else [f"{ruta}: el default {_mostrar(valor)} no es válido para '{t}'"]
+
+
+def validar_defaults(esquema):
+    # Todos los defaults del esquema; cada tipo con nombre se recorre una vez
+    errores = []
+    visitados = set()
+
+    def recorrer(tipo, ruta):
+        if tipo.type in TIPOS_CON_NOMBRE:
+            if tipo.fullname in visitados:
+                return
+            visitados.add(tipo.fullname)
+        if tipo.type in ('record', 'error'):
+            for campo in tipo.fields:
+                ruta_campo = f"{ruta}.{campo.name}" if ruta else campo.name
+                if campo.has_default:
+                    errores.extend(errores_valor(campo.type, campo.default, ruta_campo))
+                recorrer(campo.type, ruta_campo)
+        elif tipo.type == 'enum':
+            default = tipo.props.get('default')
+            if default is not None and default not in tipo.symbols:
+                errores.append(f"{ruta or tipo.fullname}: el default '{default}' no es un símbolo de '{tipo.fullname}'")
+        elif tipo.type == 'union':
+            for rama in tipo.schemas:
+                recorrer(rama, ruta)
+        elif tipo.type == 'array':
+            recorrer(tipo.items, f"{ruta}[]")
+        elif tipo.type == 'map':
+            recorrer(tipo.values, f"{ruta}{{}}")
+
+    recorrer(esquema, '')
+    return errores
+
+
+_codificados = CacheTTL(MAX_DEFAULTS)
+
+
+def default_codificado(tipo, valor, firmas=None):
+    # Codificación binaria del default `valor` (JSON) de `tipo`, calculada una
+    # vez. `firmas` es el memo de firma_tipo: al compartirlo entre los defaults
+    # de un mismo esquema cada nodo de tipo se resume una sola vez.
+    clave = (firma_tipo(tipo, {} if firmas is None else firmas), json.dumps(valor, sort_keys=True))
+    datos = _codificados.obtener(clave)
+    if datos is None:
+        errores = errores_valor(tipo, valor, 'default')
+        if errores:
+            raise ValueError('; '.join(errores))
+        salida = bytearray()
+        if tipo.type == 'union':
+            # El default siempre es de la primera rama
+            escribir_long(0, salida)
+            compilar_escritor(tipo.schemas[0])(valor_default(tipo, valor), salida)
+        else:
+            compilar_escritor(tipo)(valor_default(tipo, valor), salida)
+        datos = bytes(salida)
+        _codificados.guardar(clave, datos)
+    return datos
+
+
+def lector_default(tipo, valor, firmas=None):
+    # Función sin argumentos que devuelve una copia nueva del default decodificándolo.
+    # Memo propio: el del lector que la pide resuelve otro escritor con los mismos nombres
+    datos = default_codificado(tipo, valor, firmas)
+    leer = compilar_lector(tipo, tipo)
+    return lambda: leer(DecodificadorMemoria(datos))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python valores_default.py <esquema.avsc> [esquema.avsc...]")
+        sys.exit(1)
+
+    from validate_compatibility import cargar_esquema
+
+    invalidos = 0
+    for archivo in sys.argv[1:]:
+        try:
+            errores = validar_defaults(cargar_esquema(archivo))
+        except Exception as e:
+            print(f"❌ Error crítico: {e}")
+            sys.exit(1)
+        invalidos += len(errores)
+        if errores:
+            print(f"❌ {archivo}:")
+            for e in errores:
+                print(f" - {e}")
+        else:
+            print(f"✅ {archivo}: todos los defaults corresponden a su tipo")
+    sys.exit(1 if invalidos else 0)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# Decodificación de volcados de un topic (p. ej. 'orders') en formato de Confluent.
+#
+# El volcado es una secuencia de mensajes con un prefijo de longitud:
+#   <longitud:u32 big-endian> <0x00> <schema_id:u32 big-endian> <datos Avro>
+#
+# El proceso principal recorre el archivo por mmap leyendo solo las cabeceras:
+# reúne los IDs de esquema, que se piden una sola vez al registry (o al
+# espejo), y corta el archivo en bloques. Cada proceso del pool mapea el mismo
+# archivo, decodifica sus bloques con el codec compilado de cada ID y escribe
+# directamente sus partes de salida, agrupadas por ID de esquema:
+#
+#   <salida>/schema-<id>/parte-<bloque>.jsonl      (un registro JSON por línea)
+#   <salida>/schema-<id>/parte-<bloque>.json       (--formato columnas: {campo: [valores]})
+#   <salida>/schema-<id>/parte-<bloque>.parquet    (--formato parquet, requiere pyarrow)
+#
+#   python volcado.py orders.dump --salida orders/ [--lector Order.avsc]
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from codec import BYTE_MAGICO, CABECERA_CONFLUENT, obtener_codec
+
+LONGITUD = struct.Struct('>I')
+TAMAÑO_BLOQUE = 64 * 1024 * 1024
+MAX_ERRORES = 20
+FORMATOS = ('jsonl', 'columnas', 'parquet')
+EXTENSIONES = {'jsonl': 'jsonl', 'columnas': 'json', 'parquet': 'parquet'}
+
+
+def escribir_volcado(ruta, mensajes):
+    # Volcado con prefijo de longitud a partir de mensajes ya enmarcados
+    with open(ruta, 'wb') as f:
+        for mensaje in mensajes:
+            f.write(LONGITUD.pack(len(mensaje)))
+            f.write(mensaje)
+
+
+def explorar(mapa, tamaño_bloque=TAMAÑO_BLOQUE):
+    # Recorre solo las cabeceras: devuelve los bloques [(inicio, fin)] cortados
+    # en límites de mensaje y los IDs de esquema presentes
+    bloques, ids = [], set()
+    fin = len(mapa)
+    inicio = pos = 0
+    while pos < fin:
+        if pos + LONGITUD.size > fin:
+            raise ValueError(f"Volcado truncado: cabecera incompleta en la posición {pos}")
+        (longitud,) = LONGITUD.unpack_from(mapa, pos)
+        if longitud >= CABECERA_CONFLUENT.size:
+            magico, schema_id = CABECERA_CONFLUENT.unpack_from(mapa, pos + LONGITUD.size)
+            if magico == BYTE_MAGICO:
+                ids.add(schema_id)
+        pos += LONGITUD.size + longitud
+        if pos - inicio >= tamaño_bloque:
+            bloques.append((inicio, pos))
+            inicio = pos
+    if pos > fin:
+        raise ValueError(f"Volcado truncado: el último mensaje termina en {pos} y el archivo en {fin}")
+    if inicio < fin:
+        bloques.append((inicio, fin))
+    return bloques, ids
+
+
+def _a_json(valor):
+    # Igual que la codificación JSON de Avro para bytes; el resto como texto
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('latin-1')
+    return str(valor)
+
+
+def _escribir_parte(ruta, registros, formato):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    if formato == 'jsonl':
+        codificador = json.JSONEncoder(ensure_ascii=False, default=_a_json)
+        with open(ruta, 'w') as f:
+            f.writelines(codificador.encode(registro) + '\n' for registro in registros)
+    elif formato == 'columnas':
+        columnas = {}
+        for registro in registros:
+            for campo, valor in registro.items():
+                columnas.setdefault(campo, []).append(valor)
+        with open(ruta, 'w') as f:
+            json.dump(columnas, f, ensure_ascii=False, default=_a_json)
+    else:
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(registros), ruta)
+
+
+# Estado de cada proceso del pool, fijado por el inicializador
+_trabajo = {}
+
+
+def _inicializar(ruta, esquemas, lector, salida, formato):
+    archivo = open(ruta, 'rb')
+    _trabajo.update({
+        'vista': memoryview(mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)),
+        'esquemas': esquemas,
+        'lector': lector,
+        'salida': salida,
+        'formato': formato,
+        'codecs': {},
+    })
+
+
+def decodificar_bloque(tarea):
+    numero, inicio, fin = tarea
+    vista, codecs = _trabajo['vista'], _trabajo['codecs']
+    grupos, errores, n_errores = {}, [], 0
+
+    pos = inicio
+    while pos < fin:
+        (longitud,) = LONGITUD.unpack_from(vista, pos)
+        mensaje = pos + LONGITUD.size
+        pos = mensaje + longitud
+        try:
+            magico, schema_id = CABECERA_CONFLUENT.unpack_from(vista, mensaje)
+            if magico != BYTE_MAGICO or longitud < CABECERA_CONFLUENT.size:
+                raise ValueError(f"Byte mágico {magico}: el mensaje no está en formato de Confluent")
+            codec = codecs.get(schema_id)
+            if codec is None:
+                codec = codecs[schema_id] = obtener_codec(_trabajo['esquemas'][schema_id], _trabajo['lector'])
+            # El corte del memoryview limita la lectura al mensaje sin copiarlo
+            valor = codec.decodificar(vista[mensaje:pos], CABECERA_CONFLUENT.size)
+        except Exception as e:
+            n_errores += 1
+            if len(errores) < MAX_ERRORES:
+                errores.append(f"posición {mensaje - LONGITUD.size}: {str(e).splitlines()[0]}")
+            continue
+        grupos.setdefault(schema_id, []).append(valor)
+
+    formato = _trabajo['formato']
+    for schema_id, registros in grupos.items():
+        ruta = os.path.join(_trabajo['salida'], f"schema-{schema_id}", f"parte-{numero:05d}.{EXTENSIONES[formato]}")
+        _escribir_parte(ruta, registros, formato)
+    return {schema_id: len(registros) for schema_id, registros in grupos.items()}, n_errores, errores
+
+
+def decodificar_volcado(ruta, salida, formato='jsonl', lector=None, procesos=None, tamaño_bloque=TAMAÑO_BLOQUE, cliente=None):
+    with open(ruta, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {'mensajes': {}, 'errores': 0, 'ejemplos_errores': [], 'bytes': 0, 'bloques': 0}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            bloques, ids = explorar(mapa, tamaño_bloque)
+            tamaño = len(mapa)
+
+    # Un esquema escritor por ID, pedido una sola vez para todos los procesos
+    if cliente is None:
+        from cliente_registry import obtener_cliente
+        cliente = obtener_cliente()
+    esquemas = {}
+    for schema_id in sorted(ids):
+        try:
+            esquemas[schema_id] = cliente.esquema_por_id(schema_id)
+        except Exception as e:
+            print(f"⚠️ No se pudo obtener el esquema {schema_id}: {e}", file=sys.stderr)
+
+    tareas = [(numero, inicio, fin) for numero, (inicio, fin) in enumerate(bloques)]
+    argumentos = (ruta, esquemas, lector, salida, formato)
+    if procesos == 1 or len(tareas) == 1:
+        _inicializar(*argumentos)
+        resultados = [decodificar_bloque(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar, initargs=argumentos) as pool:
+            resultados = list(pool.map(decodificar_bloque, tareas))
+
+    mensajes, n_errores, ejemplos = {}, 0, []
+    for conteos, errores_bloque, ejemplos_bloque in resultados:
+        for schema_id, n in conteos.items():
+            mensajes[schema_id] = mensajes.get(schema_id, 0) + n
+        n_errores += errores_bloque
+        ejemplos.extend(ejemplos_bloque[:MAX_ERRORES - len(ejemplos)])
+    return {'mensajes': mensajes, 'errores': n_errores, 'ejemplos_errores': ejemplos, 'bytes': tamaño, 'bloques': len(bloques)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decodifica un volcado de mensajes en formato de Confluent")
+    parser.add_argument('volcado', help="Archivo con mensajes <longitud:u32 BE><0x00><schema_id:u32 BE><Avro>")
+    parser.add_argument('--salida', required=True, help="Directorio de salida (una carpeta por ID de esquema)")
+    parser.add_argument('--formato', choices=FORMATOS, default='jsonl')
+    parser.add_argument('--lector', help="Esquema .avsc con el que leer todos los mensajes (por defecto, el escritor)")
+    parser.add_argument('--procesos', type=int, help="Procesos para decodificar en paralelo")
+    parser.add_argument('--bloque-mb', type=int, default=TAMAÑO_BLOQUE // (1024 * 1024), help="Tamaño aproximado de cada bloque")
+    args = parser.parse_args()
+
+    try:
+        if args.formato == 'parquet':
+            import pyarrow  # noqa: F401
+        lector = None
+        if args.lector:
+            with open(args.lector, 'r') as f:
+                lector = f.read()
+        inicio = time.perf_counter()
+        resumen = decodificar_volcado(args.volcado, args.salida, args.formato, lector, args.procesos,
+                                      args.bloque_mb * 1024 * 1024)
+        duracion = time.perf_counter() - inicio
+    except ImportError:
+        print("❌ Error crítico: --formato parquet requiere pyarrow (pip install pyarrow)")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error crítico: {e}")
+        sys.exit(1)
+
+    total = sum(resumen['mensajes'].values())
+    print(f"📊 {total} mensajes decodificados en {resumen['bloques']} bloques, "
+          f"{resumen['bytes'] / (1024 * 1024) / duracion:.1f} MB/s ({total / duracion:,.0f} mensajes/s)")
+    for schema_id, n in sorted(resumen['mensajes'].items()):
+        print(f" - schema {schema_id}: {n} mensajes → {os.path.join(args.salida, f'schema-{schema_id}')}")
+    if resumen['errores']:
+        print(f"\n❌ {resumen['errores']} mensajes no se pudieron decodificar:")
+        for e in resumen['ejemplos_errores']:
+            print(f" - {e}")
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,34 @@
+# Los scripts son módulos sueltos en scripts/: se importan igual que cuando
+# se ejecutan desde ese directorio.
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUTA_ORDER = os.path.join(RAIZ, 'common', 'src', 'main', 'avro', 'Order.avsc')
+
+sys.path.insert(0, os.path.join(RAIZ, 'scripts'))
+
+
+@pytest.fixture(autouse=True)
+def sin_cache_en_disco(monkeypatch):
+    # Las pruebas no leen ni escriben la caché de análisis del usuario
+    monkeypatch.setenv('SCHEMA_CACHE_DIR', '')
+
+
+@pytest.fixture
+def texto_order():
+    with open(RUTA_ORDER, 'r') as f:
+        return f.read()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Registry falso y entorno limpio: sin espejo, caché del cliente ni métricas
+    from registry_falso import RegistryFalso
+
+    for variable in ('ESPEJO_REGISTRY', 'REGISTRY_CACHE', 'METRICAS_SALIDA'):
+        monkeypatch.delenv(variable, raising=False)
+    with RegistryFalso() as registry:
+        yield registry
@@ -0,0 +1,52 @@
+# Arranque en frío de los scripts en caminos que no necesitan avro ni red (uso
+# incorrecto, archivo inexistente). El presupuesto es relativo a `python -c
+# pass` medido en la misma máquina, para que no dependa de lo rápido que sea
+# el agente de CI.
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+DIRECTORIO_SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+# Veces el arranque del intérprete vacío que puede tardar cada script
+PRESUPUESTO_RELATIVO = 3.0
+REPETICIONES = 5
+# Módulos que los scripts no deben importar hasta que los necesitan
+IMPORTS_DIFERIDOS = ('requests', 'avro.schema', 'concurrent.futures.process')
+CASOS_ARRANQUE = {
+    'compare_schemas': ['no_existe.avsc', 'no_existe.avsc'],
+    'validate_compatibility': [],
+}
+
+
+def cronometrar(comando):
+    # Mínimo de varias ejecuciones: es la medida menos sensible al ruido
+    mejor = float('inf')
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=DIRECTORIO_SCRIPTS, capture_output=True)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+@pytest.fixture(scope='module')
+def arranque_python():
+    return cronometrar([sys.executable, '-c', 'pass'])
+
+
+@pytest.mark.parametrize('script', sorted(CASOS_ARRANQUE))
+def test_no_importa_modulos_diferidos(script):
+    salida = subprocess.run([sys.executable, '-c', f"import sys, {script}; print('\\n'.join(sys.modules))"],
+                            cwd=DIRECTORIO_SCRIPTS, capture_output=True, text=True, check=True)
+    importados = set(salida.stdout.split())
+    assert not importados & set(IMPORTS_DIFERIDOS)
+
+
+@pytest.mark.parametrize('script', sorted(CASOS_ARRANQUE))
+def test_presupuesto_de_arranque(script, arranque_python):
+    tiempo = cronometrar([sys.executable, f"{script}.py", *CASOS_ARRANQUE[script]])
+    assert tiempo <= arranque_python * PRESUPUESTO_RELATIVO, \
+        f"{script}: {tiempo:.4f}s > {PRESUPUESTO_RELATIVO}x {arranque_python:.4f}s"
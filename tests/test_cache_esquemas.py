@@ -0,0 +1,24 @@
+# Caché en disco de los análisis: la ruta depende del código que los produce.
+import cache_esquemas
+from cache_esquemas import clave_analisis, guardar_analisis, leer_analisis
+
+
+def test_acierto_con_el_mismo_codigo(monkeypatch, tmp_path):
+    monkeypatch.setenv('SCHEMA_CACHE_DIR', str(tmp_path))
+    clave = clave_analisis('validacion', 'a', 'b')
+    guardar_analisis(clave, {'errores': []})
+    assert leer_analisis(clave) == {'errores': []}
+
+
+def test_otro_codigo_de_analisis_no_reutiliza_resultados(monkeypatch, tmp_path):
+    monkeypatch.setenv('SCHEMA_CACHE_DIR', str(tmp_path))
+    clave = clave_analisis('validacion', 'a', 'b')
+    guardar_analisis(clave, {'errores': []})
+
+    # Simula un cambio en los módulos de análisis
+    monkeypatch.setattr(cache_esquemas, 'MODULOS_ANALISIS', cache_esquemas.MODULOS_ANALISIS + ('huella.py',))
+    cache_esquemas.version_codigo.cache_clear()
+    try:
+        assert leer_analisis(clave) is None
+    finally:
+        cache_esquemas.version_codigo.cache_clear()
@@ -0,0 +1,138 @@
+# Codificación y decodificación compiladas frente a DatumWriter/DatumReader de avro.
+import datetime
+import decimal
+import io
+import json
+
+import avro.errors
+import pytest
+from avro.io import BinaryDecoder, BinaryEncoder, DatumReader, DatumWriter
+from avro.schema import parse
+
+from codec import DecodificadorMemoria, compilar_escritor, compilar_lector, escribir_long
+
+COMPLETO = {
+    'type': 'record', 'name': 'Completo', 'namespace': 'pruebas', 'fields': [
+        {'name': 'nulo', 'type': 'null'},
+        {'name': 'booleano', 'type': 'boolean'},
+        {'name': 'entero', 'type': 'int'},
+        {'name': 'largo', 'type': 'long'},
+        {'name': 'simple', 'type': 'float'},
+        {'name': 'doble', 'type': 'double'},
+        {'name': 'binario', 'type': 'bytes'},
+        {'name': 'texto', 'type': 'string'},
+        {'name': 'fijo', 'type': {'type': 'fixed', 'name': 'Cuatro', 'size': 4}},
+        {'name': 'color', 'type': {'type': 'enum', 'name': 'Color', 'symbols': ['ROJO', 'VERDE', 'AZUL']}},
+        {'name': 'lista', 'type': {'type': 'array', 'items': 'long'}},
+        {'name': 'mapa', 'type': {'type': 'map', 'values': ['null', 'string']}},
+        {'name': 'opcional', 'type': ['null', 'Completo'], 'default': None},
+        {'name': 'fecha', 'type': {'type': 'int', 'logicalType': 'date'}},
+        {'name': 'instante', 'type': {'type': 'long', 'logicalType': 'timestamp-millis'}},
+        {'name': 'importe', 'type': {'type': 'bytes', 'logicalType': 'decimal', 'precision': 10, 'scale': 2}},
+    ]}
+
+
+def registro(profundidad=1):
+    return {
+        'nulo': None, 'booleano': True, 'entero': -123456, 'largo': 1 << 40, 'simple': 1.5, 'doble': -2.25,
+        'binario': b'\x00\xff', 'texto': 'año', 'fijo': b'abcd', 'color': 'VERDE', 'lista': [1, -2, 3],
+        'mapa': {'a': None, 'b': 'x'}, 'opcional': registro(profundidad - 1) if profundidad else None,
+        'fecha': datetime.date(2024, 2, 29),
+        'instante': datetime.datetime(2024, 1, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        'importe': decimal.Decimal('12.34'),
+    }
+
+
+def codificar_avro(esquema, valor):
+    salida = io.BytesIO()
+    DatumWriter(esquema).write(valor, BinaryEncoder(salida))
+    return salida.getvalue()
+
+
+def decodificar_avro(escritor, lector, datos):
+    return DatumReader(escritor, lector).read(BinaryDecoder(io.BytesIO(datos)))
+
+
+def codificar(esquema, valor):
+    salida = bytearray()
+    compilar_escritor(esquema)(valor, salida)
+    return bytes(salida)
+
+
+def decodificar(escritor, lector, datos):
+    return compilar_lector(escritor, lector)(DecodificadorMemoria(datos))
+
+
+def test_misma_codificacion_que_avro():
+    esquema = parse(json.dumps(COMPLETO))
+    assert codificar(esquema, registro()) == codificar_avro(esquema, registro())
+
+
+def test_lee_lo_que_escribe_avro():
+    esquema = parse(json.dumps(COMPLETO))
+    datos = codificar_avro(esquema, registro())
+    assert decodificar(esquema, esquema, datos) == decodificar_avro(esquema, esquema, datos) == registro()
+
+
+def test_order_ida_y_vuelta(texto_order):
+    esquema = parse(texto_order)
+    valor = {'id': '1', 'customer_name': 'Ana', 'nationality': 'ES', 'email': 'ana@example.com',
+             'total_price': 10.5, 'product': 'libro', 'quantity': 2, 'discount': 0.5, 'is_gift': False,
+             'payment_method': 'PAYPAL', 'order_status': 'SHIPPED'}
+    datos = codificar(esquema, valor)
+    assert datos == codificar_avro(esquema, valor)
+    assert decodificar(esquema, esquema, datos) == valor
+
+
+def test_resolucion_igual_que_avro(texto_order):
+    # Lector con un campo nuevo con default, otro eliminado y una promoción
+    anterior = parse(texto_order)
+    nuevo = json.loads(texto_order)
+    nuevo['fields'] = [c for c in nuevo['fields'] if c['name'] != 'nationality']
+    nuevo['fields'].append({'name': 'tags', 'type': {'type': 'array', 'items': 'string'}, 'default': ['x']})
+    next(c for c in nuevo['fields'] if c['name'] == 'total_price')['type'] = 'double'
+    nuevo = parse(json.dumps(nuevo))
+    valor = {'id': '1', 'customer_name': 'Ana', 'nationality': 'ES', 'email': 'ana@example.com',
+             'total_price': 10.5, 'product': 'libro', 'quantity': 2, 'discount': 0.5, 'is_gift': True,
+             'payment_method': 'CASH', 'order_status': 'PENDING'}
+    datos = codificar_avro(anterior, valor)
+    leido = decodificar(anterior, nuevo, datos)
+    assert leido == decodificar_avro(anterior, nuevo, datos)
+    assert leido['tags'] == ['x'] and 'nationality' not in leido
+
+
+def test_cada_registro_recibe_su_copia_del_default():
+    escritor = parse(json.dumps({'type': 'record', 'name': 'R', 'fields': [{'name': 'a', 'type': 'int'}]}))
+    lector = parse(json.dumps({'type': 'record', 'name': 'R', 'fields': [
+        {'name': 'a', 'type': 'int'}, {'name': 'l', 'type': {'type': 'array', 'items': 'int'}, 'default': [1]}]}))
+    leer = compilar_lector(escritor, lector)
+    datos = codificar(escritor, {'a': 1})
+    primero, segundo = leer(DecodificadorMemoria(datos)), leer(DecodificadorMemoria(datos))
+    primero['l'].append(2)
+    assert segundo['l'] == [1]
+
+
+def test_campo_ausente_sin_default():
+    esquema = parse(json.dumps({'type': 'record', 'name': 'R', 'fields': [
+        {'name': 'a', 'type': 'int'}, {'name': 'b', 'type': 'string', 'default': 'x'}]}))
+    with pytest.raises(avro.errors.AvroTypeException):
+        codificar(esquema, {'b': 'y'})
+    assert codificar(esquema, {'a': 1}) == codificar_avro(esquema, {'a': 1, 'b': 'x'})
+
+
+@pytest.mark.parametrize('indice', [-1, 3])
+def test_indice_de_enum_fuera_de_rango(indice):
+    esquema = parse(json.dumps({'type': 'enum', 'name': 'E', 'symbols': ['A', 'B', 'C']}))
+    datos = bytearray()
+    escribir_long(indice, datos)
+    with pytest.raises(avro.errors.SchemaResolutionException):
+        decodificar(esquema, esquema, bytes(datos))
+
+
+@pytest.mark.parametrize('indice', [-1, 2])
+def test_indice_de_union_fuera_de_rango(indice):
+    esquema = parse(json.dumps(['null', 'int']))
+    datos = bytearray()
+    escribir_long(indice, datos)
+    with pytest.raises(avro.errors.SchemaResolutionException):
+        decodificar(esquema, esquema, bytes(datos))
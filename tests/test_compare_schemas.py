@@ -0,0 +1,27 @@
+# comparar_campos y generar_reporte sobre el camino en streaming de iterar_cambios.
+import io
+import json
+
+from avro.schema import parse
+
+from compare_schemas import comparar_campos, comparar_metadatos, generar_reporte, iterar_cambios
+from reporte import SerializadorTexto, escribir_reporte
+
+
+def test_generar_reporte_igual_que_la_linea_de_comandos(texto_order):
+    anterior = parse(texto_order)
+    esquema = json.loads(texto_order)
+    esquema['fields'] = [c for c in esquema['fields'] if c['name'] != 'nationality']
+    esquema['fields'].append({'name': 'notes', 'type': ['null', 'string'], 'default': None})
+    next(c for c in esquema['fields'] if c['name'] == 'quantity')['default'] = 2
+    nuevo = parse(json.dumps(esquema))
+
+    campos = comparar_campos(anterior, nuevo)
+    assert [c['nombre'] for c in campos['añadidos']] == ['notes']
+    assert [c['nombre'] for c in campos['eliminados']] == ['nationality']
+    assert [c['nombre'] for c in campos['modificados']] == ['quantity']
+
+    salida = io.StringIO()
+    escribir_reporte(iterar_cambios(anterior, nuevo), SerializadorTexto(salida))
+    reporte = generar_reporte({'metadatos': comparar_metadatos(anterior, nuevo), 'campos': campos})
+    assert reporte == salida.getvalue().rstrip('\n')
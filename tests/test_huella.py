@@ -0,0 +1,47 @@
+# Forma canónica y huella Rabin (CRC-64-AVRO) frente a los valores publicados
+# en los datos de prueba de la especificación (share/test/data/schema-tests.txt).
+import json
+
+import pytest
+from avro.schema import parse
+
+from huella import forma_canonica, huella_rabin
+
+# Huellas de la especificación: enteros de 64 bits con signo, como en Java
+HUELLAS_ESPECIFICACION = {
+    '"null"': 7195948357588979594,
+    '"boolean"': -6970731678124411036,
+    '"int"': 8247732601305521295,
+    '"long"': -3434872931120570953,
+    '"float"': 5583340709985441680,
+    '"double"': -8181574048448539266,
+    '"bytes"': 5746618253357095269,
+    '"string"': -8142146995180207161,
+}
+
+
+@pytest.mark.parametrize('esquema, esperada', sorted(HUELLAS_ESPECIFICACION.items()))
+def test_huellas_de_la_especificacion(esquema, esperada):
+    assert huella_rabin(esquema) == f"{esperada & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+def test_forma_canonica_descarta_atributos_y_completa_nombres():
+    esquema = {'type': 'record', 'name': 'A', 'namespace': 'x', 'doc': 'd', 'aliases': ['B'], 'fields': [
+        {'name': 'f', 'type': {'type': 'fixed', 'name': 'F', 'size': 4}, 'doc': 'campo'},
+        {'name': 'g', 'type': {'type': 'array', 'items': 'F'}, 'default': []},
+    ]}
+    assert forma_canonica(esquema) == ('{"name":"x.A","type":"record","fields":[{"name":"f","type":'
+                                       '{"name":"x.F","type":"fixed","size":4}},{"name":"g","type":'
+                                       '{"type":"array","items":"x.F"}}]}')
+
+
+def test_coincide_con_la_huella_de_avro(texto_order):
+    # avro devuelve los 8 bytes en little-endian
+    assert huella_rabin(texto_order) == parse(texto_order).fingerprint('CRC-64-AVRO')[::-1].hex()
+
+
+def test_misma_huella_con_cambios_que_no_afectan_a_la_forma_canonica(texto_order):
+    esquema = json.loads(texto_order)
+    esquema['doc'] = 'Actualizado'
+    esquema['fields'][6]['default'] = 5
+    assert huella_rabin(json.dumps(esquema)) == huella_rabin(texto_order)
@@ -0,0 +1,32 @@
+# Parseo en flujo frente al parseo normal de avro con la versión instalada.
+import json
+
+from avro.schema import parse
+
+import parseo_flujo
+from parseo_flujo import flujo_soportado, parsear_flujo
+
+ANCHO = {'type': 'record', 'name': 'Ancho', 'namespace': 'pruebas', 'fields': [
+    {'name': f'c{i}', 'type': ['null', {'type': 'enum', 'name': 'E', 'symbols': ['A']} if i == 0 else 'pruebas.E'],
+     'default': None} for i in range(500)] + [
+    {'name': 'hijo', 'type': {'type': 'record', 'name': 'Hijo', 'fields': [{'name': 'x', 'type': 'long'}]}}],
+    'doc': 'después de los campos'}
+
+
+def bloques(texto, tamaño=97):
+    return (texto[i:i + tamaño] for i in range(0, len(texto), tamaño))
+
+
+def test_la_version_de_avro_admite_campos_en_flujo():
+    assert flujo_soportado()
+
+
+def test_mismo_esquema_que_el_parseo_normal(texto_order):
+    for texto in (texto_order, json.dumps(ANCHO, indent=2)):
+        assert parsear_flujo(bloques(texto)).to_json() == parse(texto).to_json()
+
+
+def test_sin_soporte_se_leen_los_campos_en_una_lista(monkeypatch):
+    monkeypatch.setattr(parseo_flujo, 'flujo_soportado', lambda: False)
+    texto = json.dumps(ANCHO)
+    assert parsear_flujo(bloques(texto)).to_json() == parse(texto).to_json()
@@ -0,0 +1,90 @@
+# Resolución escritor/lector: aliases, promociones y defaults de enums.
+import json
+
+import pytest
+from avro.schema import parse
+
+from resolucion import resolver
+
+
+def record(campos, nombre='R'):
+    return parse(json.dumps({'type': 'record', 'name': nombre, 'fields': campos}))
+
+
+def enum(simbolos, **extra):
+    return {'type': 'enum', 'name': 'E', 'symbols': simbolos, **extra}
+
+
+def incompatibles(hallazgos):
+    return [h for h in hallazgos if not h['compatible']]
+
+
+def test_mismo_esquema_sin_hallazgos():
+    esquema = record([{'name': 'a', 'type': 'int'}, {'name': 'b', 'type': ['null', 'string'], 'default': None}])
+    assert resolver(esquema, esquema) == []
+
+
+def test_campo_renombrado_con_alias():
+    escritor = record([{'name': 'a', 'type': 'int'}])
+    lector = record([{'name': 'b', 'type': 'int', 'aliases': ['a']}])
+    assert resolver(escritor, lector) == []
+
+
+def test_record_renombrado_con_alias():
+    escritor = record([{'name': 'a', 'type': 'int'}], nombre='Anterior')
+    lector = parse(json.dumps({'type': 'record', 'name': 'Nuevo', 'aliases': ['Anterior'],
+                               'fields': [{'name': 'a', 'type': 'int'}]}))
+    assert incompatibles(resolver(escritor, lector)) == []
+
+
+def test_el_nombre_tiene_prioridad_sobre_el_alias():
+    # 'a' lo lee el campo que se llama 'a'; el que lo declara como alias queda sin valor
+    escritor = record([{'name': 'a', 'type': 'int'}])
+    lector = record([{'name': 'a', 'type': 'string'}, {'name': 'b', 'type': 'int', 'aliases': ['a']}])
+    errores = {(h['ruta'], h['tipo']) for h in incompatibles(resolver(escritor, lector))}
+    assert errores == {('a', 'tipo_incompatible'), ('b', 'campo_sin_default')}
+
+
+def test_campo_nuevo_sin_default_es_incompatible():
+    escritor = record([{'name': 'a', 'type': 'int'}])
+    lector = record([{'name': 'a', 'type': 'int'}, {'name': 'n', 'type': 'int'}])
+    assert [(h['ruta'], h['tipo']) for h in incompatibles(resolver(escritor, lector))] == [('n', 'campo_sin_default')]
+
+
+@pytest.mark.parametrize('escritor, lector', [
+    ('int', 'long'), ('int', 'float'), ('int', 'double'), ('long', 'float'), ('long', 'double'),
+    ('float', 'double'), ('string', 'bytes'), ('bytes', 'string'),
+])
+def test_promociones_permitidas(escritor, lector):
+    hallazgos = resolver(record([{'name': 'a', 'type': escritor}]), record([{'name': 'a', 'type': lector}]))
+    assert [(h['tipo'], h['compatible']) for h in hallazgos] == [('promocion', True)]
+
+
+@pytest.mark.parametrize('escritor, lector', [('long', 'int'), ('double', 'float'), ('string', 'int')])
+def test_promociones_no_permitidas(escritor, lector):
+    hallazgos = resolver(record([{'name': 'a', 'type': escritor}]), record([{'name': 'a', 'type': lector}]))
+    assert [(h['tipo'], h['compatible']) for h in hallazgos] == [('tipo_incompatible', False)]
+
+
+def test_promocion_dentro_de_una_union():
+    escritor = record([{'name': 'a', 'type': ['null', 'int']}])
+    lector = record([{'name': 'a', 'type': ['null', 'long']}])
+    assert incompatibles(resolver(escritor, lector)) == []
+
+
+def test_simbolo_eliminado_con_default_del_enum():
+    escritor = record([{'name': 'e', 'type': enum(['A', 'B', 'C'])}])
+    lector = record([{'name': 'e', 'type': enum(['A', 'B'], default='A')}])
+    assert [(h['tipo'], h['compatible']) for h in resolver(escritor, lector)] == [('enum_simbolos', True)]
+
+
+def test_simbolo_eliminado_sin_default_del_enum():
+    escritor = record([{'name': 'e', 'type': enum(['A', 'B', 'C'])}])
+    lector = record([{'name': 'e', 'type': enum(['A', 'B'])}])
+    assert [(h['tipo'], h['compatible']) for h in resolver(escritor, lector)] == [('enum_simbolos', False)]
+
+
+def test_simbolo_añadido_es_compatible():
+    escritor = record([{'name': 'e', 'type': enum(['A', 'B'])}])
+    lector = record([{'name': 'e', 'type': enum(['A', 'B', 'C'])}])
+    assert incompatibles(resolver(escritor, lector)) == []
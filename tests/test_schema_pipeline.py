@@ -0,0 +1,55 @@
+# Deduplicación del registro en schema_pipeline contra el Schema Registry falso.
+import json
+
+from schema_pipeline import anotar, ejecutar_pipeline, huella_registro
+
+SUBJECT = 'orders-value'
+
+
+def escribir(tmp_path, texto):
+    ruta = tmp_path / 'Order.avsc'
+    ruta.write_text(texto)
+    return str(ruta)
+
+
+def registros(registry):
+    return sum(n for (metodo, _), n in registry.peticiones.items() if metodo == 'POST')
+
+
+def test_la_anotacion_no_cambia_la_huella(texto_order):
+    assert huella_registro(anotar(texto_order, 0)) == huella_registro(texto_order)
+
+
+def test_subject_nuevo_se_registra(registry, tmp_path, texto_order):
+    resumen = ejecutar_pipeline(escribir(tmp_path, texto_order), SUBJECT, registry.url)
+    assert resumen['registrado'] and resumen['schema_id'] == 1
+    assert json.loads(registry.esquemas[1])['doc'].startswith('Actualizado el ')
+
+
+def test_mismo_esquema_ya_registrado_no_se_registra(registry, tmp_path, texto_order):
+    registry.añadir(SUBJECT, anotar(texto_order, 0))
+    resumen = ejecutar_pipeline(escribir(tmp_path, texto_order), SUBJECT, registry.url)
+    assert resumen['compatible']
+    assert resumen['version_existente'] == 1 and not resumen['registrado']
+    assert registros(registry) == 0
+
+
+def test_cambio_solo_de_default_se_registra(registry, tmp_path, texto_order):
+    # La forma canónica no cambia, pero los consumidores sí ven el nuevo default
+    registry.añadir(SUBJECT, anotar(texto_order, 0))
+    esquema = json.loads(texto_order)
+    next(c for c in esquema['fields'] if c['name'] == 'quantity')['default'] = 2
+    resumen = ejecutar_pipeline(escribir(tmp_path, json.dumps(esquema, indent=2)), SUBJECT, registry.url)
+    assert resumen['version_existente'] is None
+    assert resumen['registrado'] and resumen['schema_id'] == 2
+    assert registros(registry) == 1
+
+
+def test_version_anterior_igual_no_se_registra(registry, tmp_path, texto_order):
+    # Volver a un esquema que ya tuvo el subject reutiliza esa versión
+    esquema = json.loads(texto_order)
+    esquema['fields'].append({'name': 'notes', 'type': ['null', 'string'], 'default': None})
+    registry.añadir(SUBJECT, anotar(texto_order, 0))
+    registry.añadir(SUBJECT, anotar(json.dumps(esquema), 0))
+    resumen = ejecutar_pipeline(escribir(tmp_path, texto_order), SUBJECT, registry.url)
+    assert resumen['version_existente'] == 1 and not resumen['registrado']
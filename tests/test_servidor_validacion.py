@@ -0,0 +1,30 @@
+# Agrupación de peticiones idénticas en el servidor de validación.
+import asyncio
+import threading
+
+from servidor_validacion import ServidorValidacion
+
+
+def test_cancelar_la_primera_peticion_no_bloquea_a_las_agrupadas():
+    liberar = threading.Event()
+    llamadas = []
+
+    def calculo():
+        llamadas.append(1)
+        liberar.wait(5)
+        return {'compatible': True}
+
+    async def escenario():
+        servidor = ServidorValidacion()
+        primera = asyncio.ensure_future(servidor._calcular('clave', calculo))
+        await asyncio.sleep(0.05)
+        segunda = asyncio.ensure_future(servidor._calcular('clave', calculo))
+        await asyncio.sleep(0.05)
+        primera.cancel()
+        await asyncio.sleep(0.05)
+        liberar.set()
+        return await asyncio.wait_for(segunda, 5), servidor.en_curso
+
+    resultado, en_curso = asyncio.run(escenario())
+    assert resultado == {'compatible': True}
+    assert en_curso == {} and len(llamadas) == 2
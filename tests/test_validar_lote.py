@@ -0,0 +1,21 @@
+# Validación por lotes: los esquemas se leen como en validate_compatibility.
+import json
+
+from validar_lote import validar_lote
+
+ESTADO = {'type': 'enum', 'name': 'Estado', 'namespace': 'pruebas', 'symbols': ['A', 'B']}
+
+
+def test_resuelve_tipos_de_otros_archivos(registry, monkeypatch, tmp_path):
+    # Pedido.avsc usa el enum definido en Estado.avsc, como Order.avsc con PaymentMethod
+    monkeypatch.setenv('SCHEMA_REGISTRY_URL', registry.url)
+    (tmp_path / 'Estado.avsc').write_text(json.dumps(ESTADO))
+    pedido = {'type': 'record', 'name': 'Pedido', 'namespace': 'pruebas', 'fields': [
+        {'name': 'id', 'type': 'string'}, {'name': 'estado', 'type': 'pruebas.Estado'}]}
+    (tmp_path / 'Pedido.avsc').write_text(json.dumps(pedido))
+    registrado = dict(pedido, fields=[pedido['fields'][0], dict(pedido['fields'][1], type=ESTADO)])
+    registry.añadir('pedidos-value', json.dumps(registrado))
+
+    resumen = validar_lote({str(tmp_path / 'Pedido.avsc'): 'pedidos-value'}, hilos=1, procesos=1)
+    assert resumen['errores'] == 0, resumen['resultados']
+    assert resumen['compatibles'] == 1
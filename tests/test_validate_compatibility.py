@@ -0,0 +1,81 @@
+# Validación de compatibilidad por pares y transitiva.
+import json
+import os
+import subprocess
+import sys
+
+from avro.schema import parse
+
+from huella import huella, huella_completa
+from servidor_validacion import ServidorValidacion
+from validate_compatibility import analizar_cambios, validar_transitivo
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'validate_compatibility.py')
+
+
+def record(campos):
+    return json.dumps({'type': 'record', 'name': 'R', 'fields': campos})
+
+
+def test_huella_completa_distingue_defaults():
+    con_default = record([{'name': 'x', 'type': 'int', 'default': 0}])
+    sin_default = record([{'name': 'x', 'type': 'int'}])
+    assert huella(con_default) == huella(sin_default)
+    assert huella_completa(con_default) != huella_completa(sin_default)
+
+
+def test_huella_completa_ignora_doc_salvo_en_defaults():
+    base = {'type': 'record', 'name': 'R', 'fields': [
+        {'name': 'm', 'type': {'type': 'map', 'values': 'string'}, 'default': {'doc': 'a'}}]}
+    documentado = dict(base, doc='Actualizado', fields=[dict(base['fields'][0], doc='campo')])
+    otro_default = dict(base, fields=[dict(base['fields'][0], default={'doc': 'b'})])
+    assert huella_completa(documentado) == huella_completa(base)
+    assert huella_completa(otro_default) != huella_completa(base)
+
+
+def test_analisis_columnar_resuelve_aliases_y_tipos_cambiados():
+    # Solo se resuelven los campos con tipo distinto y los que no tienen pareja por nombre
+    anterior = parse(record([
+        {'name': 'id', 'type': 'string'}, {'name': 'a', 'type': 'int'}, {'name': 'n', 'type': 'int'},
+        {'name': 'sig', 'type': ['null', 'R'], 'default': None}]))
+    nuevo = parse(record([
+        {'name': 'id', 'type': 'string'}, {'name': 'b', 'type': 'long', 'aliases': ['a']},
+        {'name': 'n', 'type': 'string'}, {'name': 'sig', 'type': ['null', 'R'], 'default': None},
+        {'name': 'x', 'type': 'int', 'default': 0}]))
+    cambios = analizar_cambios(anterior, nuevo)
+    assert cambios['añadidos_con_default'] == ['x'] and cambios['añadidos_sin_default'] == []
+    assert cambios['eliminados_sin_default'] == ['a']
+    assert cambios['modificados'] == ['b', 'n']
+    assert cambios['promociones'] == ['b: int → long']
+    assert cambios['incompatibles_backward'] == ['n: int no puede leerse como string']
+
+
+def test_transitivo_no_omite_versiones_que_solo_difieren_en_un_default():
+    v1 = record([{'name': 'a', 'type': 'int'}, {'name': 'x', 'type': 'int', 'default': 0}])
+    v2 = record([{'name': 'a', 'type': 'int'}, {'name': 'x', 'type': 'int'}])
+    candidato = record([{'name': 'a', 'type': 'int'}])
+    resultados, omitidas = validar_transitivo(candidato, {1: v1, 2: v2}, 'FORWARD_TRANSITIVE', procesos=1)
+    assert omitidas == []
+    errores = {version: errores for version, errores, _ in resultados}
+    assert errores[1] == [] and errores[2]
+
+
+def test_transitivo_omite_versiones_repetidas():
+    v1 = record([{'name': 'a', 'type': 'int'}])
+    v2 = json.dumps({'doc': 'Actualizado', **json.loads(v1)})
+    resultados, omitidas = validar_transitivo(v1, {1: v1, 2: v2}, 'BACKWARD_TRANSITIVE', procesos=1)
+    assert resultados == [] and len(omitidas) == 2
+
+
+def test_default_no_valido_no_toma_el_atajo(registry, tmp_path):
+    anterior = record([{'name': 'a', 'type': 'int', 'default': 1}])
+    nuevo = record([{'name': 'a', 'type': 'int', 'default': 'no es un int'}])
+    assert not ServidorValidacion()._validar(anterior, nuevo, 'BACKWARD')['compatible']
+
+    (tmp_path / 'anterior.avsc').write_text(anterior)
+    (tmp_path / 'nuevo.avsc').write_text(nuevo)
+    salida = subprocess.run(
+        [sys.executable, SCRIPT, str(tmp_path / 'anterior.avsc'), str(tmp_path / 'nuevo.avsc')],
+        env=dict(os.environ, SCHEMA_REGISTRY_URL=registry.url), capture_output=True, text=True)
+    assert salida.returncode == 1
+    assert 'Sin cambios semánticos' not in salida.stdout
@@ -0,0 +1,46 @@
+# Validación de defaults y su codificación binaria cacheada.
+import json
+import struct
+
+from avro.schema import parse
+
+from valores_default import default_codificado, errores_valor, validar_defaults
+
+
+def test_order_tiene_defaults_validos(texto_order):
+    assert validar_defaults(parse(texto_order)) == []
+
+
+def test_entero_como_default_de_float(texto_order):
+    # El 1 de 'discount' es válido y se codifica como 1.0
+    esquema = parse(texto_order)
+    discount = next(c for c in esquema.fields if c.name == 'discount')
+    assert errores_valor(discount.type, discount.default, 'discount') == []
+    assert default_codificado(discount.type, discount.default) == struct.pack('<f', 1.0)
+
+
+def test_defaults_invalidos_en_order(texto_order):
+    esquema = json.loads(texto_order)
+    campos = {c['name']: c for c in esquema['fields']}
+    campos['quantity']['default'] = 'uno'
+    campos['is_gift']['default'] = 0
+    campos['payment_method']['default'] = 'BIZUM'
+    errores = validar_defaults(parse(json.dumps(esquema)))
+    assert len(errores) == 3
+    assert any(e.startswith('quantity:') for e in errores)
+    assert any(e.startswith('is_gift:') for e in errores)
+    assert any("'BIZUM'" in e for e in errores)
+
+
+def test_default_de_union_de_la_primera_rama():
+    union = parse(json.dumps(['null', 'string']))
+    assert errores_valor(union, None, 'f') == []
+    assert errores_valor(union, 'x', 'f') != []
+    assert default_codificado(union, None) == b'\x00'
+
+
+def test_la_cache_distingue_tipos_con_el_mismo_valor():
+    enteros = parse(json.dumps({'type': 'array', 'items': 'int'}))
+    dobles = parse(json.dumps({'type': 'array', 'items': 'double'}))
+    assert default_codificado(enteros, [1]) == b'\x02\x02\x00'
+    assert default_codificado(dobles, [1]) == b'\x02' + struct.pack('<d', 1.0) + b'\x00'